@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional
+import random
+import threading
+import time
+
+
+class RateLimited(Exception):
+    """Shaped like spotipy's SpotifyException for a 429 so the real backoff path runs."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__('rate limited')
+        self.http_status = 429
+        self.headers = {'Retry-After': str(retry_after)}
+
+
+class FakeSpotify:
+    """In-process stand-in for the spotipy client used by brackify.spotify_client.
+
+    Every playlist ID serves `total` tracks. Each call sleeps for `page_latency`
+    seconds, and a `rate_limit_rate` fraction of calls raise a 429 first.
+    """
+
+    def __init__(
+        self,
+        total: int = 500,
+        page_latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.0,
+        snapshot_id: str = 'bench-snapshot',
+        seed: int = 0,
+        unavailable_every: int = 0,
+    ) -> None:
+        self.total = total
+        self.page_latency = page_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.snapshot_id = snapshot_id
+        self.unavailable_every = unavailable_every
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rate_limited = 0
+
+    def _call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            limited = self.rate_limit_rate > 0 and self._rng.random() < self.rate_limit_rate
+            if limited:
+                self.rate_limited += 1
+
+        if self.page_latency:
+            time.sleep(self.page_latency)
+
+        if limited:
+            raise RateLimited(self.retry_after)
+
+    def _track(self, playlist_id: str, index: int) -> Optional[Dict[str, Any]]:
+        if self.unavailable_every and index % self.unavailable_every == self.unavailable_every - 1:
+            return None
+
+        return {
+            'id': f'{playlist_id}-{index}',
+            'name': f'Song {index}',
+            'preview_url': None,
+            'album': {'name': f'Album {index // 12}', 'images': [{'url': f'https://i.scdn.co/image/{index}'}]},
+            'artists': [{'name': f'Artist {index % 37}'}],
+        }
+
+    def playlist(self, playlist_id: str, fields: Optional[str] = None) -> Dict[str, Any]:
+        self._call()
+        return {'snapshot_id': self.snapshot_id, 'tracks': {'total': self.total}}
+
+    def playlist_items(self, playlist_id: str, offset: int = 0, limit: int = 100, fields: Any = None, additional_types: Any = None) -> Dict[str, Any]:
+        self._call()
+        end = min(offset + limit, self.total)
+        items: List[Dict[str, Any]] = [{'track': self._track(playlist_id, i)} for i in range(offset, end)]
+        return {'items': items, 'total': self.total, 'next': 'more' if end < self.total else None}
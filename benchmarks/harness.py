@@ -0,0 +1,119 @@
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import math
+import time
+import tracemalloc
+
+
+class ScenarioResult(TypedDict):
+    ops: int
+    errors: int
+    concurrency: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_kb: float
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+
+    if not sorted_values:
+        return 0.0
+
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _timed(op: Callable[[int], Any], index: int) -> Optional[float]:
+    start = time.perf_counter()
+    try:
+        op(index)
+    except Exception:
+        return None
+
+    return time.perf_counter() - start
+
+
+def _run_ops(op: Callable[[int], Any], start: int, iterations: int, concurrency: int) -> List[Optional[float]]:
+    indexes = range(start, start + iterations)
+    if concurrency <= 1:
+        return [_timed(op, i) for i in indexes]
+
+    with ThreadPoolExecutor(max_workers = concurrency) as pool:
+        return list(pool.map(lambda i: _timed(op, i), indexes))
+
+
+def measure(
+    op: Callable[[int], Any],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+    memory_iterations: int = 200,
+) -> ScenarioResult:
+    """Time `iterations` calls of op(i), then repeat a shorter pass under tracemalloc.
+
+    Latencies come from the untraced pass because tracemalloc slows allocation-heavy
+    code considerably; the traced pass only reports peak allocated memory.
+    """
+
+    if warmup:
+        _run_ops(op, 0, warmup, concurrency)
+
+    gc.collect()
+    started = time.perf_counter()
+    samples = _run_ops(op, warmup, iterations, concurrency)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample for sample in samples if sample is not None)
+    errors = len(samples) - len(latencies)
+
+    peak_kb = 0.0
+    if memory_iterations > 0:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _run_ops(op, warmup + iterations, min(iterations, memory_iterations), concurrency)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_kb = peak / 1024
+
+    return {
+        'ops': len(samples),
+        'errors': errors,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 4),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round((latencies[-1] if latencies else 0.0) * 1000, 3),
+        'peak_kb': round(peak_kb, 1),
+    }
+
+
+def compare(current: Dict[str, ScenarioResult], baseline: Dict[str, ScenarioResult], threshold: float) -> List[Dict[str, Any]]:
+    """Compare scenario results; a scenario regresses when p95 latency rises or
+    throughput falls by more than `threshold` (a fraction) against the baseline."""
+
+    rows = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+
+        p95_ratio = result['p95_ms'] / base['p95_ms'] if base['p95_ms'] else 1.0
+        throughput_ratio = result['throughput'] / base['throughput'] if base['throughput'] else 1.0
+        rows.append({
+            'scenario': name,
+            'p95_ratio': round(p95_ratio, 3),
+            'throughput_ratio': round(throughput_ratio, 3),
+            'regressed': p95_ratio > 1 + threshold or throughput_ratio < 1 - threshold,
+        })
+
+    return rows
@@ -0,0 +1,241 @@
+"""Benchmark the fetch, seeding, storage and request paths against local stand-ins.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --fail-on-regression
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from benchmarks.fake_spotify import FakeSpotify
+from benchmarks.harness import ScenarioResult, compare, measure
+
+# Keep the app's background threads from adding noise to the measurements.
+os.environ.setdefault('BRACKET_MEMORY_SWEEP_SECONDS', '0')
+os.environ.setdefault('VOTE_FLUSH_SECONDS', '0')
+
+import brackify.app as brackify_app  # noqa: E402
+from brackify.brackets import build_seed_list  # noqa: E402
+from brackify.spotify_client import fetch_playlist_tracks  # noqa: E402
+from brackify.store import BracketStore, InMemoryBracketStore, RedisBracketStore  # noqa: E402
+
+Scenario = Callable[[argparse.Namespace], Callable[[int], Any]]
+
+
+def make_store(backend: str) -> BracketStore:
+    if backend == 'memory':
+        return InMemoryBracketStore()
+
+    if backend == 'fakeredis':
+        import fakeredis  # type: ignore
+
+        return RedisBracketStore('redis://fake', client = fakeredis.FakeRedis())
+
+    return RedisBracketStore(backend)
+
+
+def make_spotify(args: argparse.Namespace) -> FakeSpotify:
+    return FakeSpotify(
+        total = args.playlist_size,
+        page_latency = args.page_latency_ms / 1000,
+        rate_limit_rate = args.rate_limit_rate,
+        seed = args.seed,
+    )
+
+
+def make_app(args: argparse.Namespace, store: BracketStore, spotify: FakeSpotify) -> Any:
+    brackify_app.get_spotify_client = lambda: spotify
+    app = brackify_app.create_app(store)
+    app.config['SERVER_NAME'] = 'bench.local'
+    return app
+
+
+def _create_body(playlist: str, name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    return {'playlist': playlist, 'order': args.order, 'size': args.bracket_size, 'bracket_name': name}
+
+
+def scenario_fetch_playlist(args: argparse.Namespace) -> Callable[[int], Any]:
+    spotify = make_spotify(args)
+    return lambda i: fetch_playlist_tracks(f'pl{i}', spotify, concurrency = args.fetch_concurrency)
+
+
+def scenario_fetch_sample(args: argparse.Namespace) -> Callable[[int], Any]:
+    spotify = make_spotify(args)
+    return lambda i: fetch_playlist_tracks(f'pl{i}', spotify, sample_size = args.bracket_size, rng = random.Random(i))
+
+
+def scenario_build_seed_list(args: argparse.Namespace) -> Callable[[int], Any]:
+    tracks = fetch_playlist_tracks('seeds', FakeSpotify(total = args.playlist_size))
+    return lambda i: build_seed_list(tracks, args.bracket_size, order = 'randomized', rng = random.Random(i))
+
+
+def scenario_store_save_get(args: argparse.Namespace) -> Callable[[int], Any]:
+    store = make_store(args.backend)
+    tracks = fetch_playlist_tracks('store', FakeSpotify(total = args.bracket_size))
+    payload = {'seeds': list(tracks), 'size': args.bracket_size, 'bracket_name': 'bench'}
+
+    def op(i: int) -> None:
+        store.save(f'b{i}', payload, 3600)
+        store.get(f'b{i}')
+
+    return op
+
+
+def scenario_create_miss(args: argparse.Namespace) -> Callable[[int], Any]:
+    app = make_app(args, make_store(args.backend), make_spotify(args))
+    client = app.test_client()
+    # Distinct playlists, so neither the bracket nor the playlist cache can help.
+    return lambda i: _expect(client.post('/api/bracket', json = _create_body(f'miss{i}', f'Miss {i}', args)), 200)
+
+
+def scenario_create_hit(args: argparse.Namespace) -> Callable[[int], Any]:
+    app = make_app(args, make_store(args.backend), make_spotify(args))
+    client = app.test_client()
+    body = _create_body('hit', 'Hit', args)
+    _expect(client.post('/api/bracket', json = body), 200)
+    return lambda i: _expect(client.post('/api/bracket', json = body), 200)
+
+
+def scenario_refresh(args: argparse.Namespace) -> Callable[[int], Any]:
+    # Brackets created by one worker and requested through another, whose local index
+    # is cold: each request resolves the signature in the store and extends its TTLs.
+    store = make_store(args.backend)
+    spotify = make_spotify(args)
+    creator = make_app(args, store, spotify).test_client()
+    count = args.iterations + args.warmup + args.iterations
+    for i in range(count):
+        _expect(creator.post('/api/bracket', json = _create_body('refresh', f'Refresh {i}', args)), 200)
+
+    client = make_app(args, store, spotify).test_client()
+    return lambda i: _expect(client.post('/api/bracket', json = _create_body('refresh', f'Refresh {i}', args)), 200)
+
+
+def scenario_read_heavy(args: argparse.Namespace) -> Callable[[int], Any]:
+    store = make_store(args.backend)
+    app = make_app(args, store, make_spotify(args))
+    client = app.test_client()
+
+    ids: List[Tuple[str, str]] = []
+    for i in range(50):
+        bracket_id = _expect(client.post('/api/bracket', json = _create_body(f'read{i}', f'Read {i}', args)), 200)['bracket_id']
+        etag = client.get(f'/api/bracket/{bracket_id}').headers['ETag']
+        ids.append((bracket_id, etag))
+
+    def op(i: int) -> None:
+        bracket_id, etag = ids[i % len(ids)]
+        kind = i % 10
+        if kind < 7:
+            _expect(client.get(f'/api/bracket/{bracket_id}', headers = {'Accept-Encoding': 'gzip'}), 200)
+        elif kind < 9:
+            _expect(client.get(f'/api/bracket/{bracket_id}', headers = {'If-None-Match': etag}), 304)
+        else:
+            _expect(client.get(f'/bracket/{bracket_id}'), 200)
+
+    return op
+
+
+def _expect(response: Any, status: int) -> Any:
+    if response.status_code != status:
+        raise RuntimeError(f'expected {status}, got {response.status_code}')
+
+    return response.get_json(silent = True)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'fetch_playlist': scenario_fetch_playlist,
+    'fetch_sample': scenario_fetch_sample,
+    'build_seed_list': scenario_build_seed_list,
+    'store_save_get': scenario_store_save_get,
+    'create_miss': scenario_create_miss,
+    'create_hit': scenario_create_hit,
+    'refresh': scenario_refresh,
+    'read_heavy': scenario_read_heavy,
+}
+
+
+def parse_args(argv: Any = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = 'Run Brackify benchmarks against a local Spotify stand-in.')
+    parser.add_argument('--scenario', action = 'append', choices = sorted(SCENARIOS), help = 'Scenario to run (repeatable; default: all).')
+    parser.add_argument('--iterations', type = int, default = 500, help = 'Timed operations per scenario (default: 500).')
+    parser.add_argument('--warmup', type = int, default = 20, help = 'Untimed operations before measuring (default: 20).')
+    parser.add_argument('--concurrency', type = int, default = 1, help = 'Threads issuing operations (default: 1).')
+    parser.add_argument('--memory-iterations', type = int, default = 100, help = 'Operations traced for peak memory; 0 skips it (default: 100).')
+    parser.add_argument('--backend', default = 'fakeredis', help = 'memory, fakeredis or a redis:// URL (default: fakeredis).')
+    parser.add_argument('--playlist-size', type = int, default = 500, help = 'Tracks in every fake playlist (default: 500).')
+    parser.add_argument('--page-latency-ms', type = float, default = 0.0, help = 'Simulated latency per Spotify call (default: 0).')
+    parser.add_argument('--rate-limit-rate', type = float, default = 0.0, help = 'Fraction of Spotify calls answered with 429 (default: 0).')
+    parser.add_argument('--bracket-size', type = int, default = 32, help = 'Bracket size for create scenarios (default: 32).')
+    parser.add_argument('--order', choices = ('playlist', 'randomized'), default = 'randomized', help = 'Bracket order for create scenarios.')
+    parser.add_argument('--fetch-concurrency', type = int, default = 4, help = 'Parallel page fetches in fetch_playlist (default: 4).')
+    parser.add_argument('--seed', type = int, default = 0, help = 'Seed for the fake API and sampling (default: 0).')
+    parser.add_argument('--output', help = 'Write results as JSON to this path.')
+    parser.add_argument('--baseline', help = 'Compare against results previously written with --output.')
+    parser.add_argument('--threshold', type = float, default = 0.15, help = 'Allowed p95/throughput change before flagging (default: 0.15).')
+    parser.add_argument('--fail-on-regression', action = 'store_true', help = 'Exit non-zero when a scenario regresses.')
+
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, ScenarioResult] = {}
+    original_client = brackify_app.get_spotify_client
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            op = SCENARIOS[name](args)
+            results[name] = measure(
+                op,
+                args.iterations,
+                concurrency = args.concurrency,
+                warmup = args.warmup,
+                memory_iterations = args.memory_iterations,
+            )
+    finally:
+        brackify_app.get_spotify_client = original_client
+
+    options = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'fail_on_regression')}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'options': options,
+        },
+        'scenarios': results,
+    }
+
+
+def main(argv: Any = None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+
+    print(f"{'scenario':<16} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9} {'errors':>7}")
+    for name, result in report['scenarios'].items():
+        print(
+            f"{name:<16} {result['throughput']:>10.1f} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+            f"{result['p99_ms']:>9.3f} {result['peak_kb']:>9.1f} {result['errors']:>7}"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as handle:
+            json.dump(report, handle, indent = 2, sort_keys = True)
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, encoding = 'utf-8') as handle:
+            baseline = json.load(handle)
+
+        print(f"\n{'scenario':<16} {'p95 x':>8} {'ops/s x':>8}")
+        for row in compare(report['scenarios'], baseline.get('scenarios', {}), args.threshold):
+            flag = '  REGRESSED' if row['regressed'] else ''
+            print(f"{row['scenario']:<16} {row['p95_ratio']:>8.3f} {row['throughput_ratio']:>8.3f}{flag}")
+            regressed = regressed or row['regressed']
+
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,39 +1,39 @@
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
+import hashlib
+import hmac
+import json
 import os
-import secrets
-from flask import Flask, jsonify, render_template, request, url_for
-from brackify.brackets import AllowedBracketSizes, build_seed_list, chunk_matches
-from brackify.spotify_client import get_spotify_client, fetch_playlist_tracks
-from brackify.store import BracketStore, create_store_from_env
+import time
+from flask import Flask, Response, copy_current_request_context, g, jsonify, render_template, request, url_for
+from markupsafe import Markup
+from brackify import metrics
+from brackify.creation import (
+    BULK_FETCH_CONCURRENCY,
+    BULK_MAX_BRACKETS,
+    EXPIRATION_HOURS,
+    LEASE_SECONDS,
+    bracket_signature,
+    build_bracket_payload,
+    create_brackets_bulk,
+    now,
+    parse_bracket_request,
+    remaining_ttl_seconds,
+    signature_key,
+)
+from brackify.encoded import EncodedBracket, EncodedBracketCache
+from brackify.images import ThumbnailCache, image_etag
+from brackify.jobs import BracketJobQueue, QueueFull
+from brackify.playlist_cache import PlaylistTrackCache
+from brackify.singleflight import SingleFlight
+from brackify.spotify_client import TrackInfo, fetch_playlist_tracks, get_client_manager, get_spotify_client
+from brackify.store import BracketStore, create_memory_store_from_env, create_store_from_env
+from brackify.votes import VoteAggregator, applied_counts, tally_picks
+from brackify.warmer import PlaylistWarmer
 
-EXPIRATION_HOURS = 72
 EXPIRATION_DELTA = timedelta(hours = EXPIRATION_HOURS)
-
-
-def now() -> datetime:
-    return datetime.now(timezone.utc)
-
-
-def remaining_ttl_seconds(created_at: datetime, expiration_delta: timedelta) -> int:
-    elapsed = now() - created_at
-    remaining = expiration_delta - elapsed
-    return max(0, int(remaining.total_seconds()))
-
-
-def bracket_signature(playlist: str, size: int, order: str, bracket_name: str) -> Tuple[str, int, str, str]:
-    return (
-        playlist.strip(),
-        size,
-        order.strip().lower(),
-        bracket_name.strip(),
-    )
-
-
-def signature_key(signature: Tuple[str, int, str, str]) -> str:
-    playlist, size, order, bracket_name = signature
-    return '|'.join([playlist, str(size), order, bracket_name])
+LEASE_POLL_SECONDS = 0.1
 
 
 def create_app(store: Optional[BracketStore] = None, expiration_hours: Optional[int] = None) -> Flask:
@@ -44,7 +44,77 @@ def create_app(store: Optional[BracketStore] = None, expiration_hours: Optional[
     app.bracket_ttl_seconds = int(app.expiration_delta.total_seconds())  # type: ignore[attr-defined]
 
     app.bracket_store = store or create_store_from_env()  # type: ignore[attr-defined]
-    app.bracket_index: Dict[Tuple[str, int, str, str], str] = {}  # type: ignore[attr-defined]
+    if metrics.enabled():
+        app.bracket_store = metrics.InstrumentedStore(app.bracket_store)  # type: ignore[attr-defined]
+    app.spotify_clients = get_client_manager()  # type: ignore[attr-defined]
+    app.fetch_concurrency = app.spotify_clients.settings['fetch_concurrency']  # type: ignore[attr-defined]
+
+    playlist_cache = PlaylistTrackCache.from_env(app.bracket_store)  # type: ignore[attr-defined]
+    app.playlist_cache = playlist_cache if playlist_cache.max_entries > 0 else None  # type: ignore[attr-defined]
+    # Signature -> bracket ID lookups, bounded and expired exactly like the in-memory store.
+    app.bracket_index = create_memory_store_from_env()  # type: ignore[attr-defined]
+    app.bracket_flights = SingleFlight()  # type: ignore[attr-defined]
+    app.encoded_brackets = EncodedBracketCache(int(os.getenv('BRACKET_ENCODED_CACHE_ENTRIES', 1024)))  # type: ignore[attr-defined]
+    app.lease_seconds = int(os.getenv('BRACKET_LEASE_SECONDS', LEASE_SECONDS))  # type: ignore[attr-defined]
+    app.admin_token = os.getenv('BRACKIFY_ADMIN_TOKEN') or None  # type: ignore[attr-defined]
+    app.bracket_jobs = BracketJobQueue(  # type: ignore[attr-defined]
+        app.bracket_store,  # type: ignore[attr-defined]
+        workers = int(os.getenv('BRACKET_JOB_WORKERS', 0)),
+        max_queued = int(os.getenv('BRACKET_JOB_MAX_QUEUED', 32)),
+        stale_seconds = float(os.getenv('BRACKET_JOB_STALE_SECONDS', 60)),
+    )
+    app.thumbnails = ThumbnailCache.from_env()  # type: ignore[attr-defined]
+    app.warmer = PlaylistWarmer.from_env(  # type: ignore[attr-defined]
+        app.bracket_store,  # type: ignore[attr-defined]
+        app.playlist_cache,  # type: ignore[attr-defined]
+        lambda: get_spotify_client(),
+        app.bracket_ttl_seconds,  # type: ignore[attr-defined]
+    )
+    app.vote_aggregator = VoteAggregator(  # type: ignore[attr-defined]
+        app.bracket_store,  # type: ignore[attr-defined]
+        flush_interval = float(os.getenv('VOTE_FLUSH_SECONDS', 1.0)),
+    )
+
+    if metrics.enabled():
+        @app.before_request
+        def _start_timing():
+            g.metrics_token = metrics.begin_request()
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def _finish_timing(response: Response) -> Response:
+            token = g.pop('metrics_token', None)
+            if token is None:
+                return response
+
+            elapsed = time.perf_counter() - g.pop('request_started')
+            stages = metrics.end_request(token)
+            metrics.registry().observe(  # type: ignore[union-attr]
+                'request_seconds',
+                elapsed,
+                endpoint = request.endpoint or 'unknown',
+                method = request.method,
+                status = str(response.status_code),
+            )
+            response.headers['Server-Timing'] = metrics.server_timing(stages, elapsed)
+            return response
+
+    @app.get('/metrics')
+    def metrics_endpoint():
+        registry = metrics.registry()
+        if registry is None:
+            return jsonify({'error': 'Metrics are disabled'}), 404
+
+        return Response(registry.render(), mimetype = 'text/plain; version=0.0.4')
+
+    @app.get('/healthz')
+    def healthz():
+        # Degraded means Redis is being bypassed; the worker still serves from its local store.
+        stats = getattr(app.bracket_store, 'stats', None)  # type: ignore[attr-defined]
+        degraded = bool(getattr(app.bracket_store, 'degraded', False))  # type: ignore[attr-defined]
+        response = jsonify({'status': 'degraded' if degraded else 'ok', 'store': stats() if stats else {}})
+        response.headers['Cache-Control'] = 'no-store'
+        return response
 
     @app.get('/')
     def index():
@@ -52,101 +122,359 @@ def create_app(store: Optional[BracketStore] = None, expiration_hours: Optional[
 
     @app.get('/bracket/<bracket_id>')
     def view_bracket(bracket_id: str):
-        return render_template('bracket.html', bracket_id = bracket_id)
+        encoded = _load_encoded(bracket_id)
+
+        if encoded is None:
+            return render_template('not_found.html'), 404
+
+        # Inline the cached API body so the page can draw without a second request.
+        return render_template(
+            'bracket.html',
+            bracket_id = bracket_id,
+            bracket_json = Markup(encoded.inline_json()),
+            image_proxy = app.thumbnails is not None and app.thumbnails.resizes,  # type: ignore[attr-defined]
+        )
+
+    @app.get('/cover/<image_id>')
+    def cover(image_id: str):
+        thumbnails: Optional[ThumbnailCache] = app.thumbnails  # type: ignore[attr-defined]
+        if thumbnails is None:
+            return jsonify({'error': 'Image proxy is disabled'}), 404
+
+        try:
+            body, content_type = thumbnails.get(image_id, request.args.get('w', 160, type = int))
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+        except Exception:
+            return jsonify({'error': 'Could not fetch album art'}), 502
+
+        response = Response(body, mimetype = content_type)
+        response.set_etag(image_etag(body))
+        # Spotify image IDs are content addressed, so a thumbnail never changes.
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response.make_conditional(request)
 
     @app.post('/api/bracket')
     def api_bracket():
-        payload = request.get_json(silent = True) or {}
+        signature, error = parse_bracket_request(request.get_json(silent = True) or {})
+        if signature is None:
+            return jsonify({'error': error}), 400
+
+        if app.warmer is not None:  # type: ignore[attr-defined]
+            app.warmer.record(signature[0], signature_key(signature))  # type: ignore[attr-defined]
+
+        if app.bracket_jobs.enabled:  # type: ignore[attr-defined]
+            return _enqueue(signature)
+
+        # Identical concurrent requests share one creation instead of each calling Spotify.
+        body, status = app.bracket_flights.do(  # type: ignore[attr-defined]
+            signature_key(signature),
+            lambda: _create_or_reuse(signature),
+        )
+
+        return jsonify(body), status
 
-        playlist = (payload.get('playlist') or '').strip()
-        order = (payload.get('order') or 'playlist').strip().lower()
-        bracket_name = (payload.get('bracket_name') or '').strip()
-        size = payload.get('size')
+    @app.post('/api/brackets/bulk')
+    def api_brackets_bulk():
+        # Bulk creation is an operator tool: hidden unless an admin token is configured.
+        if not app.admin_token:  # type: ignore[attr-defined]
+            return jsonify({'error': 'Not found'}), 404
 
-        if not playlist:
-            return jsonify({'error': 'playlist is required'}), 400
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), app.admin_token.encode()):  # type: ignore[attr-defined]
+            return jsonify({'error': 'A valid admin token is required'}), 401
 
-        if not bracket_name:
-            return jsonify({'error': 'bracket_name is required'}), 400
+        specs = (request.get_json(silent = True) or {}).get('brackets')
+        if not isinstance(specs, list) or not specs:
+            return jsonify({'error': 'brackets must be a non-empty list'}), 400
 
+        max_brackets = int(os.getenv('BRACKET_BULK_MAX', BULK_MAX_BRACKETS))
+        if len(specs) > max_brackets:
+            return jsonify({'error': f'at most {max_brackets} brackets can be created per request'}), 400
+
+        if not app.bracket_jobs.enabled:  # type: ignore[attr-defined]
+            return jsonify({'error': 'Bulk creation needs job mode (BRACKET_JOB_WORKERS); use brackify.scripts.bulk_create instead'}), 503
+
+        def _fetch(playlist: str, max_tracks: Optional[int]) -> List[TrackInfo]:
+            sp = get_spotify_client()
+            if max_tracks is not None:
+                return fetch_playlist_tracks(playlist, sp, max_tracks = max_tracks, cache = app.playlist_cache)  # type: ignore[attr-defined]
+
+            return fetch_playlist_tracks(playlist, sp, concurrency = app.fetch_concurrency, cache = app.playlist_cache)  # type: ignore[attr-defined]
+
+        # Share URLs come from this request's host, so the job keeps a copy of the context.
+        @copy_current_request_context
+        def _build() -> Tuple[Dict[str, Any], int]:
+            ttl_seconds = app.bracket_ttl_seconds  # type: ignore[attr-defined]
+            entries = create_brackets_bulk(
+                specs,
+                app.bracket_store,  # type: ignore[attr-defined]
+                _fetch,
+                lambda bracket_id: url_for('view_bracket', bracket_id = bracket_id, _external = True),
+                ttl_seconds,
+                concurrency = int(os.getenv('BRACKET_BULK_CONCURRENCY', BULK_FETCH_CONCURRENCY)),
+            )
+
+            for entry in entries:
+                if entry['status'] in ('created', 'existing'):
+                    key = signature_key(bracket_signature(entry['playlist'], entry['size'], entry['order'], entry['bracket_name']))
+                    app.bracket_index.save(key, {'bracket_id': entry['bracket_id']}, ttl_seconds)  # type: ignore[attr-defined]
+                    app.encoded_brackets.extend(entry['bracket_id'], ttl_seconds)  # type: ignore[attr-defined]
+
+            counts = {status: sum(1 for entry in entries if entry['status'] == status) for status in ('created', 'existing', 'error')}
+            return {'manifest': dict(counts, brackets = entries)}, 200
+
+        # Resubmitting the same specs while they are still being built returns the same job.
+        key = 'bulk:' + hashlib.sha256(json.dumps(specs, sort_keys = True).encode()).hexdigest()
         try:
-            size_int = int(size)
-        except (TypeError, ValueError):
-            return jsonify({'error': f'size must be one of {AllowedBracketSizes}'}), 400
+            job = app.bracket_jobs.submit(key, _build)  # type: ignore[attr-defined]
+        except QueueFull:
+            response = jsonify({'error': 'Too many brackets are being built right now. Try again shortly.'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
 
-        signature = bracket_signature(playlist, size_int, order, bracket_name)
-        existing_id = app.bracket_index.get(signature)  # type: ignore[attr-defined]
-        if not existing_id:
-            mapping = app.bracket_store.get(signature_key(signature))  # type: ignore[attr-defined]
-            if mapping:
-                existing_id = mapping.get('bracket_id')
-                if existing_id:
-                    app.bracket_index[signature] = existing_id  # type: ignore[attr-defined]
+        return _job_response(job, 202)
+
+    def _enqueue(signature: Tuple[str, int, str, str]):
+        # Reuse is a couple of store reads, so answer it inline; only new brackets queue.
+        existing = _reuse_existing(signature)
+        if existing:
+            return jsonify(existing), 200
 
+        key = signature_key(signature)
+
+        # The job builds share URLs from this request's host, so it keeps a copy of the context.
+        @copy_current_request_context
+        def _build() -> Tuple[Dict[str, Any], int]:
+            return app.bracket_flights.do(key, lambda: _create_or_reuse(signature))  # type: ignore[attr-defined]
+
+        try:
+            job = app.bracket_jobs.submit(key, _build)  # type: ignore[attr-defined]
+        except QueueFull:
+            response = jsonify({'error': 'Too many brackets are being built right now. Try again shortly.'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+
+        return _job_response(job, 202)
+
+    def _job_response(job: Dict[str, Any], status: int):
+        body = dict(job, job_url = url_for('get_job', job_id = job['job_id']))
+        response = jsonify(body)
+        response.headers['Location'] = body.get('share_url', body['job_url'])
+        response.headers['Cache-Control'] = 'no-store'
+        return response, status
+
+    def _reuse_existing(signature: Tuple[str, int, str, str]) -> Optional[Dict[str, Any]]:
+        """Return the live bracket for a signature with its TTL extended, if there is one."""
+
+        key = signature_key(signature)
+        cached = app.bracket_index.get(key)  # type: ignore[attr-defined]
+        existing_id = cached.get('bracket_id') if cached else None
         if existing_id:
-            existing_bracket = app.bracket_store.get(existing_id)  # type: ignore[attr-defined]
+            metrics.inc('signature_lookups_total', result = 'hit')
+        else:
+            mapping = app.bracket_store.get(key)  # type: ignore[attr-defined]
+            existing_id = mapping.get('bracket_id') if mapping else None
+            metrics.inc('signature_lookups_total', result = 'store' if existing_id else 'miss')
+
+        if not existing_id:
+            return None
+
+        refreshed_at = now()
+        ttl_seconds = remaining_ttl_seconds(refreshed_at, app.expiration_delta)  # type: ignore[attr-defined]
+        # Extend both keys in place rather than rewriting the whole payload to bump its TTL.
+        existing_bracket, _ = app.bracket_store.get_and_touch_many([existing_id, key], ttl_seconds)  # type: ignore[attr-defined]
+
+        if not existing_bracket:
+            app.bracket_index.save(key, {}, 0)  # type: ignore[attr-defined]
+            return None
+
+        app.bracket_index.save(key, {'bracket_id': existing_id}, ttl_seconds)  # type: ignore[attr-defined]
+        app.encoded_brackets.extend(existing_id, ttl_seconds)  # type: ignore[attr-defined]
+
+        # The stored payload keeps its original timestamp; the response reports when its lifetime restarted.
+        return dict(existing_bracket, created_at = refreshed_at.isoformat())
+
+    def _publish(signature: Tuple[str, int, str, str], bracket_id: str, bracket: Dict[str, Any], ttl_seconds: int) -> None:
+        # The bracket and its signature mapping go out in one atomic batch, so the
+        # mapping can never point at a bracket that has not been written yet.
+        key = signature_key(signature)
+        app.bracket_store.save_many([  # type: ignore[attr-defined]
+            (bracket_id, bracket, ttl_seconds),
+            (key, {'bracket_id': bracket_id}, ttl_seconds),
+        ])
+        app.bracket_index.save(key, {'bracket_id': bracket_id}, ttl_seconds)  # type: ignore[attr-defined]
 
-            if existing_bracket:
-                refreshed_at = now()
-                existing_bracket['created_at'] = refreshed_at.isoformat()
-                ttl_seconds = remaining_ttl_seconds(refreshed_at, app.expiration_delta)  # type: ignore[attr-defined]
-                app.bracket_store.save(existing_id, existing_bracket, ttl_seconds)  # type: ignore[attr-defined]
-                app.bracket_store.save(signature_key(signature), {'bracket_id': existing_id}, ttl_seconds)  # type: ignore[attr-defined]
-                return jsonify(existing_bracket)
+    def _wait_for_leader(signature: Tuple[str, int, str, str]) -> Optional[Dict[str, Any]]:
+        """Wait for another worker holding the creation lease to publish its bracket."""
 
-            app.bracket_index.pop(signature, None)  # type: ignore[attr-defined]
+        lease_name = signature_key(signature)
+        deadline = time.monotonic() + app.lease_seconds  # type: ignore[attr-defined]
+
+        while time.monotonic() < deadline:
+            time.sleep(LEASE_POLL_SECONDS)
+
+            existing = _reuse_existing(signature)
+            if existing:
+                return existing
+
+            if not app.bracket_store.lease_held(lease_name):  # type: ignore[attr-defined]
+                return None
+
+        return None
+
+    def _create_or_reuse(signature: Tuple[str, int, str, str]) -> Tuple[Dict[str, Any], int]:
+        existing = _reuse_existing(signature)
+        if existing:
+            return existing, 200
+
+        lease_name = signature_key(signature)
+        lease = app.bracket_store.acquire_lease(lease_name, app.lease_seconds)  # type: ignore[attr-defined]
+        if lease is None:
+            existing = _wait_for_leader(signature)
+            if existing:
+                return existing, 200
+
+            # The leader gave up or timed out; build it ourselves rather than fail the request.
+            lease = app.bracket_store.acquire_lease(lease_name, app.lease_seconds)  # type: ignore[attr-defined]
 
         try:
-            sp = get_spotify_client()
-            tracks = fetch_playlist_tracks(playlist, sp)
+            if lease is not None:
+                # Another worker may have finished between our lookup and taking the lease.
+                existing = _reuse_existing(signature)
+                if existing:
+                    return existing, 200
 
-            if len(tracks) < size_int:
-                raise ValueError(f'This playlist does not have enough tracks for a {size_int}-song bracket.')
+            return _create(signature)
+        finally:
+            if lease is not None:
+                app.bracket_store.release_lease(lease_name, lease)  # type: ignore[attr-defined]
 
-            seeds = build_seed_list(tracks, size_int, order = order)
+    def _create(signature: Tuple[str, int, str, str]) -> Tuple[Dict[str, Any], int]:
+        playlist, size_int, order, _ = signature
+
+        try:
+            sp = get_spotify_client()
+            with metrics.timed('playlist_fetch_seconds', stage = 'fetch', order = order):
+                if order == 'playlist':
+                    # Playlist order only ever seeds the leading tracks, so stop paging once we have them.
+                    tracks = fetch_playlist_tracks(playlist, sp, max_tracks = size_int, cache = app.playlist_cache)  # type: ignore[attr-defined]
+                else:
+                    tracks = fetch_playlist_tracks(
+                        playlist,
+                        sp,
+                        sample_size = size_int,
+                        concurrency = app.fetch_concurrency,  # type: ignore[attr-defined]
+                        cache = app.playlist_cache,  # type: ignore[attr-defined]
+                    )
+
+            created_at = now()
+            bracket_id = app.bracket_store.new_bracket_id(signature_key(signature))  # type: ignore[attr-defined]
+            share_url = url_for('view_bracket', bracket_id = bracket_id, _external = True)
+            with metrics.timed('seed_seconds', stage = 'seed'):
+                bracket_payload = build_bracket_payload(signature, tracks, bracket_id, share_url, created_at)
         except ValueError as exc:
-            return jsonify({'error': str(exc)}), 400
+            return {'error': str(exc)}, 400
         except RuntimeError as exc:
-            return jsonify({'error': str(exc)}), 500
-
-        created_at = now()
-        bracket_id = secrets.token_urlsafe(8)
-
-        bracket_payload: Dict[str, Any] = {
-            'size': size_int,
-            'order': order,
-            'seed_count': len(seeds),
-            'seeds': seeds,
-            'matches': chunk_matches(seeds),
-            'total_tracks': len(tracks),
-            'bracket_name': bracket_name,
-            'playlist': playlist,
-            'bracket_id': bracket_id,
-            'share_url': url_for('view_bracket', bracket_id = bracket_id, _external = True),
-            'created_at': created_at.isoformat(),
-        }
+            return {'error': str(exc)}, 500
 
         ttl_seconds = remaining_ttl_seconds(created_at, app.expiration_delta)  # type: ignore[attr-defined]
-        app.bracket_store.save(bracket_id, bracket_payload, ttl_seconds)  # type: ignore[attr-defined]
-        app.bracket_store.save(signature_key(signature), {'bracket_id': bracket_id}, ttl_seconds)  # type: ignore[attr-defined]
-        app.bracket_index[signature] = bracket_id  # type: ignore[attr-defined]
+        _publish(signature, bracket_id, bracket_payload, ttl_seconds)
+
+        return bracket_payload, 200
+
+    def _load_encoded(bracket_id: str) -> Optional[EncodedBracket]:
+        encoded = app.encoded_brackets.get(bracket_id)  # type: ignore[attr-defined]
+        if encoded is not None:
+            return encoded
+
+        bracket, ttl_seconds = app.bracket_store.get_with_ttl(bracket_id)  # type: ignore[attr-defined]
+        if not bracket:
+            return None
+
+        return app.encoded_brackets.put(bracket_id, bracket, ttl_seconds)  # type: ignore[attr-defined]
+
+    def _send_encoded(encoded: EncodedBracket) -> Response:
+        max_age = encoded.remaining_seconds()
 
-        return jsonify(bracket_payload)
+        if request.if_none_match.contains(encoded.etag):
+            response = Response(status = 304)
+        elif encoded.gzip_body is not None and 'gzip' in request.accept_encodings:
+            response = Response(encoded.gzip_body, mimetype = 'application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(encoded.body, mimetype = 'application/json')
+
+        response.set_etag(encoded.etag)
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
 
     @app.get('/api/bracket/<bracket_id>')
     def get_bracket(bracket_id: str):
-        bracket = app.bracket_store.get(bracket_id)  # type: ignore[attr-defined]
+        encoded = _load_encoded(bracket_id)
 
-        if not bracket:
+        if encoded is None:
             return jsonify({'error': 'Bracket not found or expired'}), 404
 
-        return jsonify(bracket)
+        return _send_encoded(encoded)
+
+    @app.get('/api/jobs/<job_id>')
+    def get_job(job_id: str):
+        job = app.bracket_jobs.get(job_id)  # type: ignore[attr-defined]
+
+        if not job:
+            return jsonify({'error': 'Job not found or expired'}), 404
+
+        if job.get('status') == 'done' and job.get('share_url') and request.args.get('redirect'):
+            return '', 303, {'Location': job['share_url']}
+
+        return _job_response(job, 200)
+
+    @app.post('/api/bracket/<bracket_id>/picks')
+    def submit_picks(bracket_id: str):
+        encoded = _load_encoded(bracket_id)
+
+        if encoded is None:
+            return jsonify({'error': 'Bracket not found or expired'}), 404
+
+        payload = request.get_json(silent = True) or {}
+
+        try:
+            increments = tally_picks(payload.get('picks'), payload.get('champion'), encoded.slots)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        # Votes expire with the bracket they belong to.
+        app.vote_aggregator.record(bracket_id, increments, encoded.remaining_seconds())  # type: ignore[attr-defined]
+        return jsonify({'recorded': applied_counts(increments)}), 202
+
+    @app.get('/api/bracket/<bracket_id>/results')
+    def bracket_results(bracket_id: str):
+        if _load_encoded(bracket_id) is None:
+            return jsonify({'error': 'Bracket not found or expired'}), 404
+
+        response = jsonify(app.vote_aggregator.results(bracket_id))  # type: ignore[attr-defined]
+        response.headers['Cache-Control'] = 'public, max-age=2'
+        return response
 
     return app
 
 
-app = create_app()
+_app: Optional[Flask] = None
+
+
+def __getattr__(name: str) -> Any:
+    # `app` is built on first access (gunicorn brackify.app:app, flask run), so importing
+    # this module for its helpers does not start background threads or connect to Redis.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
-    app.run(debug = True, host = '0.0.0.0', port = 8000)
+    create_app().run(debug = True, host = '0.0.0.0', port = 8000)
@@ -0,0 +1,319 @@
+"""ASGI entry point: async handlers for bracket creation and reads.
+
+Run with any ASGI server, e.g. ``uvicorn brackify.asgi:app`` or
+``uvicorn --factory brackify.asgi:create_asgi_app``. ``POST /api/bracket``
+and ``GET /api/bracket/<id>`` are served by coroutines, so one process can hold
+hundreds of Spotify fetches in flight. Every other route is passed to the Flask app
+when asgiref is installed.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import timedelta
+import asyncio
+import json
+import os
+import time
+from brackify.app import create_app
+from brackify.async_spotify import AsyncSpotifyFetcher
+from brackify.async_store import AsyncBracketStore, create_async_store_from_env
+from brackify.creation import EXPIRATION_HOURS, LEASE_SECONDS, build_bracket_payload, now, parse_bracket_request, remaining_ttl_seconds, signature_key
+from brackify.encoded import EncodedBracket, EncodedBracketCache
+from brackify.store import create_store_from_env
+
+try:  # pragma: no cover - only needed to serve the Flask routes from the same process
+    from asgiref.wsgi import WsgiToAsgi  # type: ignore
+except ImportError:  # pragma: no cover - async routes still work without it
+    WsgiToAsgi = None
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+LEASE_POLL_SECONDS = 0.1
+MAX_BODY_BYTES = 64 * 1024
+Signature = Tuple[str, int, str, str]
+
+
+def _json(body: Dict[str, Any]) -> bytes:
+    return json.dumps(body).encode('utf-8')
+
+
+class BrackifyASGI:
+    def __init__(
+        self,
+        store: AsyncBracketStore,
+        fetcher: Any,
+        fallback: Optional[Callable[[Scope, Receive, Send], Awaitable[None]]] = None,
+        expiration_hours: Optional[int] = None,
+    ) -> None:
+        configured_hours = expiration_hours or int(os.getenv('BRACKET_EXPIRATION_HOURS', EXPIRATION_HOURS))
+        self.expiration_delta = timedelta(hours = configured_hours)
+        self.store = store
+        self.fetcher = fetcher
+        self.fallback = fallback
+        self.lease_seconds = int(os.getenv('BRACKET_LEASE_SECONDS', LEASE_SECONDS))
+        self.encoded_brackets = EncodedBracketCache(int(os.getenv('BRACKET_ENCODED_CACHE_ENTRIES', 1024)))
+        self._flights: Dict[str, 'asyncio.Future[Tuple[Dict[str, Any], int]]'] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        path = scope.get('path', '')
+        method = scope.get('method', 'GET')
+
+        if scope['type'] == 'http' and path == '/api/bracket' and method == 'POST':
+            await self._api_bracket(scope, receive, send)
+            return
+
+        if scope['type'] == 'http' and path.startswith('/api/bracket/') and method in ('GET', 'HEAD'):
+            bracket_id = path[len('/api/bracket/'):]
+            if bracket_id and '/' not in bracket_id:
+                await self._get_bracket(scope, bracket_id, send)
+                return
+
+        if self.fallback is not None:
+            await self.fallback(scope, receive, send)
+            return
+
+        await self._respond(send, 404, _json({'error': 'Not found'}))
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.store.close()
+                if hasattr(self.fetcher, 'aclose'):
+                    await self.fetcher.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _respond(
+        self,
+        send: Send,
+        status: int,
+        body: bytes,
+        headers: Optional[List[Tuple[str, str]]] = None,
+        head: bool = False,
+    ) -> None:
+        raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers or []]
+        if status != 304:
+            raw_headers.append((b'content-type', b'application/json'))
+            raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': b'' if head or status == 304 else body})
+
+    async def _read_json(self, receive: Receive) -> Dict[str, Any]:
+        chunks: List[bytes] = []
+        size = 0
+
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return {}
+
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+
+        try:
+            payload = json.loads(b''.join(chunks) or b'{}')
+        except ValueError:
+            return {}
+
+        return payload if isinstance(payload, dict) else {}
+
+    async def _api_bracket(self, scope: Scope, receive: Receive, send: Send) -> None:
+        signature, error = parse_bracket_request(await self._read_json(receive))
+        if signature is None:
+            await self._respond(send, 400, _json({'error': error}))
+            return
+
+        body, status = await self._single_flight(signature_key(signature), lambda: self._create_or_reuse(scope, signature))
+        await self._respond(send, status, _json(body))
+
+    async def _single_flight(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Tuple[Dict[str, Any], int]]],
+    ) -> Tuple[Dict[str, Any], int]:
+        future = self._flights.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Followers re-raise it; mark it retrieved so the loop does not log it again.
+            future.exception()
+            raise
+        finally:
+            self._flights.pop(key, None)
+
+    async def _reuse_existing(self, signature: Signature) -> Optional[Dict[str, Any]]:
+        key = signature_key(signature)
+        mapping = await self.store.get(key)
+        existing_id = mapping.get('bracket_id') if mapping else None
+        if not existing_id:
+            return None
+
+        refreshed_at = now()
+        ttl_seconds = remaining_ttl_seconds(refreshed_at, self.expiration_delta)
+        existing_bracket, _ = await self.store.get_and_touch_many([existing_id, key], ttl_seconds)
+        if not existing_bracket:
+            return None
+
+        self.encoded_brackets.extend(existing_id, ttl_seconds)
+        return dict(existing_bracket, created_at = refreshed_at.isoformat())
+
+    async def _wait_for_leader(self, signature: Signature) -> Optional[Dict[str, Any]]:
+        lease_name = signature_key(signature)
+        deadline = time.monotonic() + self.lease_seconds
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+
+            existing = await self._reuse_existing(signature)
+            if existing:
+                return existing
+
+            if not await self.store.lease_held(lease_name):
+                return None
+
+        return None
+
+    async def _create_or_reuse(self, scope: Scope, signature: Signature) -> Tuple[Dict[str, Any], int]:
+        existing = await self._reuse_existing(signature)
+        if existing:
+            return existing, 200
+
+        lease_name = signature_key(signature)
+        lease = await self.store.acquire_lease(lease_name, self.lease_seconds)
+        if lease is None:
+            existing = await self._wait_for_leader(signature)
+            if existing:
+                return existing, 200
+
+            lease = await self.store.acquire_lease(lease_name, self.lease_seconds)
+
+        try:
+            if lease is not None:
+                existing = await self._reuse_existing(signature)
+                if existing:
+                    return existing, 200
+
+            return await self._create(scope, signature)
+        finally:
+            if lease is not None:
+                await self.store.release_lease(lease_name, lease)
+
+    async def _create(self, scope: Scope, signature: Signature) -> Tuple[Dict[str, Any], int]:
+        playlist, size_int, order, _ = signature
+
+        try:
+            if order == 'playlist':
+                tracks = await self.fetcher.fetch_playlist_tracks(playlist, max_tracks = size_int)
+            else:
+                tracks = await self.fetcher.fetch_playlist_tracks(playlist, sample_size = size_int)
+
+            created_at = now()
+            bracket_id = self.store.new_bracket_id(signature_key(signature))
+            payload = build_bracket_payload(signature, tracks, bracket_id, self._share_url(scope, bracket_id), created_at)
+        except ValueError as exc:
+            return {'error': str(exc)}, 400
+        except RuntimeError as exc:
+            return {'error': str(exc)}, 500
+
+        ttl_seconds = remaining_ttl_seconds(created_at, self.expiration_delta)
+        await self.store.save_many([
+            (bracket_id, payload, ttl_seconds),
+            (signature_key(signature), {'bracket_id': bracket_id}, ttl_seconds),
+        ])
+
+        return payload, 200
+
+    def _share_url(self, scope: Scope, bracket_id: str) -> str:
+        headers = dict(scope.get('headers') or [])
+        host = headers.get(b'host', b'').decode('latin-1')
+        if not host and scope.get('server'):
+            server_host, port = scope['server']
+            host = f'{server_host}:{port}'
+
+        return f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}/bracket/{bracket_id}"
+
+    async def _load_encoded(self, bracket_id: str) -> Optional[EncodedBracket]:
+        encoded = self.encoded_brackets.get(bracket_id)
+        if encoded is not None:
+            return encoded
+
+        bracket, ttl_seconds = await self.store.get_with_ttl(bracket_id)
+        if not bracket:
+            return None
+
+        return self.encoded_brackets.put(bracket_id, bracket, ttl_seconds)
+
+    async def _get_bracket(self, scope: Scope, bracket_id: str, send: Send) -> None:
+        encoded = await self._load_encoded(bracket_id)
+        if encoded is None:
+            await self._respond(send, 404, _json({'error': 'Bracket not found or expired'}))
+            return
+
+        headers = dict(scope.get('headers') or [])
+        if_none_match = headers.get(b'if-none-match', b'').decode('latin-1')
+        accept_encoding = headers.get(b'accept-encoding', b'').decode('latin-1')
+        cache_headers = [
+            ('ETag', f'"{encoded.etag}"'),
+            ('Cache-Control', f'public, max-age={encoded.remaining_seconds()}'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+
+        tags = {tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')}
+        if encoded.etag in tags or '*' in tags:
+            await self._respond(send, 304, b'', cache_headers)
+            return
+
+        body = encoded.body
+        if encoded.gzip_body is not None and 'gzip' in accept_encoding:
+            body = encoded.gzip_body
+            cache_headers.append(('Content-Encoding', 'gzip'))
+
+        await self._respond(send, 200, body, cache_headers, head = scope.get('method') == 'HEAD')
+
+
+def create_asgi_app(expiration_hours: Optional[int] = None) -> BrackifyASGI:
+    """Build the async app, sharing storage with a Flask app for the remaining routes."""
+
+    sync_store = create_store_from_env()
+    flask_app = create_app(sync_store, expiration_hours)
+    fallback = WsgiToAsgi(flask_app) if WsgiToAsgi is not None else None
+
+    return BrackifyASGI(
+        create_async_store_from_env(sync_store),
+        AsyncSpotifyFetcher.from_env(),
+        fallback = fallback,
+        expiration_hours = expiration_hours,
+    )
+
+
+_app: Optional[BrackifyASGI] = None
+
+
+def __getattr__(name: str) -> Any:
+    # `uvicorn brackify.asgi:app` builds the app on first access; importing the module has no side effects.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_asgi_app()
+        return _app
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
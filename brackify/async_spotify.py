@@ -0,0 +1,235 @@
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import base64
+import random
+import time
+from brackify.spotify_client import (
+    MAX_RETRY_AFTER_SECONDS,
+    PLAYLIST_ITEM_FIELDS,
+    RATE_LIMIT_RETRIES,
+    PlaylistTracks,
+    TrackInfo,
+    _OffsetSample,
+    _offset_spans,
+    _page_tracks,
+    _sample_tracks,
+    _span_tracks,
+    extract_playlist_id,
+    get_rate_limiter,
+    load_spotify_settings,
+    spotify_error,
+)
+
+try:  # pragma: no cover - only needed for the async deployment
+    import httpx  # type: ignore
+except ImportError:  # pragma: no cover - handled when the fetcher is built
+    httpx = None
+
+
+API_BASE = 'https://api.spotify.com/v1'
+TOKEN_URL = 'https://accounts.spotify.com/api/token'
+
+
+class AsyncSpotifyFetcher:
+    """Fetches playlist tracks over one shared httpx connection pool.
+
+    Produces the same TrackInfo records and PlaylistTracks metadata as the spotipy
+    path. Each in-flight fetch is a coroutine rather than a thread, and a semaphore
+    caps concurrent Spotify requests across all of them.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        http: Any = None,
+        max_requests: int = 32,
+        timeout: float = 5.0,
+        token_refresh_margin: int = 300,
+    ) -> None:
+        if http is None:
+            if httpx is None:
+                raise RuntimeError('httpx is required for the async Spotify fetcher')
+
+            limits = httpx.Limits(max_connections = max_requests, max_keepalive_connections = max_requests)
+            http = httpx.AsyncClient(timeout = timeout, limits = limits)
+
+        self._http = http
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._refresh_margin = token_refresh_margin
+        self._requests = asyncio.Semaphore(max_requests)
+        self._token_lock = asyncio.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self.token_refreshes = 0
+
+    @classmethod
+    def from_env(cls) -> 'AsyncSpotifyFetcher':
+        settings = load_spotify_settings()
+        return cls(
+            settings['client_id'],
+            settings['client_secret'],
+            max_requests = settings['pool_size'] * settings['fetch_concurrency'],
+            timeout = settings['requests_timeout'],
+            token_refresh_margin = settings['token_refresh_margin'],
+        )
+
+    async def _access_token(self, force: bool = False) -> str:
+        if not force and self._token and time.time() < self._expires_at - self._refresh_margin:
+            return self._token
+
+        async with self._token_lock:
+            if force or not self._token or time.time() >= self._expires_at - self._refresh_margin:
+                if not self._client_id or not self._client_secret:
+                    raise RuntimeError('Missing SPOTIFY_CLIENT_ID or SPOTIFY_CLIENT_SECRET environment variables.')
+
+                basic = base64.b64encode(f'{self._client_id}:{self._client_secret}'.encode()).decode()
+                res = await self._send(
+                    'POST',
+                    TOKEN_URL,
+                    data = {'grant_type': 'client_credentials'},
+                    headers = {'Authorization': f'Basic {basic}'},
+                )
+                if res.status_code >= 400:
+                    raise RuntimeError(f'Could not get a Spotify access token (status {res.status_code}).')
+                body = res.json()
+                self._token = body['access_token']
+                self._expires_at = time.time() + float(body.get('expires_in') or 3600)
+                self.token_refreshes += 1
+
+            return self._token  # type: ignore[return-value]
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> Any:
+        try:
+            return await self._http.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            raise spotify_error(None) from exc
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        attempt = 0
+        force_token = False
+        limiter = get_rate_limiter()
+
+        while True:
+            token = await self._access_token(force = force_token)
+            if limiter is not None:
+                await limiter.acquire_async()
+
+            async with self._requests:
+                res = await self._send('GET', f'{API_BASE}{path}', params = params, headers = {'Authorization': f'Bearer {token}'})
+
+            if res.status_code == 401 and not force_token:
+                force_token = True
+                continue
+
+            # Only the attempt right after a 401 needs a fresh token; later retries reuse it.
+            force_token = False
+
+            if res.status_code in (429, 500, 502, 503, 504):
+                try:
+                    delay = float(res.headers.get('Retry-After'))
+                except (TypeError, ValueError):
+                    delay = 0.5 * (2 ** attempt)
+                delay = min(max(delay, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+                # Pause every caller sharing the bucket, sync or async, not just this one.
+                rate_limited = res.status_code == 429 and limiter is not None
+                if rate_limited:
+                    await asyncio.to_thread(limiter.penalize, delay)
+
+                if attempt < RATE_LIMIT_RETRIES:
+                    attempt += 1
+                    # The penalized bucket already holds the next acquire back for Retry-After.
+                    if not rate_limited:
+                        await asyncio.sleep(delay)
+                    continue
+
+            if res.status_code >= 400:
+                raise spotify_error(res.status_code)
+
+            return res.json()
+
+    async def _page(self, pid: str, offset: int, limit: int) -> Dict[str, Any]:
+        return await self._get(f'/playlists/{pid}/tracks', {
+            'offset': offset,
+            'limit': limit,
+            'fields': PLAYLIST_ITEM_FIELDS,
+            'additional_types': 'track',
+        })
+
+    async def fetch_playlist_tracks(
+        self,
+        inp: str,
+        limit: int = 100,
+        max_tracks: Optional[int] = None,
+        sample_size: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+    ) -> PlaylistTracks:
+        """Async equivalent of spotify_client.fetch_playlist_tracks without the cache path."""
+
+        if limit <= 0:
+            raise ValueError('limit must be a positive integer')
+
+        pid = extract_playlist_id(inp)
+        first_limit = limit if max_tracks is None else max(1, min(limit, max_tracks))
+        first = await self._page(pid, 0, first_limit)
+        total = int(first.get('total') or 0)
+        tracks = _page_tracks(first)
+
+        if sample_size is not None:
+            return await self._sample(pid, first, total, sample_size, rng or random.Random(), limit)
+
+        if max_tracks is not None:
+            # Playlist order: keep paging only until max_tracks usable tracks are found.
+            offset = first_limit
+            next_page = first.get('next')
+            while next_page and len(tracks) < max_tracks:
+                page_limit = max(1, min(limit, max_tracks - len(tracks)))
+                page = await self._page(pid, offset, page_limit)
+                tracks.extend(_page_tracks(page))
+                next_page = page.get('next')
+                offset += page_limit
+
+            complete = not next_page and len(tracks) <= max_tracks
+            return PlaylistTracks(tracks[:max_tracks], total = total, complete = complete)
+
+        if first.get('next'):
+            pages = await asyncio.gather(*(self._page(pid, offset, limit) for offset in range(limit, total, limit)))
+            for page in pages:
+                tracks.extend(_page_tracks(page))
+
+        return PlaylistTracks(tracks, total = total, complete = True)
+
+    async def _sample(
+        self,
+        pid: str,
+        first: Dict[str, Any],
+        total: int,
+        sample_size: int,
+        rng: random.Random,
+        limit: int,
+    ) -> PlaylistTracks:
+        if not first.get('next'):
+            tracks = _page_tracks(first)
+            return PlaylistTracks(_sample_tracks(tracks, sample_size, rng), total = total, complete = len(tracks) <= sample_size)
+
+        sample = _OffsetSample(first, total, sample_size, rng)
+        while not sample.done:
+            missing = sample.draw()
+            sample.add(await self._fetch_offsets(pid, missing, limit) if missing else {})
+
+        return sample.result()
+
+    async def _fetch_offsets(self, pid: str, offsets: List[int], limit: int) -> Dict[int, Optional[TrackInfo]]:
+        async def _fetch(start: int, count: int, wanted: Set[int]) -> Dict[int, Optional[TrackInfo]]:
+            return _span_tracks(await self._page(pid, start, count), start, wanted)
+
+        found: Dict[int, Optional[TrackInfo]] = {offset: None for offset in offsets}
+        for result in await asyncio.gather(*(_fetch(*span) for span in _offset_spans(offsets, limit))):
+            found.update(result)
+
+        return found
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
@@ -0,0 +1,361 @@
+"""Async access to bracket storage for the ASGI deployment."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import secrets
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from brackify import metrics
+from brackify.breaker import CircuitBreaker
+from brackify.codecs import BracketCodec, CodecError, CorruptPayload, codec_from_env
+from brackify.store import (
+    BracketStore,
+    InMemoryBracketStore,
+    LayeredBracketStore,
+    RedisBracketStore,
+    ResilientBracketStore,
+    create_store_from_env,
+    redis_timeouts_from_env,
+)
+
+T = TypeVar("T")
+logger = logging.getLogger(__name__)
+
+
+class AsyncBracketStore:
+    """Awaitable counterpart of BracketStore, covering what the async handlers need."""
+
+    async def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        raise NotImplementedError
+
+    async def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        raise NotImplementedError
+
+    async def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    async def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        raise NotImplementedError
+
+    async def release_lease(self, name: str, token: str) -> None:
+        raise NotImplementedError
+
+    async def lease_held(self, name: str) -> bool:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return secrets.token_urlsafe(8)
+
+
+class SyncStoreAdapter(AsyncBracketStore):
+    """Exposes a synchronous BracketStore to async code.
+
+    The in-memory store only takes a lock around dictionary operations, so it is called
+    directly from the event loop, which is cheaper than handing each call to a thread.
+    Any store that does network I/O, such as the sharded Redis store, needs offload=True
+    so its calls run in a worker thread instead of blocking the loop.
+    """
+
+    def __init__(self, store: BracketStore, offload: bool = False) -> None:
+        self.store = store
+        self.offload = offload
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.offload:
+            return await asyncio.to_thread(fn, *args)
+
+        return fn(*args)
+
+    async def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.store.get, bracket_id)
+
+    async def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return await self._run(self.store.get_with_ttl, bracket_id)
+
+    async def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        await self._run(self.store.save_many, items)
+
+    async def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        return await self._run(self.store.get_and_touch_many, bracket_ids, ttl_seconds)
+
+    async def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return await self._run(self.store.acquire_lease, name, ttl_seconds)
+
+    async def release_lease(self, name: str, token: str) -> None:
+        await self._run(self.store.release_lease, name, token)
+
+    async def lease_held(self, name: str) -> bool:
+        return await self._run(self.store.lease_held, name)
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.store.new_bracket_id(signature_key)
+
+
+class AsyncRedisBracketStore(AsyncBracketStore):
+    """redis.asyncio store sharing RedisBracketStore's key layout and codec.
+
+    Sync and async workers can run against the same Redis and see each other's
+    brackets, signature mappings and leases.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key_prefix: str = "bracket:",
+        client: Any = None,
+        codec: Optional[BracketCodec] = None,
+    ) -> None:
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio  # type: ignore
+            except ImportError as exc:  # pragma: no cover - handled by dependency management
+                raise RuntimeError("redis library is required for AsyncRedisBracketStore") from exc
+
+            client = redis_asyncio.Redis.from_url(
+                url,
+                decode_responses=False,
+                max_connections=int(os.getenv("BRACKET_REDIS_MAX_CONNECTIONS") or 100),
+                **redis_timeouts_from_env(),
+            )
+
+        self._client = client
+        self._key_prefix = key_prefix
+        self._codec = codec or codec_from_env()
+        self._release_lease = self._client.register_script(RedisBracketStore._RELEASE_SCRIPT)
+
+    def _key(self, bracket_id: str) -> str:
+        return f"{self._key_prefix}{bracket_id}"
+
+    def _lease_key(self, name: str) -> str:
+        return f"{self._key_prefix}lease:{name}"
+
+    async def _decode(self, bracket_id: str, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if raw is None:
+            return None
+
+        try:
+            return self._codec.decode(raw)
+        except CodecError as exc:
+            logger.warning("Treating %s as missing: %s", bracket_id, exc)
+            return None
+        except CorruptPayload:
+            await self._client.delete(self._key(bracket_id))
+            return None
+
+    async def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        return await self._decode(bracket_id, await self._client.get(self._key(bracket_id)))
+
+    async def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        key = self._key(bracket_id)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        raw, ttl = await pipe.execute()
+
+        payload = await self._decode(bracket_id, raw)
+        if payload is None:
+            return None, 0
+
+        return payload, max(0, int(ttl or 0))
+
+    async def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        for bracket_id, payload, ttl_seconds in items:
+            key = self._key(bracket_id)
+            if ttl_seconds <= 0:
+                pipe.delete(key)
+            else:
+                pipe.set(key, self._codec.encode(payload), ex=max(1, ttl_seconds))
+
+        await pipe.execute()
+
+    async def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        pipe = self._client.pipeline(transaction=False)
+        for bracket_id in bracket_ids:
+            pipe.getex(self._key(bracket_id), ex=max(1, ttl_seconds))
+
+        raws = await pipe.execute()
+        return [await self._decode(bracket_id, raw) for bracket_id, raw in zip(bracket_ids, raws)]
+
+    async def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        token = secrets.token_hex(8)
+        acquired = await self._client.set(self._lease_key(name), token, nx=True, ex=max(1, ttl_seconds))
+        return token if acquired else None
+
+    async def release_lease(self, name: str, token: str) -> None:
+        await self._release_lease(keys=[self._lease_key(name)], args=[token])
+
+    async def lease_held(self, name: str) -> bool:
+        return bool(await self._client.exists(self._lease_key(name)))
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class AsyncResilientBracketStore(AsyncBracketStore):
+    """ResilientBracketStore for async code, sharing the sync store's breaker and fallback.
+
+    Failures seen by either entry point count against the one breaker, so a Redis
+    outage opens it for both, and brackets written while degraded land in the same
+    local store whichever side wrote them. The fallback is in-process, so it is
+    called directly, like SyncStoreAdapter does.
+    """
+
+    def __init__(self, primary: AsyncBracketStore, fallback: BracketStore, breaker: CircuitBreaker) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker
+
+    async def _call(self, op: str, *args: Any) -> Any:
+        try:
+            return await self.breaker.acall(lambda: getattr(self.primary, op)(*args))
+        except Exception as exc:
+            metrics.inc("store_degraded_calls_total", op=op)
+            logger.debug("Serving %s from the fallback store: %s", op, exc)
+            return getattr(self.fallback, op)(*args)
+
+    async def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        payload = await self._call("get", bracket_id)
+        return payload if payload is not None else self.fallback.get(bracket_id)
+
+    async def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        payload, ttl = await self._call("get_with_ttl", bracket_id)
+        return (payload, ttl) if payload is not None else self.fallback.get_with_ttl(bracket_id)
+
+    async def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        await self._call("save_many", items)
+
+    async def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        payloads = await self._call("get_and_touch_many", bracket_ids, ttl_seconds)
+        if all(payload is not None for payload in payloads):
+            return payloads
+
+        local = self.fallback.get_and_touch_many(bracket_ids, ttl_seconds)
+        return [payload if payload is not None else other for payload, other in zip(payloads, local)]
+
+    async def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return await self._call("acquire_lease", name, ttl_seconds)
+
+    async def release_lease(self, name: str, token: str) -> None:
+        await self._call("release_lease", name, token)
+        self.fallback.release_lease(name, token)
+
+    async def lease_held(self, name: str) -> bool:
+        return await self._call("lease_held", name)
+
+    async def close(self) -> None:
+        await self.primary.close()
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.primary.new_bracket_id(signature_key)
+
+
+class AsyncLayeredBracketStore(AsyncBracketStore):
+    """Puts the sync LayeredBracketStore's L1 in front of an async backend.
+
+    Both entry points read and fill one L1 and honour the same invalidations, so a
+    bracket cached by a Flask route is served to the async routes and the reverse.
+    Invalidations go out on the sync pub/sub client, from a thread.
+    """
+
+    def __init__(self, backend: AsyncBracketStore, layer: LayeredBracketStore) -> None:
+        self.backend = backend
+        self.layer = layer
+
+    async def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_with_ttl(bracket_id))[0]
+
+    async def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        entry = self.layer._cached(bracket_id)
+        if entry:
+            return entry["payload"], max(0, int(entry["expires_at"] - time.time()))
+
+        generation = self.layer._generation
+        payload, ttl_seconds = await self.backend.get_with_ttl(bracket_id)
+        self.layer._remember(bracket_id, payload, ttl_seconds, generation)
+        return payload, ttl_seconds
+
+    async def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        await self.backend.save_many(items)
+        for bracket_id, payload, ttl_seconds in items:
+            self.layer._forget([bracket_id])
+            self.layer._remember(bracket_id, payload, ttl_seconds)
+
+        await asyncio.to_thread(self.layer._publish, [bracket_id for bracket_id, _, _ in items])
+
+    async def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        generation = self.layer._generation
+        payloads = await self.backend.get_and_touch_many(bracket_ids, ttl_seconds)
+        for bracket_id, payload in zip(bracket_ids, payloads):
+            self.layer._remember(bracket_id, payload, ttl_seconds, generation)
+
+        return payloads
+
+    async def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return await self.backend.acquire_lease(name, ttl_seconds)
+
+    async def release_lease(self, name: str, token: str) -> None:
+        await self.backend.release_lease(name, token)
+
+    async def lease_held(self, name: str) -> bool:
+        return await self.backend.lease_held(name)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.backend.new_bracket_id(signature_key)
+
+
+def create_async_store_from_env(sync_store: Optional[BracketStore] = None) -> AsyncBracketStore:
+    """The async counterpart of the sync store, following the choice create_store_from_env made.
+
+    Async Redis is only used when the sync store reached a single Redis at startup, so
+    both entry points agree on where brackets live. Otherwise the sync store is used as
+    it is, in worker threads unless it is the in-memory store.
+    When the sync store guards Redis with a circuit breaker or keeps an L1, the async
+    store shares them.
+    """
+
+    sync_store = sync_store if sync_store is not None else create_store_from_env()
+    redis_store = _redis_backend(sync_store)
+    if redis_store is None:
+        # Only the in-memory fallback is cheap enough to call on the event loop.
+        return SyncStoreAdapter(sync_store, offload=not isinstance(sync_store, InMemoryBracketStore))
+
+    store: AsyncBracketStore = AsyncRedisBracketStore(redis_store.url, key_prefix=redis_store._key_prefix)
+    resilient = _resilient(sync_store)
+    if resilient is not None:
+        store = AsyncResilientBracketStore(store, resilient.fallback, resilient.breaker)
+    if isinstance(sync_store, LayeredBracketStore):
+        store = AsyncLayeredBracketStore(store, sync_store)
+
+    return store
+
+
+def _resilient(store: BracketStore) -> Optional[ResilientBracketStore]:
+    if isinstance(store, LayeredBracketStore):
+        store = store.backend
+
+    return store if isinstance(store, ResilientBracketStore) else None
+
+
+def _redis_backend(store: BracketStore) -> Optional[RedisBracketStore]:
+    """The single Redis node behind the wrappers create_store_from_env adds, if there is one."""
+
+    resilient = _resilient(store)
+    if resilient is not None:
+        store = resilient.primary
+    elif isinstance(store, LayeredBracketStore):
+        store = store.backend
+
+    return store if isinstance(store, RedisBracketStore) else None
@@ -1,10 +1,12 @@
-from typing import List, Optional, Sequence
+from typing import List, Optional, Sequence, TypeVar
 import math
 import random
 from brackify.spotify_client import TrackInfo
 
 
-AllowedBracketSizes = (8, 16, 32)
+T = TypeVar('T')
+
+AllowedBracketSizes = tuple(2 ** exponent for exponent in range(3, 11))
 
 
 def _validated_size(size: int) -> int:
@@ -34,6 +36,34 @@ def build_seed_list(tracks: Sequence[TrackInfo], size: int, order: str = 'playli
     return seeds
 
 
+def seed_order(size: int) -> List[int]:
+    """Seed index for each first-round slot, so seed 1 meets seed N, seed 2 meets seed N - 1, and so on.
+
+    The top seeds are spread so they can only meet in late rounds, and the missing
+    seeds at the end of a short seed list become byes for the top seeds.
+    """
+
+    if size < 1 or math.log2(size) % 1 != 0:
+        raise ValueError('bracket size must be a power of two')
+
+    order = [0]
+    while len(order) < size:
+        count = len(order) * 2
+        order = [slot for seed in order for slot in (seed, count - 1 - seed)]
+
+    return order
+
+
+def bracket_slots(seeds: Sequence[T]) -> List[T]:
+    """Lay a seed table out in first-round slot order.
+
+    Stored brackets keep only the seed table; slot i plays slot i ^ 1, and the winner of
+    match m in round r moves to match m // 2 of round r + 1, so no per-round copies are needed.
+    """
+
+    return [seeds[index] for index in seed_order(len(seeds))]
+
+
 def chunk_matches(seeds: Sequence[Optional[TrackInfo]]) -> List[List[Optional[TrackInfo]]]:
     if not seeds or math.log2(len(seeds)) % 1 != 0:
         raise ValueError('seed list length must be a power of two')
@@ -0,0 +1,155 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import logging
+import threading
+import time
+from brackify import metrics
+
+T = TypeVar('T')
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency while its breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast once a dependency keeps erroring or answering slowly.
+
+    After failure_threshold consecutive failures (errors, or calls slower than
+    slow_call_seconds) the breaker opens and calls raise CircuitOpen without touching
+    the dependency. While open, a background thread runs probe() every
+    probe_interval seconds and closes the breaker on the first quick success, so
+    request threads never pay for finding out whether the dependency is back.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], Any],
+        name: str = 'redis',
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 0.25,
+        probe_interval: float = 2.0,
+    ) -> None:
+        self.probe = probe
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._calls = 0
+        self._failures = 0
+        self._rejected = 0
+        self._opened = 0
+        self._latency_ewma = 0.0
+        self._max_latency = 0.0
+        self._opened_at: Optional[float] = None
+        self._prober: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def call(self, fn: Callable[[], T]) -> T:
+        self._admit()
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            self._record(time.perf_counter() - start, failed = True)
+            raise
+
+        elapsed = time.perf_counter() - start
+        self._record(elapsed, failed = elapsed > self.slow_call_seconds)
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """call() for a coroutine, counted against the same failures and state."""
+
+        self._admit()
+        start = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception:
+            self._record(time.perf_counter() - start, failed = True)
+            raise
+
+        elapsed = time.perf_counter() - start
+        self._record(elapsed, failed = elapsed > self.slow_call_seconds)
+        return result
+
+    def _admit(self) -> None:
+        if self._state == OPEN:
+            with self._lock:
+                self._rejected += 1
+            raise CircuitOpen(f'{self.name} circuit is open')
+
+    def _record(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self._calls += 1
+            self._latency_ewma = elapsed if self._calls == 1 else 0.9 * self._latency_ewma + 0.1 * elapsed
+            self._max_latency = max(self._max_latency, elapsed)
+
+            if not failed:
+                self._consecutive_failures = 0
+                return
+
+            self._failures += 1
+            self._consecutive_failures += 1
+            if self._state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened += 1
+        self._opened_at = time.time()
+        metrics.inc('breaker_transitions_total', breaker = self.name, state = OPEN)
+        logger.warning('%s circuit opened after %d consecutive failures', self.name, self._consecutive_failures)
+
+        if self._prober is None or not self._prober.is_alive():
+            self._prober = threading.Thread(target = self._probe_until_closed, name = f'brackify-{self.name}-probe', daemon = True)
+            self._prober.start()
+
+    def _probe_until_closed(self) -> None:
+        while not self._stop.wait(self.probe_interval):
+            start = time.perf_counter()
+            try:
+                self.probe()
+            except Exception:
+                continue
+
+            if time.perf_counter() - start <= self.slow_call_seconds:
+                self.reset()
+                return
+
+    def reset(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                metrics.inc('breaker_transitions_total', breaker = self.name, state = CLOSED)
+                logger.info('%s circuit closed', self.name)
+
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._state,
+                'calls': self._calls,
+                'failures': self._failures,
+                'consecutive_failures': self._consecutive_failures,
+                'rejected': self._rejected,
+                'opened': self._opened,
+                'open_seconds': round(time.time() - self._opened_at, 3) if self._opened_at else 0.0,
+                'latency_ms': round(self._latency_ewma * 1000, 3),
+                'max_latency_ms': round(self._max_latency * 1000, 3),
+            }
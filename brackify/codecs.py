@@ -0,0 +1,213 @@
+"""Byte encodings for payloads kept in external bracket stores."""
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:  # pragma: no cover - optional compact serializer
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover - falls back to compact JSON
+    msgpack = None
+
+try:  # pragma: no cover - optional compressor
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - falls back to zlib
+    zstandard = None
+
+MAGIC = b"BRK"
+VERSION = 1
+# MAGIC, then the version, format and compression bytes.
+HEADER_LENGTH = len(MAGIC) + 3
+
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+# Payload keys holding lists of track dicts; these are stored as rows under one shared header.
+TRACK_LIST_KEYS = ("seeds", "tracks")
+
+
+class CodecError(RuntimeError):
+    """A payload this worker cannot read, e.g. a newer format version or a missing library."""
+
+
+class CorruptPayload(ValueError):
+    """A stored value that no worker can read: truncated, or failing to decompress or parse."""
+
+
+class BracketCodec:
+    """Interface for turning store payloads into bytes and back."""
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JsonCodec(BracketCodec):
+    """Plain JSON, the format every store wrote before codecs existed."""
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        if raw[:3] == MAGIC:
+            return CompactCodec().decode(raw)
+
+        return _load_json(raw)
+
+
+def _load_json(raw: bytes) -> Dict[str, Any]:
+    try:
+        payload = json.loads(raw)
+    except ValueError as exc:
+        raise CorruptPayload(f"invalid JSON payload: {exc}") from exc
+
+    if not isinstance(payload, dict):
+        raise CorruptPayload("payload is not a JSON object")
+
+    return payload
+
+
+def _pack_tracks(tracks: List[Optional[Dict[str, Any]]], fields: List[str]) -> Optional[List[Any]]:
+    rows: List[Any] = []
+    for track in tracks:
+        if track is None:
+            rows.append(None)
+            continue
+
+        if not isinstance(track, dict):
+            return None
+
+        for name in track:
+            if name not in fields:
+                fields.append(name)
+
+        rows.append([track.get(name) for name in fields])
+
+    return rows
+
+
+def _unpack_tracks(rows: List[Any], fields: List[str]) -> List[Optional[Dict[str, Any]]]:
+    # Rows written before a field was first seen are shorter; zip stops at the row length.
+    return [None if row is None else dict(zip(fields, row)) for row in rows]
+
+
+def _pair(seeds: List[Any]) -> List[List[Any]]:
+    return [list(seeds[i:i + 2]) for i in range(0, len(seeds), 2)]
+
+
+class CompactCodec(BracketCodec):
+    """Versioned, deduplicated and compressed payload encoding.
+
+    Layout: MAGIC, a version byte, a format byte and a compression byte, then the body.
+    Track lists are stored as rows under a shared field list, and a matches list that
+    only repeats the seeds in pairs is dropped and rebuilt on decode. Values without the
+    header are treated as legacy JSON.
+    """
+
+    def __init__(self, compression: Optional[str] = "zlib", level: int = 6) -> None:
+        self.format = FORMAT_MSGPACK if msgpack is not None else FORMAT_JSON
+        self.level = level
+
+        if compression == "zstd" and zstandard is not None:
+            self.compression = COMPRESSION_ZSTD
+        elif compression in ("zlib", "zstd"):
+            self.compression = COMPRESSION_ZLIB
+        else:
+            self.compression = COMPRESSION_NONE
+
+    def _shrink(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        doc = dict(payload)
+        fields: List[str] = []
+        packed: List[str] = []
+
+        for key in TRACK_LIST_KEYS:
+            value = doc.get(key)
+            if isinstance(value, list):
+                rows = _pack_tracks(value, fields)
+                if rows is not None:
+                    doc[key] = rows
+                    packed.append(key)
+
+        derived = []
+        seeds = payload.get("seeds")
+        if isinstance(seeds, list) and payload.get("matches") == _pair(seeds):
+            doc.pop("matches")
+            derived.append("matches")
+
+        return {"doc": doc, "fields": fields, "packed": packed, "derived": derived}
+
+    def _expand(self, shrunk: Dict[str, Any]) -> Dict[str, Any]:
+        doc = shrunk["doc"]
+        for key in shrunk.get("packed", []):
+            doc[key] = _unpack_tracks(doc[key], shrunk["fields"])
+
+        if "matches" in shrunk.get("derived", []):
+            doc["matches"] = _pair(doc.get("seeds") or [])
+
+        return doc
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        shrunk = self._shrink(payload)
+
+        if self.format == FORMAT_MSGPACK:
+            body = msgpack.packb(shrunk, use_bin_type=True)
+        else:
+            body = json.dumps(shrunk, separators=(",", ":")).encode("utf-8")
+
+        if self.compression == COMPRESSION_ZSTD:
+            body = zstandard.ZstdCompressor(level=self.level).compress(body)
+        elif self.compression == COMPRESSION_ZLIB:
+            body = zlib.compress(body, self.level)
+
+        return MAGIC + bytes([VERSION, self.format, self.compression]) + body
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        if raw[:3] != MAGIC:
+            return _load_json(raw)
+
+        if len(raw) < HEADER_LENGTH:
+            raise CorruptPayload(f"payload is {len(raw)} bytes, shorter than its header")
+
+        version, body_format, compression = raw[3], raw[4], raw[5]
+        if version != VERSION:
+            raise CodecError(f"unsupported payload version {version}")
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise CodecError("zstandard is required to read this payload")
+        if body_format == FORMAT_MSGPACK and msgpack is None:
+            raise CodecError("msgpack is required to read this payload")
+
+        # Every library raises its own errors for bad input; callers only need to know it is corrupt.
+        try:
+            body = raw[HEADER_LENGTH:]
+            if compression == COMPRESSION_ZSTD:
+                body = zstandard.ZstdDecompressor().decompress(body)
+            elif compression == COMPRESSION_ZLIB:
+                body = zlib.decompress(body)
+
+            if body_format == FORMAT_MSGPACK:
+                shrunk = msgpack.unpackb(body, raw=False)
+            else:
+                shrunk = json.loads(body)
+
+            return self._expand(shrunk)
+        except Exception as exc:
+            raise CorruptPayload(f"cannot decode payload: {exc}") from exc
+
+
+def codec_from_env() -> BracketCodec:
+    """Pick the store codec from BRACKET_CODEC (compact or json) and BRACKET_COMPRESSION."""
+
+    name = (os.getenv("BRACKET_CODEC") or "compact").lower()
+    if name == "json":
+        return JsonCodec()
+
+    compression = (os.getenv("BRACKET_COMPRESSION") or "zlib").lower()
+    return CompactCodec(compression=None if compression == "none" else compression)
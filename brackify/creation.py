@@ -0,0 +1,206 @@
+"""Bracket creation shared by the Flask app, the ASGI app and the bulk CLI.
+
+Nothing here touches the environment or builds an app on import, so scripts can use it
+without starting a Flask application.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from brackify import metrics, ratelimit
+from brackify.brackets import AllowedBracketSizes, build_seed_list
+from brackify.spotify_client import TrackInfo, playlist_total
+from brackify.store import BracketStore
+
+EXPIRATION_HOURS = 72
+LEASE_SECONDS = 30
+BULK_MAX_BRACKETS = 1000
+BULK_FETCH_CONCURRENCY = 4
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def remaining_ttl_seconds(created_at: datetime, expiration_delta: timedelta) -> int:
+    elapsed = now() - created_at
+    remaining = expiration_delta - elapsed
+    return max(0, int(remaining.total_seconds()))
+
+
+def bracket_signature(playlist: str, size: int, order: str, bracket_name: str) -> Tuple[str, int, str, str]:
+    return (
+        playlist.strip(),
+        size,
+        order.strip().lower(),
+        bracket_name.strip(),
+    )
+
+
+def signature_key(signature: Tuple[str, int, str, str]) -> str:
+    playlist, size, order, bracket_name = signature
+    return '|'.join([playlist, str(size), order, bracket_name])
+
+
+def parse_bracket_request(payload: Dict[str, Any]) -> Tuple[Optional[Tuple[str, int, str, str]], Optional[str]]:
+    """Validate a create request, returning its signature or the error to report."""
+
+    playlist = (payload.get('playlist') or '').strip()
+    order = (payload.get('order') or 'playlist').strip().lower()
+    bracket_name = (payload.get('bracket_name') or '').strip()
+    size = payload.get('size')
+
+    if not playlist:
+        return None, 'playlist is required'
+
+    if not bracket_name:
+        return None, 'bracket_name is required'
+
+    try:
+        size_int = int(size)
+    except (TypeError, ValueError):
+        return None, f'size must be one of {AllowedBracketSizes}'
+
+    if size_int not in AllowedBracketSizes:
+        return None, f'size must be one of {AllowedBracketSizes}'
+
+    if order not in ('playlist', 'randomized'):
+        return None, 'order must be playlist or randomized'
+
+    return bracket_signature(playlist, size_int, order, bracket_name), None
+
+
+def build_bracket_payload(
+    signature: Tuple[str, int, str, str],
+    tracks: List[TrackInfo],
+    bracket_id: str,
+    share_url: str,
+    created_at: datetime,
+) -> Dict[str, Any]:
+    playlist, size_int, order, bracket_name = signature
+
+    # Missing seeds become byes for the top seeds, but every match needs at least one track.
+    if len(tracks) <= size_int // 2:
+        raise ValueError(f'This playlist needs at least {size_int // 2 + 1} tracks for a {size_int}-song bracket.')
+
+    seeds = build_seed_list(tracks, size_int, order = order)
+
+    return {
+        'size': size_int,
+        'order': order,
+        'layout': 'seeded',
+        'seed_count': len(seeds),
+        'seeds': seeds,
+        'total_tracks': playlist_total(tracks),
+        'bracket_name': bracket_name,
+        'playlist': playlist,
+        'bracket_id': bracket_id,
+        'share_url': share_url,
+        'created_at': created_at.isoformat(),
+    }
+
+
+class BulkEntry(TypedDict, total = False):
+    index: int
+    status: str
+    playlist: str
+    size: int
+    order: str
+    bracket_name: str
+    bracket_id: str
+    share_url: str
+    error: str
+
+
+def create_brackets_bulk(
+    specs: Sequence[Any],
+    store: BracketStore,
+    fetch: Callable[[str, Optional[int]], List[TrackInfo]],
+    share_url: Callable[[str], str],
+    ttl_seconds: int,
+    concurrency: int = BULK_FETCH_CONCURRENCY,
+) -> List[BulkEntry]:
+    """Create many brackets, fetching each distinct playlist once.
+
+    fetch(playlist, max_tracks) returns a playlist's tracks, where max_tracks is None
+    when the whole playlist is needed. Specs whose bracket is still live are reused,
+    the distinct playlists are fetched in parallel, and every new bracket and its
+    signature mapping are written in a single save_many. Returns one manifest entry
+    per spec, in order; a bad spec or playlist only fails its own entries.
+    """
+
+    entries: List[BulkEntry] = []
+    pending: Dict[Tuple[str, int, str, str], List[int]] = {}
+
+    for index, spec in enumerate(specs):
+        signature, error = parse_bracket_request(spec if isinstance(spec, dict) else {})
+        if signature is None:
+            entries.append({'index': index, 'status': 'error', 'error': error or 'invalid bracket spec'})
+            continue
+
+        playlist, size_int, order, bracket_name = signature
+        entries.append({'index': index, 'playlist': playlist, 'size': size_int, 'order': order, 'bracket_name': bracket_name})
+        pending.setdefault(signature, []).append(index)
+
+    def _resolve(signature: Tuple[str, int, str, str], **fields: Any) -> None:
+        for index in pending[signature]:
+            entries[index].update(fields)  # type: ignore[typeddict-item]
+
+    # Reuse live brackets with one read for every mapping and one read-and-touch for the hits.
+    signatures = list(pending)
+    mappings = store.get_many([signature_key(signature) for signature in signatures])
+    reusable = [(signature, mapping['bracket_id']) for signature, mapping in zip(signatures, mappings) if mapping and mapping.get('bracket_id')]
+    if reusable:
+        ids = [bracket_id for _, bracket_id in reusable]
+        keys = [signature_key(signature) for signature, _ in reusable]
+        brackets = store.get_and_touch_many(ids + keys, ttl_seconds)[:len(ids)]
+        for (signature, bracket_id), bracket in zip(reusable, brackets):
+            if bracket:
+                _resolve(signature, status = 'existing', bracket_id = bracket_id, share_url = bracket.get('share_url') or share_url(bracket_id))
+                del pending[signature]
+
+    # Playlist order only needs the leading tracks; any randomized bracket needs the whole playlist.
+    needed: Dict[str, Optional[int]] = {}
+    for playlist, size_int, order, _ in pending:
+        current = needed.get(playlist, 0)
+        needed[playlist] = None if order == 'randomized' or current is None else max(current, size_int)
+
+    def _fetch(playlist: str) -> Tuple[str, Any]:
+        try:
+            # Bulk work draws on the Spotify quota behind interactive bracket requests.
+            with ratelimit.background(), metrics.timed('playlist_fetch_seconds', order = 'bulk'):
+                return playlist, fetch(playlist, needed[playlist])
+        except Exception as exc:
+            return playlist, exc
+
+    fetched: Dict[str, Any] = {}
+    if needed:
+        with ThreadPoolExecutor(max_workers = max(1, min(concurrency, len(needed)))) as pool:
+            fetched = dict(pool.map(_fetch, needed))
+
+    created_at = now()
+    items: List[Tuple[str, Dict[str, Any], int]] = []
+    for signature in pending:
+        tracks = fetched[signature[0]]
+        if isinstance(tracks, Exception):
+            _resolve(signature, status = 'error', error = str(tracks) or 'Could not fetch playlist')
+            continue
+
+        bracket_id = store.new_bracket_id(signature_key(signature))
+        try:
+            bracket = build_bracket_payload(signature, tracks, bracket_id, share_url(bracket_id), created_at)
+        except ValueError as exc:
+            _resolve(signature, status = 'error', error = str(exc))
+            continue
+
+        items.append((bracket_id, bracket, ttl_seconds))
+        items.append((signature_key(signature), {'bracket_id': bracket_id}, ttl_seconds))
+        _resolve(signature, status = 'created', bracket_id = bracket_id, share_url = bracket['share_url'])
+
+    if items:
+        store.save_many(items)
+
+    for entry in entries:
+        metrics.inc('bulk_brackets_total', status = entry['status'])
+
+    return entries
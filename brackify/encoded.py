@@ -0,0 +1,113 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+from collections import OrderedDict
+import gzip
+import hashlib
+import json
+import threading
+import time
+from brackify.brackets import bracket_slots
+
+GZIP_MIN_BYTES = 1024
+
+
+class EncodedBracket:
+    """A bracket's canonical JSON body, its content hash and an optional gzip variant.
+
+    The track ID in each first-round slot is kept alongside so picks can be
+    validated without decoding the body again.
+    """
+
+    __slots__ = ('body', 'etag', 'gzip_body', 'expires_at', 'slots', '_inline')
+
+    def __init__(
+        self,
+        body: bytes,
+        expires_at: float,
+        gzip_min_bytes: int = GZIP_MIN_BYTES,
+        slots: Tuple[Optional[str], ...] = (),
+    ) -> None:
+        self.body = body
+        self.slots = slots
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzip_body = gzip.compress(body, compresslevel = 6, mtime = 0) if len(body) >= gzip_min_bytes else None
+        self.expires_at = expires_at
+        self._inline: Optional[str] = None
+
+    def inline_json(self) -> str:
+        """The same body, escaped so it can sit inside a <script> element."""
+
+        if self._inline is None:
+            text = self.body.decode('utf-8')
+            self._inline = text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
+        return self._inline
+
+    def remaining_seconds(self) -> int:
+        return max(0, int(self.expires_at - time.time()))
+
+
+def first_round_slots(payload: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+    """Track ID per first-round slot, in the order the bracket page lays them out."""
+
+    seeds: Sequence[Any] = payload.get('seeds') or []
+    track_ids = [seed.get('track_id') if isinstance(seed, dict) else None for seed in seeds]
+    if payload.get('layout') == 'seeded':
+        return tuple(bracket_slots(track_ids))
+
+    # Older brackets stored their seeds already paired in slot order.
+    return tuple(track_ids)
+
+
+def encode_bracket(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators = (',', ':'), sort_keys = True, ensure_ascii = False).encode('utf-8')
+
+
+class EncodedBracketCache:
+    """Per-process LRU of encoded bracket bodies so hot reads skip decoding and re-encoding.
+
+    Stored brackets never change after creation, only their expiry does, so an entry
+    stays valid until the expiry it was loaded with.
+    """
+
+    def __init__(self, max_entries: int = 1024, gzip_min_bytes: int = GZIP_MIN_BYTES) -> None:
+        self.max_entries = max_entries
+        self.gzip_min_bytes = gzip_min_bytes
+        self._entries: 'OrderedDict[str, EncodedBracket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bracket_id: str) -> Optional[EncodedBracket]:
+        with self._lock:
+            encoded = self._entries.get(bracket_id)
+            if encoded is None:
+                return None
+
+            if encoded.expires_at <= time.time():
+                self._entries.pop(bracket_id, None)
+                return None
+
+            self._entries.move_to_end(bracket_id)
+            return encoded
+
+    def put(self, bracket_id: str, payload: Dict[str, Any], ttl_seconds: int) -> EncodedBracket:
+        encoded = EncodedBracket(
+            encode_bracket(payload),
+            time.time() + ttl_seconds,
+            self.gzip_min_bytes,
+            slots = first_round_slots(payload),
+        )
+        if self.max_entries <= 0 or ttl_seconds <= 0:
+            return encoded
+
+        with self._lock:
+            self._entries[bracket_id] = encoded
+            self._entries.move_to_end(bracket_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+        return encoded
+
+    def extend(self, bracket_id: str, ttl_seconds: int) -> None:
+        with self._lock:
+            encoded = self._entries.get(bracket_id)
+            if encoded is not None:
+                encoded.expires_at = time.time() + ttl_seconds
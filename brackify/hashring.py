@@ -0,0 +1,40 @@
+from typing import Generic, List, Sequence, Tuple, TypeVar
+import bisect
+import hashlib
+
+T = TypeVar('T')
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size = 8).digest(), 'big')
+
+
+class HashRing(Generic[T]):
+    """Consistent hashing with virtual nodes.
+
+    Each node is placed at `vnodes` points on a 64-bit ring and a key belongs to the
+    first point at or after its hash. Adding a node to N existing ones only moves the
+    keys that land on its points, about 1 / (N + 1) of them, and virtual nodes keep
+    the share of each node close to even.
+    """
+
+    def __init__(self, nodes: Sequence[Tuple[str, T]], vnodes: int = 160) -> None:
+        if not nodes:
+            raise ValueError('a hash ring needs at least one node')
+
+        points: List[Tuple[int, int]] = []
+        for index, (name, _) in enumerate(nodes):
+            points.extend((_hash(f'{name}#{replica}'), index) for replica in range(vnodes))
+
+        points.sort()
+        self._hashes = [point for point, _ in points]
+        self._owners = [index for _, index in points]
+        self.names = [name for name, _ in nodes]
+        self.nodes = [node for _, node in nodes]
+
+    def index_for(self, key: str) -> int:
+        position = bisect.bisect_left(self._hashes, _hash(key))
+        return self._owners[position % len(self._hashes)]
+
+    def node_for(self, key: str) -> T:
+        return self.nodes[self.index_for(key)]
@@ -0,0 +1,219 @@
+from typing import Any, Callable, List, Optional, Tuple
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from brackify.singleflight import SingleFlight
+
+try:  # pragma: no cover - optional; without it thumbnails are cached at their original size
+    from PIL import Image  # type: ignore
+except ImportError:  # pragma: no cover - resizing is skipped
+    Image = None
+
+try:  # pragma: no cover - installed alongside spotipy
+    import requests  # type: ignore
+except ImportError:  # pragma: no cover - the proxy cannot fetch without it
+    requests = None
+
+
+IMAGE_HOST = 'https://i.scdn.co/image/'
+THUMBNAIL_WIDTHS = (64, 80, 160, 300)
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Pruning stops at this share of the cap, so a full cache is not rescanned on every write.
+IMAGE_CACHE_LOW_WATER = 0.9
+_IMAGE_ID = re.compile(r'^[0-9a-f]{16,64}$')
+
+
+def image_id_from_url(url: Optional[str]) -> Optional[str]:
+    """The Spotify CDN image ID in url, or None for anything not served from i.scdn.co."""
+
+    if not url or not url.startswith(IMAGE_HOST):
+        return None
+
+    image_id = url[len(IMAGE_HOST):]
+    return image_id if _IMAGE_ID.match(image_id) else None
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to a supported size, so the cache holds a few variants per image."""
+
+    for candidate in THUMBNAIL_WIDTHS:
+        if width <= candidate:
+            return candidate
+
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def _download(url: str) -> bytes:
+    if requests is None:
+        raise RuntimeError('requests is required to fetch album art')
+
+    response = requests.get(url, timeout = 5, stream = True)
+    response.raise_for_status()
+
+    body = response.raw.read(MAX_IMAGE_BYTES + 1, decode_content = True)
+    if len(body) > MAX_IMAGE_BYTES:
+        raise ValueError('image is too large')
+
+    return body
+
+
+class ThumbnailCache:
+    """Fetches Spotify album art, shrinks it and keeps the result on disk.
+
+    Only image IDs from i.scdn.co are accepted, so the endpoint cannot be used to
+    fetch arbitrary URLs. Files are named by image ID and width; an image ID always
+    refers to the same picture, so cached files never need invalidating.
+
+    Any client can name any image, so the directory is capped at max_bytes. Reads
+    refresh a file's mtime, and once a write pushes the total over the cap, the least
+    recently used files are deleted until it is back under the low-water mark.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fetch: Callable[[str], bytes] = _download,
+        quality: int = 80,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.fetch = fetch
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self._flights: SingleFlight[Tuple[bytes, str]] = SingleFlight()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok = True)
+        self._bytes = sum(size for _, _, size in self._entries())
+
+    @classmethod
+    def from_env(cls) -> Optional['ThumbnailCache']:
+        directory = os.getenv('BRACKIFY_IMAGE_CACHE_DIR')
+        if not directory:
+            return None
+
+        return cls(directory, max_bytes = int(os.getenv('BRACKIFY_IMAGE_CACHE_MAX_BYTES') or IMAGE_CACHE_MAX_BYTES))
+
+    @property
+    def resizes(self) -> bool:
+        """Whether thumbnails are actually shrunk; without Pillow the proxy only adds a hop."""
+
+        return Image is not None
+
+    def _path(self, image_id: str, width: int) -> str:
+        return os.path.join(self.directory, f'{image_id}-{width}')
+
+    def get(self, image_id: str, width: int) -> Tuple[bytes, str]:
+        """Return (body, content type) for the image at the snapped width."""
+
+        if not _IMAGE_ID.match(image_id):
+            raise ValueError('invalid image id')
+
+        width = snap_width(width)
+        path = self._path(image_id, width)
+
+        cached = self._read(path)
+        if cached is not None:
+            return cached
+
+        return self._flights.do(path, lambda: self._build(image_id, width, path))
+
+    def _read(self, path: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            with open(path, 'rb') as handle:
+                body = handle.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # pragma: no cover - pruned by another worker in between
+            pass
+
+        return body, _content_type(body)
+
+    def _build(self, image_id: str, width: int, path: str) -> Tuple[bytes, str]:
+        cached = self._read(path)
+        if cached is not None:
+            return cached
+
+        body = self._resize(self.fetch(IMAGE_HOST + image_id), width)
+
+        # Write to a temporary file and rename, so readers never see a partial image.
+        fd, tmp_path = tempfile.mkstemp(dir = self.directory, prefix = '.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._bytes += len(body)
+            if self._bytes > self.max_bytes:
+                self._prune()
+
+        return body, _content_type(body)
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # pragma: no cover - removed by another worker
+                continue
+            entries.append((entry.path, stat.st_mtime, stat.st_size))
+
+        return entries
+
+    def _prune(self) -> None:
+        # Other workers may share the directory, so the real total comes from disk.
+        entries = sorted(self._entries(), key = lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * IMAGE_CACHE_LOW_WATER
+
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:  # pragma: no cover - removed by another worker
+                pass
+            total -= size
+
+        self._bytes = total
+
+    def _resize(self, body: bytes, width: int) -> bytes:
+        if Image is None:
+            return body
+
+        with Image.open(io.BytesIO(body)) as image:
+            if image.width <= width:
+                return body
+
+            height = max(1, round(image.height * width / image.width))
+            resized: Any = image.convert('RGB').resize((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format = 'JPEG', quality = self.quality, optimize = True, progressive = True)
+            return out.getvalue()
+
+
+def _content_type(body: bytes) -> str:
+    if body[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+
+    if body[:4] == b'RIFF' and body[8:12] == b'WEBP':
+        return 'image/webp'
+
+    return 'image/jpeg'
+
+
+def image_etag(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:32]
@@ -0,0 +1,168 @@
+from typing import Any, Callable, Dict, Optional, Tuple, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+import secrets
+import threading
+import time
+from brackify.store import BracketStore
+
+
+JOB_WORKERS = 0
+JOB_MAX_QUEUED = 32
+JOB_TTL_SECONDS = 900
+JOB_HEARTBEAT_SECONDS = 10.0
+JOB_STALE_SECONDS = 60.0
+# What a finished job keeps from create()'s body: a bracket's link, or a bulk manifest.
+JOB_RESULT_FIELDS = ('bracket_id', 'share_url', 'manifest')
+
+
+class BracketJob(TypedDict, total = False):
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    bracket_id: str
+    share_url: str
+    manifest: Dict[str, Any]
+    error: str
+    status_code: int
+
+
+class QueueFull(Exception):
+    """Raised when every worker is busy and the queue is already at its bound."""
+
+
+def job_key(job_id: str) -> str:
+    return f'job:{job_id}'
+
+
+def job_signature_key(signature_key: str) -> str:
+    return f'job-signature:{signature_key}'
+
+
+class BracketJobQueue:
+    """Runs slow bracket creations on a bounded worker pool and records progress in the store.
+
+    Job state lives in the shared BracketStore, so whichever web worker receives a poll
+    can answer it. Requests for a signature that already has a pending job reuse it
+    instead of queueing a second fetch. The worker that owns a pending job rewrites it
+    every heartbeat_seconds; a pending job not updated for stale_seconds belonged to a
+    worker that died, so it is reported as failed and the signature can be retried.
+    """
+
+    def __init__(
+        self,
+        store: BracketStore,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        ttl_seconds: int = JOB_TTL_SECONDS,
+        heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS,
+        stale_seconds: float = JOB_STALE_SECONDS,
+    ) -> None:
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        # Pending jobs owned by this worker, rewritten by the heartbeat thread.
+        self._pending: Dict[str, BracketJob] = {}
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'bracket-job')
+            self._heartbeat = threading.Thread(target = self._beat, name = 'bracket-job-heartbeat', daemon = True)
+            self._heartbeat.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def _write(self, job: BracketJob) -> None:
+        job['updated_at'] = time.time()
+        self.store.save(job_key(job['job_id']), dict(job), self.ttl_seconds)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            with self._lock:
+                for job in self._pending.values():
+                    self._write(job)
+
+    def get(self, job_id: str) -> Optional[BracketJob]:
+        job: Optional[BracketJob] = self.store.get(job_key(job_id))  # type: ignore[assignment]
+        if job and job.get('status') in ('queued', 'running') and time.time() - job.get('updated_at', 0) > self.stale_seconds:
+            return dict(job, status = 'failed', error = 'Bracket creation was interrupted. Please try again.', status_code = 500)  # type: ignore[return-value]
+
+        return job
+
+    def submit(self, signature_key: str, create: Callable[[], Tuple[Dict[str, Any], int]]) -> BracketJob:
+        """Queue create() for a signature, or return the job already working on it."""
+
+        if self._executor is None:
+            raise RuntimeError('job mode is disabled')
+
+        existing = self.store.get(job_signature_key(signature_key))
+        if existing:
+            job = self.get(existing.get('job_id', ''))
+            if job and job.get('status') in ('queued', 'running'):
+                return job
+
+        with self._lock:
+            if self._outstanding >= self.workers + self.max_queued:
+                raise QueueFull()
+            self._outstanding += 1
+
+        job: BracketJob = {'job_id': secrets.token_urlsafe(8), 'status': 'queued', 'created_at': time.time()}
+        with self._lock:
+            self._write(job)
+            self._pending[job['job_id']] = job
+        self.store.save(job_signature_key(signature_key), {'job_id': job['job_id']}, self.ttl_seconds)
+
+        try:
+            self._executor.submit(self._run, dict(job), create)
+        except RuntimeError:
+            with self._lock:
+                self._outstanding -= 1
+                self._pending.pop(job['job_id'], None)
+            raise
+
+        return job
+
+    def _run(self, job: BracketJob, create: Callable[[], Tuple[Dict[str, Any], int]]) -> None:
+        job_id = job['job_id']
+        try:
+            with self._lock:
+                job = self._pending.get(job_id, job)
+                job['status'] = 'running'
+                self._write(job)
+
+            try:
+                body, status = create()
+            except Exception as exc:
+                body, status = {'error': str(exc) or 'Bracket creation failed'}, 500
+
+            # Under the lock so a heartbeat cannot overwrite the result with 'running'.
+            with self._lock:
+                self._pending.pop(job_id, None)
+                if status < 400:
+                    job.update(status = 'done', **{field: body[field] for field in JOB_RESULT_FIELDS if field in body})  # type: ignore[typeddict-item]
+                else:
+                    job.update(status = 'failed', error = body.get('error', 'Bracket creation failed'), status_code = status)
+
+                self._write(job)
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+                self._outstanding -= 1
+
+    def outstanding(self) -> int:
+        with self._lock:
+            return self._outstanding
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait = wait)
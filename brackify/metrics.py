@@ -0,0 +1,204 @@
+"""Optional Prometheus-style metrics and per-request stage timings.
+
+Enabled with BRACKIFY_METRICS=1. While disabled, `timed()` hands back a shared no-op
+context manager and `inc()` returns after one check, so the hooks left in hot paths
+cost a function call and nothing more.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import bisect
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = 'brackify_'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """In-process counters and fixed-bucket histograms, rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            if index < len(self.buckets):
+                histogram.counts[index] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def histogram_count(self, name: str, **labels: str) -> int:
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+            return histogram.count if histogram else 0
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f'{PREFIX}{name}{_labels(key)} {_number(value)}')
+
+            for name in sorted(self._histograms):
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{PREFIX}{name}_bucket{_labels(key, le = _number(bound))} {cumulative}')
+                    lines.append(f'{PREFIX}{name}_bucket{_labels(key, le = "+Inf")} {histogram.count}')
+                    lines.append(f'{PREFIX}{name}_sum{_labels(key)} {_number(histogram.total)}')
+                    lines.append(f'{PREFIX}{name}_count{_labels(key)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_registry: Optional[MetricsRegistry] = MetricsRegistry() if os.getenv('BRACKIFY_METRICS', '').lower() in ('1', 'true', 'yes') else None
+# Stage durations (seconds) for the request being handled, reported as Server-Timing.
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar('brackify_stages', default = None)
+_NOOP = nullcontext()
+
+
+def enable(registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    global _registry
+    _registry = registry or MetricsRegistry()
+    return _registry
+
+
+def disable() -> None:
+    global _registry
+    _registry = None
+
+
+def registry() -> Optional[MetricsRegistry]:
+    return _registry
+
+
+def enabled() -> bool:
+    return _registry is not None
+
+
+def inc(name: str, amount: float = 1.0, **labels: str) -> None:
+    if _registry is None:
+        return
+
+    _registry.inc(name, amount, **labels)
+
+
+@contextmanager
+def _timer(name: str, stage: Optional[str], labels: Dict[str, str]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if _registry is not None:
+            _registry.observe(name, elapsed, **labels)
+
+        stages = _stages.get()
+        if stage is not None and stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def timed(name: str, stage: Optional[str] = None, **labels: str) -> Any:
+    """Time a block into histogram `name`, and into the request's Server-Timing `stage`."""
+
+    if _registry is None:
+        return _NOOP
+
+    return _timer(name, stage, labels)
+
+
+def begin_request() -> Any:
+    """Start collecting stage timings for the current request; returns a reset token."""
+
+    return _stages.set({})
+
+
+def end_request(token: Any) -> Dict[str, float]:
+    stages = _stages.get() or {}
+    _stages.reset(token)
+    return stages
+
+
+def server_timing(stages: Dict[str, float], total: Optional[float] = None) -> str:
+    parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in stages.items()]
+    if total is not None:
+        parts.append(f'total;dur={total * 1000:.1f}')
+
+    return ', '.join(parts)
+
+
+class InstrumentedStore:
+    """Wraps a BracketStore so every call is timed per backend and operation.
+
+    Only installed when metrics are enabled, so an uninstrumented deployment keeps
+    calling the store directly.
+    """
+
+    def __init__(self, store: Any) -> None:
+        self._store = store
+        self._backend = type(store).__name__
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._store, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            with timed('store_seconds', stage = 'store', backend = self._backend, op = name):
+                return attr(*args, **kwargs)
+
+        return _call
+
+    def __len__(self) -> int:
+        return len(self._store)
@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional, TypedDict
+from collections import OrderedDict
+import os
+import threading
+from brackify.spotify_client import TrackInfo
+from brackify.store import BracketStore
+
+
+PLAYLIST_CACHE_TTL_SECONDS = 3600
+PLAYLIST_CACHE_MAX_ENTRIES = 512
+PLAYLIST_CACHE_FULL_FETCH_LIMIT = 1000
+
+
+class CachedPlaylist(TypedDict):
+    snapshot_id: str
+    total: int
+    complete: bool
+    tracks: List[TrackInfo]
+
+
+class PlaylistTrackCache:
+    """Playlist tracks cached in a BracketStore under the playlist ID and Spotify snapshot_id.
+
+    A changed playlist gets a new snapshot_id and therefore a new key, so entries never
+    need invalidating; stale snapshots simply age out. Each process also keeps an LRU
+    of the keys it wrote and deletes the least recently used once max_entries is exceeded.
+    """
+
+    def __init__(
+        self,
+        store: BracketStore,
+        ttl_seconds: int = PLAYLIST_CACHE_TTL_SECONDS,
+        max_entries: int = PLAYLIST_CACHE_MAX_ENTRIES,
+        full_fetch_limit: int = PLAYLIST_CACHE_FULL_FETCH_LIMIT,
+        key_prefix: str = 'playlist:',
+    ) -> None:
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.full_fetch_limit = full_fetch_limit
+        self._key_prefix = key_prefix
+        self._recent: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, store: BracketStore) -> 'PlaylistTrackCache':
+        return cls(
+            store,
+            ttl_seconds = int(os.getenv('PLAYLIST_CACHE_TTL_SECONDS', PLAYLIST_CACHE_TTL_SECONDS)),
+            max_entries = int(os.getenv('PLAYLIST_CACHE_MAX_ENTRIES', PLAYLIST_CACHE_MAX_ENTRIES)),
+            full_fetch_limit = int(os.getenv('PLAYLIST_CACHE_FULL_FETCH_LIMIT', PLAYLIST_CACHE_FULL_FETCH_LIMIT)),
+        )
+
+    def _key(self, playlist_id: str, snapshot_id: str) -> str:
+        return f'{self._key_prefix}{playlist_id}:{snapshot_id}'
+
+    def _mark_used(self, key: str) -> List[str]:
+        with self._lock:
+            self._recent[key] = None
+            self._recent.move_to_end(key)
+
+            evicted = []
+            while len(self._recent) > self.max_entries:
+                oldest, _ = self._recent.popitem(last = False)
+                evicted.append(oldest)
+
+            return evicted
+
+    def get(self, playlist_id: str, snapshot_id: str) -> Optional[CachedPlaylist]:
+        key = self._key(playlist_id, snapshot_id)
+        entry = self.store.get(key)
+
+        if not entry or entry.get('snapshot_id') != snapshot_id:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        for stale in self._mark_used(key):
+            self.store.save(stale, {}, 0)
+
+        return entry  # type: ignore[return-value]
+
+    def touch(self, playlist_id: str, snapshot_id: str) -> bool:
+        """Restart the lifetime of a cached entry, e.g. for a playlist that is still popular."""
+
+        return self.store.touch(self._key(playlist_id, snapshot_id), self.ttl_seconds)
+
+    def put(self, playlist_id: str, snapshot_id: str, tracks: List[TrackInfo], total: int, complete: bool) -> None:
+        if not snapshot_id or self.max_entries <= 0:
+            return
+
+        key = self._key(playlist_id, snapshot_id)
+        entry: Dict[str, Any] = {
+            'snapshot_id': snapshot_id,
+            'total': total,
+            'complete': complete,
+            'tracks': list(tracks),
+        }
+        self.store.save(key, entry, self.ttl_seconds)
+
+        for stale in self._mark_used(key):
+            self.store.save(stale, {}, 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'tracked_entries': len(self._recent)}
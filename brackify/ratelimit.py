@@ -0,0 +1,352 @@
+"""Token-bucket rate limiting for Spotify calls, optionally shared through Redis.
+
+Every worker draws from one bucket, so the whole deployment stays under the app's
+quota. A 429 pauses the bucket for its Retry-After and halves the rate; the rate then
+climbs back to the ceiling over `recovery_seconds`. Background work (bulk creation,
+cache warming) leaves a reserve of tokens for bracket-creation requests and waits
+while any of them are queued in the same process.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+import os
+import threading
+import time
+from brackify import metrics
+from brackify.breaker import CircuitBreaker
+
+T = TypeVar('T')
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+_priority: ContextVar[str] = ContextVar('brackify_spotify_priority', default = INTERACTIVE)
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a Spotify call could not get a token within its wait budget."""
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority(level: str) -> Iterator[None]:
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def background() -> Any:
+    """Mark Spotify calls made in this block as background work."""
+
+    return priority(BACKGROUND)
+
+
+def carry(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap fn so it runs with the caller's priority, e.g. on a thread pool."""
+
+    level = _priority.get()
+
+    def _run(*args: Any, **kwargs: Any) -> T:
+        with priority(level):
+            return fn(*args, **kwargs)
+
+    return _run
+
+
+class LocalTokenBucket:
+    """Adaptive token bucket for a single process."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        min_rate: float = 1.0,
+        recovery_seconds: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.recovery = rate / recovery_seconds if recovery_seconds > 0 else float('inf')
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+        self._floor: Optional[float] = None
+        self._penalized_at: Optional[float] = None
+        self._blocked_until = 0.0
+
+    def _rate(self, now: float) -> float:
+        if self._floor is None or self._penalized_at is None:
+            return self.max_rate
+
+        return min(self.max_rate, self._floor + self.recovery * (now - self._penalized_at))
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """Take a token if more than `reserve` would remain; otherwise return seconds to wait."""
+
+        with self._lock:
+            now = self.clock()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            rate = self._rate(now)
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * rate)
+            self._updated = max(self._updated, now)
+
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return 0.0
+
+            return (1 + reserve - self._tokens) / rate
+
+    def penalize(self, retry_after: float) -> None:
+        with self._lock:
+            now = self.clock()
+            # 429s from one burst arrive together; only the first of them halves the rate.
+            if self._penalized_at is None or now - self._penalized_at >= 1.0:
+                self._floor = max(self.min_rate, self._rate(now) * 0.5)
+                self._penalized_at = now
+
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tokens = 0.0
+
+    def rate(self) -> float:
+        with self._lock:
+            return self._rate(self.clock())
+
+
+class RedisTokenBucket:
+    """The same bucket kept in a Redis hash, so every worker shares it.
+
+    Falls back to a local bucket while Redis is unreachable. With a breaker, the first
+    failure opens it and later calls go straight to the local bucket until a background
+    probe sees Redis again, so an outage does not cost every Spotify call a timeout.
+    """
+
+    _ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+local reserve = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'floor', 'penalized_at', 'blocked_until')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+local floor = tonumber(state[3])
+local penalized_at = tonumber(state[4])
+local blocked_until = tonumber(state[5]) or 0
+if now < blocked_until then
+    return tostring(blocked_until - now)
+end
+local rate = max_rate
+if floor and penalized_at then
+    rate = math.min(max_rate, floor + recovery * (now - penalized_at))
+end
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(math.max(updated, now)))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+    _PENALIZE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = tonumber(ARGV[2])
+local max_rate = tonumber(ARGV[3])
+local min_rate = tonumber(ARGV[4])
+local recovery = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'floor', 'penalized_at', 'blocked_until')
+local floor = tonumber(state[1])
+local penalized_at = tonumber(state[2])
+local blocked_until = tonumber(state[3]) or 0
+if not penalized_at or now - penalized_at >= 1 then
+    local rate = max_rate
+    if floor and penalized_at then
+        rate = math.min(max_rate, floor + recovery * (now - penalized_at))
+    end
+    floor = math.max(min_rate, rate * 0.5)
+    penalized_at = now
+end
+redis.call('HSET', KEYS[1], 'floor', tostring(floor), 'penalized_at', tostring(penalized_at),
+    'blocked_until', tostring(math.max(blocked_until, now + retry_after)), 'tokens', '0', 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+    def __init__(self, client: Any, local: LocalTokenBucket, key: str = 'brackify:spotify-bucket', breaker: Optional[CircuitBreaker] = None) -> None:
+        self.client = client
+        self.local = local
+        self.key = key
+        self.breaker = breaker
+        self._acquire = client.register_script(self._ACQUIRE_SCRIPT)
+        self._penalize = client.register_script(self._PENALIZE_SCRIPT)
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        bucket = self.local
+        try:
+            wait = self._call(lambda: self._acquire(
+                keys = [self.key],
+                args = [repr(bucket.clock()), repr(bucket.max_rate), repr(bucket.burst), repr(bucket.recovery), repr(reserve)],
+            ))
+        except Exception as exc:
+            metrics.inc('rate_limiter_fallbacks_total')
+            logger.debug('Using the local Spotify rate limiter: %s', exc)
+            return bucket.try_acquire(reserve)
+
+        return float(wait.decode('ascii') if isinstance(wait, bytes) else wait)
+
+    def penalize(self, retry_after: float) -> None:
+        bucket = self.local
+        bucket.penalize(retry_after)
+        try:
+            self._call(lambda: self._penalize(
+                keys = [self.key],
+                args = [repr(bucket.clock()), repr(retry_after), repr(bucket.max_rate), repr(bucket.min_rate), repr(bucket.recovery)],
+            ))
+        except Exception as exc:
+            logger.debug('Could not share a Spotify 429 through Redis: %s', exc)
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        return self.breaker.call(fn) if self.breaker is not None else fn()
+
+
+class SpotifyRateLimiter:
+    """Hands out bucket tokens, letting bracket-creation requests go first."""
+
+    def __init__(
+        self,
+        bucket: Any,
+        background_reserve: float = 0.0,
+        max_wait: Optional[Dict[str, float]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.bucket = bucket
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait or {INTERACTIVE: 10.0, BACKGROUND: 120.0}
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+
+    def acquire(self) -> None:
+        level, interactive, limit = self._enter()
+        waited = 0.0
+        try:
+            while True:
+                wait = self._try_acquire(interactive)
+                if wait <= 0:
+                    return
+
+                step = self._step(level, limit, waited, wait)
+                self.sleep(step)
+                waited += step
+        finally:
+            self._leave(interactive)
+
+    async def acquire_async(self) -> None:
+        """acquire() for coroutines: waits without blocking the event loop."""
+
+        level, interactive, limit = self._enter()
+        waited = 0.0
+        try:
+            while True:
+                # A local bucket is a lock around arithmetic; a shared one is a Redis round trip.
+                if isinstance(self.bucket, LocalTokenBucket):
+                    wait = self._try_acquire(interactive)
+                else:
+                    wait = await asyncio.to_thread(self._try_acquire, interactive)
+                if wait <= 0:
+                    return
+
+                step = self._step(level, limit, waited, wait)
+                await self.async_sleep(step)
+                waited += step
+        finally:
+            self._leave(interactive)
+
+    def _enter(self) -> Tuple[str, bool, float]:
+        level = _priority.get()
+        interactive = level != BACKGROUND
+        if interactive:
+            with self._lock:
+                self._interactive_waiting += 1
+
+        return level, interactive, self.max_wait.get(level, self.max_wait[INTERACTIVE])
+
+    def _leave(self, interactive: bool) -> None:
+        if interactive:
+            with self._lock:
+                self._interactive_waiting -= 1
+
+    def _try_acquire(self, interactive: bool) -> float:
+        if not interactive and self._interactive_waiting:
+            return 0.05
+
+        return self.bucket.try_acquire(0.0 if interactive else self.background_reserve)
+
+    def _step(self, level: str, limit: float, waited: float, wait: float) -> float:
+        if waited + wait > limit:
+            metrics.inc('rate_limiter_timeouts_total', priority = level)
+            raise RateLimitTimeout('Spotify is busy right now. Please try again shortly.')
+
+        step = min(wait, 1.0)
+        metrics.inc('rate_limiter_wait_seconds_total', step, priority = level)
+        return step
+
+    def penalize(self, retry_after: float) -> None:
+        self.bucket.penalize(retry_after)
+
+
+def create_rate_limiter_from_env() -> Optional[SpotifyRateLimiter]:
+    """A limiter for SPOTIFY_RATE_LIMIT requests per second, shared through Redis when configured."""
+
+    rate = float(os.getenv('SPOTIFY_RATE_LIMIT') or 0)
+    if rate <= 0:
+        return None
+
+    burst = float(os.getenv('SPOTIFY_RATE_BURST') or rate * 2)
+    local = LocalTokenBucket(
+        rate,
+        burst,
+        min_rate = float(os.getenv('SPOTIFY_RATE_MIN') or max(1.0, rate / 10)),
+        recovery_seconds = float(os.getenv('SPOTIFY_RATE_RECOVERY_SECONDS') or 60),
+    )
+    bucket: Any = local
+
+    redis_url = os.getenv('BRACKET_REDIS_URL') or os.getenv('REDIS_URL') or (os.getenv('BRACKET_REDIS_URLS') or '').split(',')[0].strip()
+    if redis_url:
+        try:
+            import redis  # type: ignore
+            from brackify.store import redis_timeouts_from_env
+
+            client = redis.Redis.from_url(redis_url, **redis_timeouts_from_env())
+            client.ping()
+            breaker = CircuitBreaker(
+                client.ping,
+                name = 'rate-limiter',
+                failure_threshold = 1,
+                slow_call_seconds = float(os.getenv('BRACKET_REDIS_SLOW_CALL_SECONDS') or 0.25),
+                probe_interval = float(os.getenv('BRACKET_REDIS_PROBE_SECONDS') or 2.0),
+            )
+            bucket = RedisTokenBucket(client, local, breaker = breaker)
+        except Exception as exc:  # pragma: no cover - network dependent
+            logger.info('Spotify rate limiting is per process because Redis is unavailable: %s', exc)
+
+    # Background work may only spend tokens beyond this share of the burst.
+    reserve = burst * float(os.getenv('SPOTIFY_RATE_INTERACTIVE_SHARE') or 0.25)
+    return SpotifyRateLimiter(bucket, background_reserve = reserve)
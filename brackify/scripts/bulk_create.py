@@ -0,0 +1,77 @@
+"""Create many brackets in one run and write a manifest of their share URLs.
+
+    python -m brackify.scripts.bulk_create specs.csv --base-url https://brackify.example --output manifest.json
+
+Specs are a CSV file with playlist, size, order and bracket_name columns, or a JSON
+list of objects with the same keys. Brackets are written straight to the configured
+store, so they are served by any Brackify worker that shares it.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import csv
+import json
+import os
+import sys
+from brackify.creation import EXPIRATION_HOURS, BULK_FETCH_CONCURRENCY, create_brackets_bulk
+from brackify.spotify_client import TrackInfo, fetch_playlist_tracks, get_spotify_client
+from brackify.store import create_store_from_env
+
+
+def parse_args(argv: Any = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = 'Create many Brackify brackets from a spec file.')
+    parser.add_argument('specs', help = 'CSV or JSON file of bracket specs, or - for JSON on stdin.')
+    parser.add_argument('--base-url', default = os.getenv('BRACKIFY_BASE_URL', 'http://localhost:8000'), help = 'Public URL used for share links.')
+    parser.add_argument('--concurrency', type = int, default = BULK_FETCH_CONCURRENCY, help = f'Playlists to fetch in parallel (default: {BULK_FETCH_CONCURRENCY}).')
+    parser.add_argument('--page-concurrency', type = int, default = 4, help = 'Pages to fetch in parallel per playlist (default: 4).')
+    parser.add_argument('--output', help = 'Write the manifest as JSON to this path instead of stdout.')
+
+    return parser.parse_args(argv)
+
+
+def load_specs(path: str) -> List[Dict[str, Any]]:
+    if path == '-':
+        return json.load(sys.stdin)
+
+    with open(path, encoding = 'utf-8', newline = '') as handle:
+        if path.lower().endswith('.csv'):
+            return list(csv.DictReader(handle))
+
+        return json.load(handle)
+
+
+def main(argv: Any = None) -> int:
+    args = parse_args(argv)
+    specs = load_specs(args.specs)
+    base_url = args.base_url.rstrip('/')
+    ttl_seconds = int(os.getenv('BRACKET_EXPIRATION_HOURS', EXPIRATION_HOURS)) * 3600
+
+    def _fetch(playlist: str, max_tracks: Optional[int]) -> List[TrackInfo]:
+        sp = get_spotify_client()
+        if max_tracks is not None:
+            return fetch_playlist_tracks(playlist, sp, max_tracks = max_tracks)
+
+        return fetch_playlist_tracks(playlist, sp, concurrency = args.page_concurrency)
+
+    entries = create_brackets_bulk(
+        specs,
+        create_store_from_env(),
+        _fetch,
+        lambda bracket_id: f'{base_url}/bracket/{bracket_id}',
+        ttl_seconds,
+        concurrency = args.concurrency,
+    )
+
+    manifest = json.dumps(entries, indent = 2)
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as handle:
+            handle.write(manifest + '\n')
+    else:
+        print(manifest)
+
+    failed = [entry for entry in entries if entry['status'] == 'error']
+    print(f'{len(entries) - len(failed)} brackets ready, {len(failed)} failed', file = sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,7 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description = 'Fetch tracks from a Spotify playlist.')
     parser.add_argument('playlist', help = 'Spotify playlist URL or ID.')
     parser.add_argument('--limit', type = int, default = 100, help = 'Page size for playlist fetches (default: 100).')
+    parser.add_argument('--concurrency', type = int, default = 4, help = 'Pages to fetch in parallel (default: 4).')
 
     return parser.parse_args()
 
@@ -14,7 +15,7 @@ def main() -> None:
     args = parse_args()
 
     sp = get_spotify_client()
-    tracks = fetch_playlist_tracks(args.playlist, sp, limit = args.limit)
+    tracks = fetch_playlist_tracks(args.playlist, sp, limit = args.limit, concurrency = args.concurrency)
 
     print(f'Found {len(tracks)} tracks')
     for row in tracks:
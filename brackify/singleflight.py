@@ -0,0 +1,45 @@
+from typing import Callable, Dict, Generic, Tuple, TypeVar
+from concurrent.futures import Future
+import threading
+
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls that share a key onto a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is still
+    running block on the same future and receive its result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, 'Future[T]'] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        result, _ = self.do_shared(key, fn)
+        return result
+
+    def do_shared(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+        return result, False
@@ -1,5 +1,10 @@
-from typing import List, TypedDict, Optional, TYPE_CHECKING, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, TypedDict, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
 import os
+import random
+import threading
+import time
+from brackify import metrics, ratelimit
 
 try:  # pragma: no cover - optional convenience helper
     from dotenv import load_dotenv
@@ -7,14 +12,27 @@ except ImportError:  # pragma: no cover - dotenv is optional
     load_dotenv = None
 
 try:  # pragma: no cover - dependency presence is environment-specific
+    import requests  # type: ignore
     import spotipy  # type: ignore
+    from spotipy.cache_handler import MemoryCacheHandler  # type: ignore
     from spotipy.oauth2 import SpotifyClientCredentials  # type: ignore
+    from urllib3.util.retry import Retry  # type: ignore
 except ImportError:  # pragma: no cover - handled gracefully at runtime
+    requests = None
     spotipy = None
+    MemoryCacheHandler = None
     SpotifyClientCredentials = None
+    Retry = None
 
 if TYPE_CHECKING:  # pragma: no cover
     import spotipy as spotipy_type
+    from brackify.playlist_cache import PlaylistTrackCache
+
+
+class ImageInfo(TypedDict):
+    url: str
+    width: Optional[int]
+    height: Optional[int]
 
 
 class TrackInfo(TypedDict):
@@ -23,9 +41,37 @@ class TrackInfo(TypedDict):
     artists: str
     album_name: str
     image_url: Optional[str]
+    images: List[ImageInfo]
     preview_url: Optional[str]
 
 
+class PlaylistPage(TypedDict):
+    offset: int
+    total: int
+    tracks: List[TrackInfo]
+    last: bool
+
+
+class PlaylistTracks(List[TrackInfo]):
+    """Fetched tracks plus the playlist length Spotify reported on the first page.
+
+    complete is True only when the list holds every track in the playlist.
+    """
+
+    def __init__(self, tracks: Sequence[TrackInfo] = (), total: int = 0, complete: bool = False) -> None:
+        super().__init__(tracks)
+        self.total = total
+        self.complete = complete
+
+
+PLAYLIST_ITEM_FIELDS = 'items(added_at,track(id,name,preview_url,album(name,images(url,width,height)),artists(name))),next,total'
+RATE_LIMIT_RETRIES = 5
+# Bracket covers render at 80 CSS px; 160 keeps them sharp on high-density screens.
+THUMBNAIL_MIN_PX = 160
+MAX_RETRY_AFTER_SECONDS = 30.0
+PLAYLIST_NOT_FOUND = 'Playlist not found. Check the link and make sure the playlist is public.'
+
+
 def extract_playlist_id(inp: str) -> str:
     s = inp.strip()
 
@@ -36,68 +82,581 @@ def extract_playlist_id(inp: str) -> str:
     return s
 
 
-def get_spotify_client() -> 'spotipy_type.Spotify':
-    if spotipy is None or SpotifyClientCredentials is None:
-        raise RuntimeError('spotipy is required to talk to the Spotify API. Install it with pip install spotipy.')
+class SpotifySettings(TypedDict):
+    client_id: Optional[str]
+    client_secret: Optional[str]
+    pool_size: int
+    requests_timeout: float
+    token_refresh_margin: int
+    fetch_concurrency: int
 
+
+def load_spotify_settings() -> SpotifySettings:
     if load_dotenv is not None:
         load_dotenv()
 
-    client_id = os.getenv('SPOTIFY_CLIENT_ID')
-    client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
+    return {
+        'client_id': os.getenv('SPOTIFY_CLIENT_ID'),
+        'client_secret': os.getenv('SPOTIFY_CLIENT_SECRET'),
+        'pool_size': int(os.getenv('SPOTIFY_POOL_SIZE', 10)),
+        'requests_timeout': float(os.getenv('SPOTIFY_REQUESTS_TIMEOUT', 5)),
+        'token_refresh_margin': int(os.getenv('SPOTIFY_TOKEN_REFRESH_MARGIN', 300)),
+        'fetch_concurrency': int(os.getenv('SPOTIFY_FETCH_CONCURRENCY', 4)),
+    }
+
+
+class RefreshingTokenManager:
+    """Thread-safe access token cache that renews ahead of expiry."""
+
+    def __init__(self, credentials: Any, refresh_margin: int = 300) -> None:
+        self._credentials = credentials
+        self._refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self.refreshes = 0
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self._refresh_margin
+
+    def get_access_token(self, as_dict: bool = False) -> str:
+        if self._is_fresh():
+            return self._token  # type: ignore[return-value]
+
+        with self._lock:
+            if not self._is_fresh():
+                with metrics.timed('spotify_token_seconds', stage = 'token'):
+                    token = self._credentials.get_access_token(as_dict = False, check_cache = False)
+                token_info = self._credentials.cache_handler.get_cached_token() or {}
+                self._token = token
+                self._expires_at = float(token_info.get('expires_at') or time.time() + 3600)
+                self.refreshes += 1
+
+            return self._token  # type: ignore[return-value]
+
+
+class SpotifyClientManager:
+    """Owns one pooled spotipy client per worker process."""
+
+    def __init__(self, settings: SpotifySettings) -> None:
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._client: Optional['spotipy_type.Spotify'] = None
+        self._session: Any = None
+        self._tokens: Optional[RefreshingTokenManager] = None
+        self._clients_built = 0
+
+    @classmethod
+    def from_env(cls) -> 'SpotifyClientManager':
+        return cls(load_spotify_settings())
+
+    def _build_session(self) -> Any:
+        session = requests.Session()
+        retry = Retry(
+            total = 3,
+            connect = None,
+            read = False,
+            allowed_methods = frozenset(['GET', 'POST']),
+            status = 3,
+            backoff_factor = 0.3,
+            # 429s are left to the playlist fetchers, which honour Retry-After themselves.
+            status_forcelist = (500, 502, 503, 504),
+        )
+        pool_size = max(1, self.settings['pool_size'])
+        adapter = requests.adapters.HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size, max_retries = retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        return session
+
+    def _build(self) -> None:
+        if spotipy is None or SpotifyClientCredentials is None:
+            raise RuntimeError('spotipy is required to talk to the Spotify API. Install it with pip install spotipy.')
+
+        client_id = self.settings['client_id']
+        client_secret = self.settings['client_secret']
+
+        if not client_id or not client_secret:
+            raise RuntimeError('SPOTIFY_CLIENT_ID or SPOTIFY_CLIENT_SECRET is missing from the environment.')
+
+        session = self._build_session()
+        credentials = SpotifyClientCredentials(
+            client_id = client_id,
+            client_secret = client_secret,
+            requests_session = session,
+            requests_timeout = self.settings['requests_timeout'],
+            cache_handler = MemoryCacheHandler(),
+        )
+        tokens = RefreshingTokenManager(credentials, refresh_margin = self.settings['token_refresh_margin'])
+
+        self._session = session
+        self._tokens = tokens
+        self._client = spotipy.Spotify(
+            auth_manager = tokens,
+            requests_session = session,
+            requests_timeout = self.settings['requests_timeout'],
+        )
+        self._pid = os.getpid()
+        self._clients_built += 1
+
+    def client(self) -> 'spotipy_type.Spotify':
+        # A forked worker must not share sockets with its parent, so rebuild per pid.
+        if self._client is not None and self._pid == os.getpid():
+            return self._client
+
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._build()
+
+            return self._client  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, int]:
+        requests_sent = 0
+        connections_opened = 0
+
+        if self._session is not None:
+            for adapter in set(self._session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+
+                    requests_sent += pool.num_requests
+                    connections_opened += pool.num_connections
+
+        return {
+            'clients_built': self._clients_built,
+            'token_refreshes': self._tokens.refreshes if self._tokens else 0,
+            'http_requests': requests_sent,
+            'http_connections_opened': connections_opened,
+            'http_connections_reused': max(0, requests_sent - connections_opened),
+        }
+
+
+_client_manager: Optional[SpotifyClientManager] = None
+_client_manager_lock = threading.Lock()
+
+
+def get_client_manager() -> SpotifyClientManager:
+    global _client_manager
+
+    if _client_manager is None:
+        with _client_manager_lock:
+            if _client_manager is None:
+                _client_manager = SpotifyClientManager.from_env()
+
+    return _client_manager
+
+
+def get_spotify_client() -> 'spotipy_type.Spotify':
+    return get_client_manager().client()
+
+
+_rate_limiter: Optional[ratelimit.SpotifyRateLimiter] = None
+_rate_limiter_loaded = False
+
+
+def get_rate_limiter() -> Optional[ratelimit.SpotifyRateLimiter]:
+    global _rate_limiter, _rate_limiter_loaded
+
+    if not _rate_limiter_loaded:
+        with _client_manager_lock:
+            if not _rate_limiter_loaded:
+                _rate_limiter = ratelimit.create_rate_limiter_from_env()
+                _rate_limiter_loaded = True
+
+    return _rate_limiter
+
+
+def pick_image(images: Sequence[ImageInfo], min_px: int = THUMBNAIL_MIN_PX) -> Optional[str]:
+    """URL of the smallest image at least min_px wide, or the largest one if none is.
+
+    Images without a width are treated as full size.
+    """
+
+    if not images:
+        return None
+
+    by_width = sorted(images, key = lambda image: image.get('width') or 1 << 16)
+    for image in by_width:
+        if (image.get('width') or 1 << 16) >= min_px:
+            return image['url']
+
+    return by_width[-1]['url']
+
+
+def _track_info(item: Dict[str, Any]) -> Optional[TrackInfo]:
+    s = item.get('track')
+    if not s:
+        return None
+
+    images: List[ImageInfo] = [
+        {'url': image['url'], 'width': image.get('width'), 'height': image.get('height')}
+        for image in ((s.get('album') or {}).get('images') or [])
+        if image.get('url')
+    ]
+    track_id = s.get('id')
+    song_name = s.get('name')
+    album_name = (s.get('album') or {}).get('name')
+    artists = [a.get('name') for a in (s.get('artists') or []) if a.get('name')]
+    preview_url = s.get('preview_url')
+
+    return {
+        'track_id': track_id,
+        'song_name': song_name,
+        'artists': ', '.join(artists),
+        'album_name': album_name,
+        'image_url': pick_image(images),
+        'images': images,
+        'preview_url': preview_url,
+    }
+
+
+def spotify_error(status: Optional[int]) -> Exception:
+    """The error both the spotipy and httpx paths raise once a Spotify request has failed for good.
+
+    A 404 is the caller's mistake and becomes a ValueError; anything else, including a
+    network failure (status None), is a RuntimeError.
+    """
+
+    if status == 404:
+        return ValueError(PLAYLIST_NOT_FOUND)
+
+    reason = f'status {status}' if status else 'a network error'
+    return RuntimeError(f'Spotify request failed with {reason}. Please try again shortly.')
+
+
+def _retry_after_seconds(exc: Exception, attempt: int) -> Optional[float]:
+    if getattr(exc, 'http_status', None) != 429:
+        return None
+
+    headers = getattr(exc, 'headers', None) or {}
+    try:
+        delay = float(headers.get('Retry-After') or headers.get('retry-after'))
+    except (TypeError, ValueError):
+        delay = 0.5 * (2 ** attempt)
+
+    return min(max(delay, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+def _call_with_backoff(call: Callable[..., Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+    attempt = 0
+    endpoint = getattr(call, '__name__', 'call')
+    limiter = get_rate_limiter()
+
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            with metrics.timed('spotify_call_seconds', stage = 'spotify', endpoint = endpoint):
+                return call(**kwargs)
+        except Exception as exc:
+            status = getattr(exc, 'http_status', None)
+            metrics.inc('spotify_errors_total', endpoint = endpoint, status = str(status or 'error'))
+            if status == 429:
+                metrics.inc('spotify_rate_limited_total', endpoint = endpoint)
+
+            delay = _retry_after_seconds(exc, attempt)
+            if delay is not None and limiter is not None:
+                # Pause every caller sharing the bucket, not just this one.
+                limiter.penalize(delay)
+
+            if delay is None or attempt >= RATE_LIMIT_RETRIES:
+                # requests' connection errors are OSErrors; anything else is not Spotify's doing.
+                if status is not None or isinstance(exc, OSError):
+                    raise spotify_error(status) from exc
+                raise
 
-    if not client_id or not client_secret:
-        raise RuntimeError('SPOTIFY_CLIENT_ID or SPOTIFY_CLIENT_SECRET is missing from the environment.')
+            attempt += 1
+            if limiter is None:
+                time.sleep(delay)
 
-    auth = SpotifyClientCredentials(client_id = client_id, client_secret = client_secret)
 
-    return spotipy.Spotify(auth_manager = auth)
+def _request_page(sp: Any, pid: str, offset: int, limit: int) -> Dict[str, Any]:
+    return _call_with_backoff(
+        sp.playlist_items,
+        playlist_id = pid,
+        offset = offset,
+        limit = limit,
+        fields = PLAYLIST_ITEM_FIELDS,
+        additional_types = ['track'],
+    )
 
 
-def fetch_playlist_tracks(inp: str, sp: Any, limit: int = 100) -> List[TrackInfo]:
+def fetch_playlist_snapshot(inp: str, sp: Any) -> Tuple[str, int]:
+    """Return the playlist's snapshot_id and track total without fetching any items."""
+
     pid = extract_playlist_id(inp)
+    res = _call_with_backoff(sp.playlist, playlist_id = pid, fields = 'snapshot_id,tracks.total')
 
-    res: List[TrackInfo] = []
-    offset = 0
+    return res.get('snapshot_id') or '', int((res.get('tracks') or {}).get('total') or 0)
+
+
+def _page_tracks(page: Dict[str, Any]) -> List[TrackInfo]:
+    return [t for t in (_track_info(item) for item in page.get('items', [])) if t]
+
+
+def iter_playlist_pages(inp: str, sp: Any, limit: int = 100, max_tracks: Optional[int] = None) -> Iterator[PlaylistPage]:
+    """Yield playlist tracks one API page at a time, stopping once max_tracks are seen."""
 
     if limit <= 0:
         raise ValueError('limit must be a positive integer')
 
+    pid = extract_playlist_id(inp)
+    offset = 0
+    seen = 0
+
     while True:
-        page = sp.playlist_items(
-            playlist_id = pid,
-            offset = offset,
-            limit = limit,
-            fields = 'items(added_at,track(id,name,preview_url,album(name,images(url)),artists(name))),next,total',
-            additional_types = ['track'],
-        )
+        # Never ask for more rows than the caller still needs.
+        page_limit = limit if max_tracks is None else max(1, min(limit, max_tracks - seen))
+        page = _request_page(sp, pid, offset, page_limit)
+
+        page_tracks = _page_tracks(page)
+        tracks = page_tracks if max_tracks is None else page_tracks[:max_tracks - seen]
+        last = not page.get('next') and len(tracks) == len(page_tracks)
 
-        items = page.get('items', [])
-        for item in items:
-            s = item.get('track')
-            if not s:
-                continue
-
-            images = ((s.get('album') or {}).get('images') or [])
-            image_url = images[0]['url'] if images else None
-            track_id = s.get('id')
-            song_name = s.get('name')
-            album_name = (s.get('album') or {}).get('name')
-            artists = [a.get('name') for a in (s.get('artists') or []) if a.get('name')]
-            preview_url = s.get('preview_url')
-
-            res.append({
-                'track_id': track_id,
-                'song_name': song_name,
-                'artists': ', '.join(artists),
-                'album_name': album_name,
-                'image_url': image_url,
-                'preview_url': preview_url,
-            })
-
-        if not page.get('next'):
+        seen += len(tracks)
+        yield {'offset': offset, 'total': int(page.get('total') or 0), 'tracks': tracks, 'last': last}
+
+        if not page.get('next') or (max_tracks is not None and seen >= max_tracks):
             break
 
-        offset += limit
+        offset += page_limit
+
+
+def fetch_playlist_tracks(
+    inp: str,
+    sp: Any,
+    limit: int = 100,
+    max_tracks: Optional[int] = None,
+    concurrency: int = 1,
+    sample_size: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    cache: Optional['PlaylistTrackCache'] = None,
+) -> PlaylistTracks:
+    if cache is not None:
+        return _fetch_with_cache(inp, sp, cache, limit, max_tracks, concurrency, sample_size, rng)
+
+    if sample_size is not None:
+        return fetch_playlist_sample(inp, sp, sample_size, rng = rng, limit = limit, concurrency = concurrency)
+
+    if concurrency > 1 and max_tracks is None:
+        return fetch_playlist_tracks_concurrently(inp, sp, limit = limit, concurrency = concurrency)
+
+    res = PlaylistTracks()
+
+    for page in iter_playlist_pages(inp, sp, limit = limit, max_tracks = max_tracks):
+        if page['offset'] == 0:
+            res.total = page['total']
+
+        res.extend(page['tracks'])
+        res.complete = page['last']
 
     return res
+
+
+def fetch_playlist_tracks_concurrently(inp: str, sp: Any, limit: int = 100, concurrency: int = 4) -> PlaylistTracks:
+    """Fetch a whole playlist, requesting every page after the first in parallel."""
+
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+
+    pid = extract_playlist_id(inp)
+    first = _request_page(sp, pid, 0, limit)
+    total = int(first.get('total') or 0)
+    res = PlaylistTracks(_page_tracks(first), total = total, complete = True)
+
+    if not first.get('next'):
+        return res
+
+    # The first page tells us the size, so every remaining offset is known up front.
+    offsets = list(range(limit, total, limit))
+    if not offsets:
+        return res
+
+    workers = max(1, min(concurrency, len(offsets)))
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        for page in pool.map(ratelimit.carry(lambda offset: _request_page(sp, pid, offset, limit)), offsets):
+            res.extend(_page_tracks(page))
+
+    return res
+
+
+def _offset_spans(offsets: Sequence[int], limit: int) -> List[Tuple[int, int, Set[int]]]:
+    """Group wanted offsets by page as (start, count, wanted), asking only for the span each page needs."""
+
+    spans: Dict[int, List[int]] = {}
+    for offset in offsets:
+        spans.setdefault(offset // limit, []).append(offset)
+
+    return [(min(group), max(group) - min(group) + 1, set(group)) for group in spans.values()]
+
+
+def _span_tracks(page: Dict[str, Any], start: int, wanted: Set[int]) -> Dict[int, Optional[TrackInfo]]:
+    return {start + i: _track_info(item) for i, item in enumerate(page.get('items', [])) if start + i in wanted}
+
+
+class _OffsetSample:
+    """Offset draws and bookkeeping for sampling a playlist, shared by the sync and async fetchers.
+
+    Callers alternate draw(), which returns the offsets still to fetch, and add() with
+    what those offsets held, until done. Empty offsets (local files, removed tracks)
+    are redrawn.
+    """
+
+    def __init__(self, first: Dict[str, Any], total: int, sample_size: int, rng: random.Random) -> None:
+        self.total = total
+        self.sample_size = sample_size
+        self.rng = rng
+        self.known: Dict[int, Optional[TrackInfo]] = {i: _track_info(item) for i, item in enumerate(first.get('items', []))}
+        self.chosen: Set[int] = set()
+        self.picked: Dict[int, TrackInfo] = {}
+        self._draw: List[int] = []
+
+    @property
+    def done(self) -> bool:
+        return len(self.picked) >= self.sample_size or len(self.chosen) >= self.total
+
+    def draw(self) -> List[int]:
+        needed = self.sample_size - len(self.picked)
+
+        if self.total - len(self.chosen) <= needed:
+            draw = [offset for offset in range(self.total) if offset not in self.chosen]
+        else:
+            draw = []
+            while len(draw) < needed:
+                offset = self.rng.randrange(self.total)
+                if offset not in self.chosen:
+                    self.chosen.add(offset)
+                    draw.append(offset)
+
+        self.chosen.update(draw)
+        self._draw = draw
+        return [offset for offset in draw if offset not in self.known]
+
+    def add(self, found: Dict[int, Optional[TrackInfo]]) -> None:
+        self.known.update(found)
+        for offset in self._draw:
+            track = self.known.get(offset)
+            if track:
+                self.picked[offset] = track
+
+    def result(self) -> PlaylistTracks:
+        return PlaylistTracks([self.picked[offset] for offset in sorted(self.picked)], total = self.total)
+
+
+def _fetch_offsets(sp: Any, pid: str, offsets: Sequence[int], limit: int, concurrency: int) -> Dict[int, Optional[TrackInfo]]:
+    requests_to_make = _offset_spans(offsets, limit)
+
+    def _fetch(span: Any) -> Dict[int, Optional[TrackInfo]]:
+        start, count, wanted = span
+        return _span_tracks(_request_page(sp, pid, start, count), start, wanted)
+
+    found: Dict[int, Optional[TrackInfo]] = {offset: None for offset in offsets}
+    workers = max(1, min(concurrency, len(requests_to_make)))
+
+    if workers == 1:
+        for span in requests_to_make:
+            found.update(_fetch(span))
+    else:
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            for result in pool.map(ratelimit.carry(_fetch), requests_to_make):
+                found.update(result)
+
+    return found
+
+
+def fetch_playlist_sample(
+    inp: str,
+    sp: Any,
+    sample_size: int,
+    rng: Optional[random.Random] = None,
+    limit: int = 100,
+    concurrency: int = 1,
+) -> PlaylistTracks:
+    """Uniformly sample tracks, fetching only the spans that hold the chosen offsets.
+
+    Offsets are drawn from the first page's total, so memory and request count depend
+    on sample_size rather than on playlist length. Offsets that turn out to be empty
+    (local files, removed tracks) are redrawn. Results are returned in playlist order.
+    """
+
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+
+    if rng is None:
+        rng = random.Random()
+
+    pid = extract_playlist_id(inp)
+    first = _request_page(sp, pid, 0, limit)
+    total = int(first.get('total') or 0)
+
+    if not first.get('next'):
+        tracks = _page_tracks(first)
+        return PlaylistTracks(_sample_tracks(tracks, sample_size, rng), total = total, complete = len(tracks) <= sample_size)
+
+    sample = _OffsetSample(first, total, sample_size, rng)
+    while not sample.done:
+        missing = sample.draw()
+        sample.add(_fetch_offsets(sp, pid, missing, limit, concurrency) if missing else {})
+
+    return sample.result()
+
+
+def _sample_tracks(tracks: Sequence[TrackInfo], sample_size: int, rng: Optional[random.Random]) -> List[TrackInfo]:
+    if len(tracks) <= sample_size:
+        return list(tracks)
+
+    keep = sorted((rng or random.Random()).sample(range(len(tracks)), sample_size))
+    return [tracks[i] for i in keep]
+
+
+def _fetch_with_cache(
+    inp: str,
+    sp: Any,
+    cache: 'PlaylistTrackCache',
+    limit: int,
+    max_tracks: Optional[int],
+    concurrency: int,
+    sample_size: Optional[int],
+    rng: Optional[random.Random],
+) -> PlaylistTracks:
+    pid = extract_playlist_id(inp)
+    snapshot_id, total = fetch_playlist_snapshot(pid, sp)
+    entry = cache.get(pid, snapshot_id) if snapshot_id else None
+
+    if entry is not None:
+        cached = entry['tracks']
+        if sample_size is not None and entry['complete']:
+            return PlaylistTracks(_sample_tracks(cached, sample_size, rng), total = entry['total'])
+
+        if sample_size is None and max_tracks is not None and (entry['complete'] or len(cached) >= max_tracks):
+            return PlaylistTracks(cached[:max_tracks], total = entry['total'], complete = entry['complete'] and len(cached) <= max_tracks)
+
+        if sample_size is None and max_tracks is None and entry['complete']:
+            return PlaylistTracks(cached, total = entry['total'], complete = True)
+
+    if sample_size is not None:
+        if total > cache.full_fetch_limit:
+            # Too large to keep whole; sampling remotely is cheaper than caching.
+            return fetch_playlist_sample(pid, sp, sample_size, rng = rng, limit = limit, concurrency = concurrency)
+
+        tracks = fetch_playlist_tracks_concurrently(pid, sp, limit = limit, concurrency = max(1, concurrency))
+        cache.put(pid, snapshot_id, tracks, tracks.total, tracks.complete)
+        return PlaylistTracks(_sample_tracks(tracks, sample_size, rng), total = tracks.total)
+
+    tracks = fetch_playlist_tracks(pid, sp, limit = limit, max_tracks = max_tracks, concurrency = concurrency)
+    cache.put(pid, snapshot_id, tracks, tracks.total, tracks.complete)
+    return tracks
+
+
+def playlist_total(tracks: Sequence[TrackInfo]) -> int:
+    """Playlist size as reported by Spotify, falling back to the fetched count."""
+
+    if isinstance(tracks, PlaylistTracks) and tracks.total:
+        return tracks.total
+
+    return len(tracks)
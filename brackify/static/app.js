@@ -12,6 +12,11 @@ const closeShareButton = document.getElementById('close-share');
 const resetButton = document.getElementById('reset-bracket');
 const bracketId = document.body?.dataset?.bracketId;
 const featuredBracketButton = document.getElementById('featured-bracket');
+const imageProxy = document.body?.dataset?.imageProxy === '1';
+const COVER_PX = 80;
+// Brackets larger than this are shown one region (or the finals) at a time.
+const FULL_VIEW_MAX_SEEDS = 64;
+const REGION_SEEDS = 32;
 let shareLink = '';
 let bracketName = '';
 
@@ -23,6 +28,9 @@ let previewSourceRef = null;
 let previewUrlRef = null;
 let initialSeeds = [];
 let shareCopyText = '';
+let lastSubmittedPicks = '';
+let currentView = 'all';
+let regionNavEl = null;
 
 async function parseJsonResponse(response) {
   const rawText = await response.text();
@@ -84,7 +92,12 @@ if (resetButton) {
 }
 
 if (bracketId) {
-  hydrateBracket(bracketId);
+  const inlined = readInlineBracket();
+  if (inlined) {
+    showBracket(inlined);
+  } else {
+    hydrateBracket(bracketId);
+  }
 }
 
 window.addEventListener('resize', () => {
@@ -127,6 +140,13 @@ async function handleFormSubmit(event) {
       throw new Error(data.error || 'Failed to build bracket');
     }
 
+    if (res.status === 202 && data.job_url) {
+      setStatus('Building your bracket...');
+      const job = await waitForJob(data.job_url);
+      window.location.href = job.share_url;
+      return;
+    }
+
     if (data.share_url) {
       window.location.href = data.share_url;
       return;
@@ -136,6 +156,62 @@ async function handleFormSubmit(event) {
   }
 }
 
+async function waitForJob(jobUrl) {
+  let delay = 500;
+
+  for (;;) {
+    await new Promise((resolve) => setTimeout(resolve, delay));
+    delay = Math.min(delay * 1.5, 3000);
+
+    const res = await fetch(jobUrl, {cache: 'no-store'});
+    const job = await parseJsonResponse(res);
+
+    if (!res.ok) {
+      throw new Error(job.error || 'Failed to build bracket');
+    }
+
+    if (job.status === 'done') {
+      return job;
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to build bracket');
+    }
+  }
+}
+
+function readInlineBracket() {
+  const dataEl = document.getElementById('bracket-data');
+  const rawText = (dataEl?.textContent || '').trim();
+
+  if (!rawText) {
+    return null;
+  }
+
+  try {
+    return JSON.parse(rawText);
+  } catch (error) {
+    return null;
+  }
+}
+
+function showBracket(data) {
+  updateShareLink(data.share_url);
+  bracketName = (data.bracket_name || '').trim();
+
+  // Seeded payloads store the seed table only; older ones store seeds in slot order.
+  const seeds = data.seeds || [];
+  const slots = data.layout === 'seeded' ? seedOrder(seeds.length).map((index) => seeds[index] || null) : seeds;
+  initializeBracket(slots);
+
+  const missing = (data.seeds || []).filter((s) => !s).length;
+  if (missing > 0) {
+    setStatus(`Only ${data.total_tracks} tracks available. ${missing} slot(s) left empty.`);
+  } else {
+    setStatus('Bracket ready. Click a song to advance it forward.');
+  }
+}
+
 async function hydrateBracket(id) {
   setStatus('Loading bracket...');
 
@@ -147,16 +223,7 @@ async function hydrateBracket(id) {
       throw new Error(data.error || 'Could not load bracket');
     }
 
-    updateShareLink(data.share_url);
-    bracketName = (data.bracket_name || '').trim();
-    initializeBracket(data.seeds || []);
-
-    const missing = (data.seeds || []).filter((s) => !s).length;
-    if (missing > 0) {
-      setStatus(`Only ${data.total_tracks} tracks available. ${missing} slot(s) left empty.`);
-    } else {
-      setStatus('Bracket ready. Click a song to advance it forward.');
-    }
+    showBracket(data);
   } catch (error) {
     setStatus(error.message, true);
     if (bracketEl) {
@@ -238,11 +305,20 @@ function trackKey(track) {
   return track.track_id || `${track.song_name}-${track.album_name}-${track.artists}`;
 }
 
+function seedOrder(size) {
+  // Slot order for a seed table: 1 v N, then 2 v N-1 in the opposite half, and so on.
+  let order = [0];
+  while (order.length < size) {
+    const count = order.length * 2;
+    order = order.flatMap((seed) => [seed, count - 1 - seed]);
+  }
+  return order;
+}
+
 function initializeBracket(seeds) {
   finalWinnerId = null;
   bracketState = [];
   initialSeeds = (seeds || []).map((s) => (s ? {...s} : null));
-  setBracketScrollState(Array.isArray(seeds) ? seeds.length : 0);
   hideShareModal();
   stopPreview();
 
@@ -255,9 +331,85 @@ function initializeBracket(seeds) {
     bracketState.push(Array.from({length: matchCount}, () => [null, null]));
   }
 
+  // A track without an opponent has a bye and moves straight to the next round.
+  if (bracketState[1]) {
+    matches.forEach(([first, second], matchIndex) => {
+      if (Boolean(first) !== Boolean(second)) {
+        bracketState[1][Math.floor(matchIndex / 2)][matchIndex % 2] = first || second;
+      }
+    });
+  }
+
+  currentView = (seeds || []).length > FULL_VIEW_MAX_SEEDS ? 0 : 'all';
+  renderRegionNav();
   renderBracket();
 }
 
+function regionRoundCount() {
+  return Math.log2(REGION_SEEDS);
+}
+
+function visibleRounds() {
+  if (currentView === 'all') {
+    return bracketState.map((round, roundIndex) => ({roundIndex, start: 0, end: round.length}));
+  }
+
+  const regionRounds = regionRoundCount();
+  if (currentView === 'finals') {
+    return bracketState
+      .map((round, roundIndex) => ({roundIndex, start: 0, end: round.length}))
+      .filter(({roundIndex}) => roundIndex >= regionRounds);
+  }
+
+  // Region k owns a contiguous block of matches in each of its rounds.
+  return bracketState.slice(0, regionRounds).map((_, roundIndex) => {
+    const perRegion = (REGION_SEEDS / 2) >> roundIndex;
+    return {roundIndex, start: currentView * perRegion, end: (currentView + 1) * perRegion};
+  });
+}
+
+function regionWinner(regionIndex) {
+  const nextRound = bracketState[regionRoundCount()];
+  return nextRound ? nextRound[Math.floor(regionIndex / 2)][regionIndex % 2] : null;
+}
+
+function renderRegionNav() {
+  if (!bracketEl) return;
+
+  const regionCount = currentView === 'all' ? 0 : bracketState[0].length * 2 / REGION_SEEDS;
+  if (regionCount === 0) {
+    if (regionNavEl) {
+      regionNavEl.remove();
+      regionNavEl = null;
+    }
+    return;
+  }
+
+  if (!regionNavEl) {
+    regionNavEl = document.createElement('nav');
+    regionNavEl.className = 'region-nav';
+    regionNavEl.setAttribute('aria-label', 'Bracket regions');
+    bracketEl.parentNode.insertBefore(regionNavEl, bracketEl);
+  }
+
+  regionNavEl.innerHTML = '';
+  const views = [...Array.from({length: regionCount}, (_, index) => index), 'finals'];
+  views.forEach((view) => {
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.textContent = view === 'finals' ? 'Finals' : `Region ${view + 1}`;
+    button.classList.toggle('active', view === currentView);
+    button.classList.toggle('complete', view === 'finals' ? Boolean(finalWinnerId) : Boolean(regionWinner(view)));
+    button.setAttribute('aria-pressed', view === currentView ? 'true' : 'false');
+    button.addEventListener('click', () => {
+      currentView = view;
+      renderRegionNav();
+      renderBracket();
+    });
+    regionNavEl.appendChild(button);
+  });
+}
+
 function chunkMatches(seeds) {
   if (!seeds || seeds.length === 0) {
     return [];
@@ -314,6 +466,7 @@ function handlePick(roundIndex, matchIndex, slotIndex) {
     renderBracket();
     launchConfetti();
     showShareModal(choice);
+    submitPicks(roundIndex, matchIndex, choice);
     return;
   }
 
@@ -330,7 +483,7 @@ function handlePick(roundIndex, matchIndex, slotIndex) {
     return;
   }
 
-  if (!opponent) {
+  if (!opponent && roundIndex > 0) {
     setStatus('Two songs are required for this matchup.');
     return;
   }
@@ -339,40 +492,90 @@ function handlePick(roundIndex, matchIndex, slotIndex) {
   clearDownstream(nextRoundIndex, targetMatch);
 
   setStatus('');
+  if (currentView !== 'all') {
+    renderRegionNav();
+  }
   renderBracket();
 }
 
+function collectPicks() {
+  const picks = [];
+
+  // A track in round r, match m, slot s won match 2m + s of round r - 1.
+  for (let roundIndex = 1; roundIndex < bracketState.length; roundIndex += 1) {
+    bracketState[roundIndex].forEach((matchup, matchIndex) => {
+      matchup.forEach((track, slotIndex) => {
+        if (track?.track_id) {
+          picks.push({round: roundIndex - 1, match: matchIndex * 2 + slotIndex, track_id: track.track_id});
+        }
+      });
+    });
+  }
+
+  return picks;
+}
+
+async function submitPicks(finalRound, finalMatch, champion) {
+  if (!bracketId || !champion?.track_id) return;
+
+  const picks = collectPicks();
+  picks.push({round: finalRound, match: finalMatch, track_id: champion.track_id});
+  const body = JSON.stringify({picks, champion: champion.track_id});
+
+  if (body === lastSubmittedPicks) return;
+  lastSubmittedPicks = body;
+
+  try {
+    const res = await fetch(`/api/bracket/${encodeURIComponent(bracketId)}/picks`, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body,
+    });
+
+    if (!res.ok) return;
+
+    const results = await parseJsonResponse(await fetch(`/api/bracket/${encodeURIComponent(bracketId)}/results`));
+    const total = results.submissions || 0;
+    const votes = (results.champions || {})[champion.track_id] || 0;
+
+    if (total > 0 && finalWinnerId === trackKey(champion)) {
+      const share = Math.round((votes / total) * 100);
+      setStatus(`${champion.song_name} wins the bracket! ${share}% of ${total} bracket(s) picked it too.`);
+    }
+  } catch (error) {
+    lastSubmittedPicks = '';
+  }
+}
+
 function renderBracket() {
   if (!bracketEl) return;
 
-  const totalRounds = bracketState.length;
-  if (totalRounds === 0) {
+  if (bracketState.length === 0) {
     bracketEl.innerHTML = '';
     return;
   }
 
+  // Only the current view is built, so a 1024-seed bracket renders at most one region's matches.
+  const rounds = visibleRounds();
+  setBracketScrollState((rounds[0].end - rounds[0].start) * 2);
+
   const leftColumns = [];
   const rightColumns = [];
   let finalColumn = null;
 
-  bracketState.forEach((round, roundIndex) => {
+  rounds.forEach(({roundIndex, start, end}, position) => {
+    const round = bracketState[roundIndex];
     const label = roundLabel(roundIndex);
-    if (roundIndex === totalRounds - 1) {
-      finalColumn = {
-        roundIndex,
-        label,
-        matches: round.map((match, idx) => ({match, matchIndex: idx})),
-        final: true,
-      };
+    const entries = round.slice(start, end).map((match, idx) => ({match, matchIndex: start + idx}));
+
+    if (position === rounds.length - 1) {
+      finalColumn = {roundIndex, label, matches: entries, final: true};
       return;
     }
 
-    const midpoint = round.length / 2;
-    const leftMatches = round.slice(0, midpoint).map((match, idx) => ({match, matchIndex: idx}));
-    const rightMatches = round.slice(midpoint).map((match, idx) => ({match, matchIndex: idx + midpoint}));
-
-    leftColumns.push({roundIndex, label, matches: leftMatches});
-    rightColumns.unshift({roundIndex, label, matches: rightMatches});
+    const midpoint = entries.length / 2;
+    leftColumns.push({roundIndex, label, matches: entries.slice(0, midpoint)});
+    rightColumns.unshift({roundIndex, label, matches: entries.slice(midpoint)});
   });
 
   const columns = [...leftColumns, finalColumn, ...rightColumns].filter(Boolean);
@@ -386,7 +589,7 @@ function renderBracket() {
     roundEl.dataset.roundIndex = roundIndex;
 
     const labelEl = document.createElement('h3');
-    labelEl.textContent = column.final ? 'Final' : column.label;
+    labelEl.textContent = column.label;
     roundEl.appendChild(labelEl);
 
     column.matches.forEach(({match, matchIndex}) => {
@@ -443,6 +646,30 @@ function renderBracket() {
   applyBracketLayout();
 }
 
+function spotifyImageId(url) {
+  const match = /^https:\/\/i\.scdn\.co\/image\/([0-9a-f]{16,64})$/.exec(url || '');
+  return match ? match[1] : null;
+}
+
+function applyCoverSource(img, track) {
+  const imageId = imageProxy ? spotifyImageId(track.image_url) : null;
+
+  if (imageId) {
+    img.src = `/cover/${imageId}?w=${COVER_PX * 2}`;
+    img.srcset = `/cover/${imageId}?w=${COVER_PX} 1x, /cover/${imageId}?w=${COVER_PX * 2} 2x`;
+    return;
+  }
+
+  img.src = track.image_url;
+
+  // Let the browser pick the smallest Spotify rendition that covers the slot.
+  const sized = (track.images || []).filter((image) => image.url && image.width);
+  if (sized.length > 1) {
+    img.srcset = sized.map((image) => `${image.url} ${image.width}w`).join(', ');
+    img.sizes = `${COVER_PX}px`;
+  }
+}
+
 function renderCover(track) {
   const wrapper = document.createElement('div');
   wrapper.className = 'cover-wrapper';
@@ -451,8 +678,13 @@ function renderCover(track) {
   img.className = 'cover';
   const fallback = 'data:image/svg+xml;utf8,<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 80 80"><rect width="80" height="80" rx="12" fill="%23f2f2f2"/><text x="40" y="46" text-anchor="middle" font-size="26" fill="%23888888" font-family="Helvetica, Arial, sans-serif">♪</text></svg>';
 
+  img.width = COVER_PX;
+  img.height = COVER_PX;
+  img.decoding = 'async';
+  img.loading = 'lazy';
+
   if (track && track.image_url) {
-    img.src = track.image_url;
+    applyCoverSource(img, track);
   } else {
     img.src = fallback;
   }
@@ -586,7 +818,7 @@ function launchConfetti() {
 }
 
 function calculateColumnCount() {
-  const totalRounds = bracketState.length;
+  const totalRounds = bracketState.length === 0 ? 0 : visibleRounds().length;
   if (totalRounds === 0) return 0;
 
   // Each non-final round renders as a left and right column, plus one final column.
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import heapq
 import json
 import logging
 import os
+import re
+import secrets
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from brackify import metrics
+from brackify.breaker import CircuitBreaker
+from brackify.codecs import BracketCodec, CodecError, CorruptPayload, codec_from_env
+from brackify.hashring import HashRing
 
 logger = logging.getLogger(__name__)
 
@@ -18,45 +30,316 @@ class BracketStore:
     def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
         raise NotImplementedError
 
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        """Write several (key, payload, ttl_seconds) entries together."""
+        for bracket_id, payload, ttl_seconds in items:
+            self.save(bracket_id, payload, ttl_seconds)
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        return [self.get(bracket_id) for bracket_id in bracket_ids]
+
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        """Reset the TTL of existing entries without rewriting them."""
+        raise NotImplementedError
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        """Read entries and reset their TTL in the same operation."""
+        raise NotImplementedError
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Read an entry together with its remaining lifetime in seconds."""
+        raise NotImplementedError
+
+    def touch(self, bracket_id: str, ttl_seconds: int) -> bool:
+        return self.touch_many([bracket_id], ttl_seconds)[0]
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        """Atomically add to named counters without reading them back first."""
+        raise NotImplementedError
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        """Take a short exclusive lease, returning a release token or None if already held."""
+        raise NotImplementedError
+
+    def release_lease(self, name: str, token: str) -> None:
+        raise NotImplementedError
+
+    def lease_held(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        """A fresh ID for the bracket created for signature_key."""
+        return secrets.token_urlsafe(8)
+
 
 class InMemoryBracketStore(BracketStore):
-    """Simple TTL-aware in-memory store for development and tests."""
+    """TTL-aware in-memory store with optional LRU bounds.
+
+    Entries are evicted least-recently-used first once max_entries or max_bytes is
+    exceeded. Expiry times are kept in a heap so expired entries can be reclaimed
+    without scanning, either on access or by a background sweeper thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: Optional[float] = None,
+    ) -> None:
+        self._store: OrderedDict[str, tuple[Dict[str, Any], float, int]] = OrderedDict()
+        self._expiry_heap: List[tuple[float, str]] = []
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._leases: Dict[str, tuple[str, float]] = {}
+        self._lease_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+
+        if sweep_interval:
+            self.start_sweeper(sweep_interval)
+
+    def _entry_size(self, payload: Dict[str, Any]) -> int:
+        if not self.max_bytes:
+            return 0
+
+        return len(json.dumps(payload, separators=(",", ":"), default=str))
+
+    def _remove(self, bracket_id: str) -> None:
+        record = self._store.pop(bracket_id, None)
+        if record:
+            self._bytes -= record[2]
+
+    def _evict_over_budget(self) -> None:
+        while self._store and (
+            (self.max_entries is not None and len(self._store) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._store))
+            self._remove(oldest)
+            self._evictions += 1
 
-    def __init__(self) -> None:
-        self._store: Dict[str, tuple[Dict[str, Any], float]] = {}
+    def _compact_heap(self) -> None:
+        # Re-saves leave stale heap entries behind; rebuild once they dominate the heap.
+        if len(self._expiry_heap) > 2 * len(self._store) + 64:
+            self._expiry_heap = [(expires_at, key) for key, (_, expires_at, _) in self._store.items()]
+            heapq.heapify(self._expiry_heap)
 
     def save(self, bracket_id: str, payload: Dict[str, Any], ttl_seconds: int) -> None:
-        if ttl_seconds <= 0:
-            self._store.pop(bracket_id, None)
-            return
+        with self._lock:
+            self._remove(bracket_id)
 
-        expires_at = time.time() + ttl_seconds
-        self._store[bracket_id] = (payload, expires_at)
+            if ttl_seconds <= 0:
+                return
+
+            expires_at = time.time() + ttl_seconds
+            size = self._entry_size(payload)
+            self._store[bracket_id] = (payload, expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, bracket_id))
+
+            self._evict_over_budget()
+            self._compact_heap()
 
     def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
-        record = self._store.get(bracket_id)
-        if not record:
-            return None
+        with self._lock:
+            record = self._store.get(bracket_id)
+            if not record:
+                self._misses += 1
+                return None
+
+            payload, expires_at, _ = record
+            if time.time() > expires_at:
+                self._remove(bracket_id)
+                self._expirations += 1
+                self._misses += 1
+                return None
 
-        payload, expires_at = record
-        if time.time() > expires_at:
-            self._store.pop(bracket_id, None)
+            self._store.move_to_end(bracket_id)
+            self._hits += 1
+            return payload
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        with self._lock:
+            for bracket_id, payload, ttl_seconds in items:
+                self.save(bracket_id, payload, ttl_seconds)
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        with self._lock:
+            return [self.get(bracket_id) for bracket_id in bracket_ids]
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        with self._lock:
+            payload = self.get(bracket_id)
+            if payload is None:
+                return None, 0
+
+            return payload, max(0, int(self._store[bracket_id][1] - time.time()))
+
+    def _touch(self, bracket_id: str, ttl_seconds: int) -> Optional[Dict[str, Any]]:
+        payload = self.get(bracket_id)
+        if payload is None or ttl_seconds <= 0:
+            if payload is not None:
+                self._remove(bracket_id)
             return None
 
+        _, _, size = self._store[bracket_id]
+        expires_at = time.time() + ttl_seconds
+        self._store[bracket_id] = (payload, expires_at, size)
+        heapq.heappush(self._expiry_heap, (expires_at, bracket_id))
+        self._compact_heap()
+
         return payload
 
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        with self._lock:
+            return [self._touch(bracket_id, ttl_seconds) is not None for bracket_id in bracket_ids]
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        with self._lock:
+            return [self._touch(bracket_id, ttl_seconds) for bracket_id in bracket_ids]
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        with self._lock:
+            counts = dict(self.get(name) or {})
+            for field, amount in increments.items():
+                counts[field] = counts.get(field, 0) + amount
+
+            self.save(name, counts, ttl_seconds)
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.get(name) or {})
+
+    def sweep(self) -> int:
+        """Drop every expired entry, returning how many were reclaimed."""
+
+        now = time.time()
+        removed = 0
+
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry_heap)
+                record = self._store.get(key)
+                if record and record[1] == expires_at:
+                    self._remove(key)
+                    removed += 1
+
+            self._expirations += removed
+
+        return removed
+
+    def start_sweeper(self, interval: float) -> None:
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        self._sweeper_stop.clear()
+
+        def _run() -> None:
+            while not self._sweeper_stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception:  # pragma: no cover - defensive, keep sweeping
+                    logger.exception("In-memory store sweep failed")
+
+        self._sweeper = threading.Thread(target=_run, name="bracket-store-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+            self._sweeper = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        with self._lease_lock:
+            current = self._leases.get(name)
+            if current and current[1] > time.time():
+                return None
+
+            token = secrets.token_hex(8)
+            self._leases[name] = (token, time.time() + ttl_seconds)
+            return token
+
+    def release_lease(self, name: str, token: str) -> None:
+        with self._lease_lock:
+            current = self._leases.get(name)
+            if current and current[0] == token:
+                self._leases.pop(name, None)
+
+    def lease_held(self, name: str) -> bool:
+        with self._lease_lock:
+            current = self._leases.get(name)
+            return bool(current and current[1] > time.time())
+
 
 class RedisBracketStore(BracketStore):
     """Redis-backed store using key expiry for TTL handling."""
 
-    def __init__(self, url: str, key_prefix: str = "bracket:") -> None:
-        try:
-            import redis  # type: ignore
-        except ImportError as exc:  # pragma: no cover - handled by dependency management
-            raise RuntimeError("redis library is required for RedisBracketStore") from exc
+    # Delete the lease only if we still own it, so a slow leader cannot drop a newer lease.
+    _RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
-        self._client = redis.Redis.from_url(url, decode_responses=False)
+    def __init__(
+        self,
+        url: str,
+        key_prefix: str = "bracket:",
+        client: Any = None,
+        codec: Optional[BracketCodec] = None,
+    ) -> None:
+        if client is None:
+            try:
+                import redis  # type: ignore
+            except ImportError as exc:  # pragma: no cover - handled by dependency management
+                raise RuntimeError("redis library is required for RedisBracketStore") from exc
+
+            # A bounded pool whose callers wait at most pool_timeout, and socket timeouts, so a
+            # slow Redis turns into quick errors for the breaker rather than piled-up threads.
+            pool = redis.BlockingConnectionPool.from_url(
+                url,
+                max_connections=int(os.getenv("BRACKET_REDIS_MAX_CONNECTIONS") or 100),
+                timeout=float(os.getenv("BRACKET_REDIS_POOL_TIMEOUT") or 1.0),
+                **redis_timeouts_from_env(),
+            )
+            client = redis.Redis(connection_pool=pool)
+
+        self.url = url
+        self._client = client
         self._key_prefix = key_prefix
+        self._codec = codec or codec_from_env()
+        self._release_lease = self._client.register_script(self._RELEASE_SCRIPT)
 
         try:
             self._client.ping()
@@ -73,19 +356,496 @@ class RedisBracketStore(BracketStore):
             self._client.delete(key)
             return
 
-        self._client.set(key, json.dumps(payload), ex=max(1, ttl_seconds))
+        self._client.set(key, self._codec.encode(payload), ex=max(1, ttl_seconds))
 
     def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
-        raw = self._client.get(self._key(bracket_id))
+        return self._decode(bracket_id, self._client.get(self._key(bracket_id)))
+
+    def _decode(self, bracket_id: str, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
         if raw is None:
             return None
 
         try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
+            return self._codec.decode(raw)
+        except CodecError as exc:
+            # Possibly written by a newer worker, so it is left in place for readers that understand it.
+            logger.warning("Treating %s as missing: %s", bracket_id, exc)
+            return None
+        except CorruptPayload:
             self._client.delete(self._key(bracket_id))
             return None
 
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        # MULTI/EXEC: one round trip, and readers never see only part of the batch.
+        pipe = self._client.pipeline(transaction=True)
+        for bracket_id, payload, ttl_seconds in items:
+            key = self._key(bracket_id)
+            if ttl_seconds <= 0:
+                pipe.delete(key)
+            else:
+                pipe.set(key, self._codec.encode(payload), ex=max(1, ttl_seconds))
+
+        pipe.execute()
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        if not bracket_ids:
+            return []
+
+        raws = self._client.mget([self._key(bracket_id) for bracket_id in bracket_ids])
+        return [self._decode(bracket_id, raw) for bracket_id, raw in zip(bracket_ids, raws)]
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        key = self._key(bracket_id)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        raw, ttl = pipe.execute()
+
+        payload = self._decode(bracket_id, raw)
+        if payload is None:
+            return None, 0
+
+        return payload, max(0, int(ttl or 0))
+
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        pipe = self._client.pipeline(transaction=False)
+        for bracket_id in bracket_ids:
+            pipe.expire(self._key(bracket_id), max(1, ttl_seconds))
+
+        return [bool(result) for result in pipe.execute()]
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        pipe = self._client.pipeline(transaction=False)
+        for bracket_id in bracket_ids:
+            pipe.getex(self._key(bracket_id), ex=max(1, ttl_seconds))
+
+        return [self._decode(bracket_id, raw) for bracket_id, raw in zip(bracket_ids, pipe.execute())]
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        key = self._key(name)
+        pipe = self._client.pipeline(transaction=True)
+        for field, amount in increments.items():
+            pipe.hincrby(key, field, amount)
+        pipe.expire(key, max(1, ttl_seconds))
+        pipe.execute()
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        raw = self._client.hgetall(self._key(name))
+        return {field.decode("utf-8") if isinstance(field, bytes) else field: int(value) for field, value in raw.items()}
+
+    def _lease_key(self, name: str) -> str:
+        return f"{self._key_prefix}lease:{name}"
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        token = secrets.token_hex(8)
+        acquired = self._client.set(self._lease_key(name), token, nx=True, ex=max(1, ttl_seconds))
+        return token if acquired else None
+
+    def release_lease(self, name: str, token: str) -> None:
+        self._release_lease(keys=[self._lease_key(name)], args=[token])
+
+    def lease_held(self, name: str) -> bool:
+        return bool(self._client.exists(self._lease_key(name)))
+
+    def ping(self) -> bool:
+        return bool(self._client.ping())
+
+
+class ShardedBracketStore(BracketStore):
+    """Spreads keys over several stores (normally one Redis node each) with a hash ring.
+
+    Bracket IDs from new_bracket_id start with a short tag derived from the signature
+    they were created for, and a key is placed by that tag when it has one. A bracket
+    and its signature mapping therefore always share a node, so the save_many that
+    publishes them stays one MULTI/EXEC. Other keys are placed by their own hash.
+    Batch operations make one call per shard involved.
+    """
+
+    TAG_LENGTH = 3
+    _TAGGED_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+    def __init__(self, shards: Sequence[Tuple[str, BracketStore]], vnodes: int = 160) -> None:
+        self.ring: HashRing[BracketStore] = HashRing(shards, vnodes=vnodes)
+
+    @classmethod
+    def tag(cls, key: str) -> str:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=3).digest()
+        return base64.urlsafe_b64encode(digest).decode("ascii")[: cls.TAG_LENGTH]
+
+    def routing_token(self, key: str) -> str:
+        # Bracket IDs carry their tag up front; everything else, signature keys included, is tagged by hash.
+        if self._TAGGED_ID.match(key):
+            return key[: self.TAG_LENGTH]
+
+        return self.tag(key)
+
+    def shard_for(self, key: str) -> BracketStore:
+        return self.ring.node_for(self.routing_token(key))
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.tag(signature_key) + secrets.token_urlsafe(6)
+
+    def _group(self, keys: Sequence[str]) -> Dict[int, List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(self.ring.index_for(self.routing_token(key)), []).append(index)
+
+        return groups
+
+    def _per_shard(self, keys: Sequence[str], call: Callable[[BracketStore, List[str]], List[Any]]) -> List[Any]:
+        results: List[Any] = [None] * len(keys)
+        for shard_index, indexes in self._group(keys).items():
+            values = call(self.ring.nodes[shard_index], [keys[index] for index in indexes])
+            for index, value in zip(indexes, values):
+                results[index] = value
+
+        return results
+
+    def save(self, bracket_id: str, payload: Dict[str, Any], ttl_seconds: int) -> None:
+        self.shard_for(bracket_id).save(bracket_id, payload, ttl_seconds)
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        # Shards are written in the order their first item appears, so a bracket written
+        # to a different shard than a mapping listed after it still lands first.
+        for shard_index, indexes in self._group([item[0] for item in items]).items():
+            self.ring.nodes[shard_index].save_many([items[index] for index in indexes])
+
+    def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        return self.shard_for(bracket_id).get(bracket_id)
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        return self._per_shard(bracket_ids, lambda shard, keys: shard.get_many(keys))
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return self.shard_for(bracket_id).get_with_ttl(bracket_id)
+
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        return self._per_shard(bracket_ids, lambda shard, keys: shard.touch_many(keys, ttl_seconds))
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        return self._per_shard(bracket_ids, lambda shard, keys: shard.get_and_touch_many(keys, ttl_seconds))
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        self.shard_for(name).increment_counts(name, increments, ttl_seconds)
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        return self.shard_for(name).get_counts(name)
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return self.shard_for(name).acquire_lease(name, ttl_seconds)
+
+    def release_lease(self, name: str, token: str) -> None:
+        self.shard_for(name).release_lease(name, token)
+
+    def lease_held(self, name: str) -> bool:
+        return self.shard_for(name).lease_held(name)
+
+    def ping(self) -> bool:
+        return all(getattr(shard, "ping", lambda: True)() for shard in self.ring.nodes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shards": self.ring.names}
+
+
+class ResilientBracketStore(BracketStore):
+    """Runs every call against a primary store through a circuit breaker.
+
+    When a call fails, or the breaker is open because the primary keeps failing or
+    answering slowly, the call is served by a local fallback store instead. Brackets
+    written while degraded live only in this worker. Reads that miss the primary also
+    check the fallback, so they stay readable after the primary recovers, until they
+    expire.
+    """
+
+    def __init__(self, primary: BracketStore, fallback: BracketStore, breaker: CircuitBreaker) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker
+
+    def _call(self, op: str, *args: Any) -> Any:
+        try:
+            return self.breaker.call(lambda: getattr(self.primary, op)(*args))
+        except Exception as exc:
+            metrics.inc("store_degraded_calls_total", op=op)
+            logger.debug("Serving %s from the fallback store: %s", op, exc)
+            return getattr(self.fallback, op)(*args)
+
+    @property
+    def degraded(self) -> bool:
+        return self.breaker.state != "closed"
+
+    def save(self, bracket_id: str, payload: Dict[str, Any], ttl_seconds: int) -> None:
+        self._call("save", bracket_id, payload, ttl_seconds)
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        self._call("save_many", items)
+
+    def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        payload = self._call("get", bracket_id)
+        return payload if payload is not None else self.fallback.get(bracket_id)
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        payloads = self._call("get_many", bracket_ids)
+        return [payload if payload is not None else self.fallback.get(bracket_id) for bracket_id, payload in zip(bracket_ids, payloads)]
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        payload, ttl = self._call("get_with_ttl", bracket_id)
+        return (payload, ttl) if payload is not None else self.fallback.get_with_ttl(bracket_id)
+
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        return self._call("touch_many", bracket_ids, ttl_seconds)
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        payloads = self._call("get_and_touch_many", bracket_ids, ttl_seconds)
+        if all(payload is not None for payload in payloads):
+            return payloads
+
+        local = self.fallback.get_and_touch_many(bracket_ids, ttl_seconds)
+        return [payload if payload is not None else other for payload, other in zip(payloads, local)]
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        self._call("increment_counts", name, increments, ttl_seconds)
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        return self._call("get_counts", name)
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return self._call("acquire_lease", name, ttl_seconds)
+
+    def release_lease(self, name: str, token: str) -> None:
+        # A lease taken while degraded was taken locally; releasing an unknown token is a no-op on both.
+        self._call("release_lease", name, token)
+        self.fallback.release_lease(name, token)
+
+    def lease_held(self, name: str) -> bool:
+        return self._call("lease_held", name)
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.primary.new_bracket_id(signature_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.stats(), "fallback": getattr(self.fallback, "stats", dict)()}
+
+
+class LayeredBracketStore(BracketStore):
+    """A bounded in-process L1 cache in front of a shared store such as Redis.
+
+    Reads are served from the L1 while an entry is fresh. An entry is kept for at most
+    l1_ttl_seconds and never past the expiry the backend reported for it, so the L1 can
+    only forget an entry early, never serve one the backend has already expired. Writes
+    go through to the backend. When a pub/sub client is given, written keys are
+    broadcast so other workers drop their copies straight away; without one, another
+    worker's write is picked up within l1_ttl_seconds.
+    """
+
+    # Job records change while clients poll them, so they are always read from the backend.
+    UNCACHED_PREFIXES = ("job:", "job-signature:")
+
+    def __init__(
+        self,
+        backend: BracketStore,
+        l1: Optional[InMemoryBracketStore] = None,
+        l1_ttl_seconds: float = 30,
+        pubsub_client: Any = None,
+        channel: str = "brackify:l1-invalidate",
+    ) -> None:
+        self.backend = backend
+        self.l1 = l1 or InMemoryBracketStore(max_entries=1024)
+        self.l1_ttl_seconds = l1_ttl_seconds
+        self._client = pubsub_client
+        self._channel = channel
+        self._node = secrets.token_hex(8)
+        # Bumped on every remote invalidation; a backend read that raced one is not cached.
+        self._generation = 0
+        self._listener: Optional[threading.Thread] = None
+        self._listener_stop = threading.Event()
+
+        if pubsub_client is not None:
+            self._start_listener()
+
+    def _cacheable(self, key: str) -> bool:
+        return not key.startswith(self.UNCACHED_PREFIXES)
+
+    def _remember(self, key: str, payload: Optional[Dict[str, Any]], ttl_seconds: float, generation: Optional[int] = None) -> None:
+        if payload is None or ttl_seconds <= 0 or not self._cacheable(key):
+            return
+
+        if generation is not None and generation != self._generation:
+            return
+
+        l1_ttl = int(min(ttl_seconds, self.l1_ttl_seconds))
+        if l1_ttl > 0:
+            self.l1.save(key, {"payload": payload, "expires_at": time.time() + ttl_seconds}, l1_ttl)
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.l1.get(key)
+        metrics.inc("l1_lookups_total", result="hit" if entry else "miss")
+        return entry
+
+    def _forget(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self.l1.save(key, {}, 0)
+
+    def _publish(self, keys: Sequence[str]) -> None:
+        if self._client is None or not keys:
+            return
+
+        try:
+            self._client.publish(self._channel, json.dumps({"node": self._node, "keys": list(keys)}))
+        except Exception as exc:  # pragma: no cover - network dependent
+            logger.warning("Could not publish L1 invalidation: %s", exc)
+
+    def save(self, bracket_id: str, payload: Dict[str, Any], ttl_seconds: int) -> None:
+        self.save_many([(bracket_id, payload, ttl_seconds)])
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any], int]]) -> None:
+        self.backend.save_many(items)
+        for bracket_id, payload, ttl_seconds in items:
+            self._forget([bracket_id])
+            self._remember(bracket_id, payload, ttl_seconds)
+
+        self._publish([bracket_id for bracket_id, _, _ in items])
+
+    def get(self, bracket_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_with_ttl(bracket_id)[0]
+
+    def get_with_ttl(self, bracket_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        entry = self._cached(bracket_id)
+        if entry:
+            return entry["payload"], max(0, int(entry["expires_at"] - time.time()))
+
+        generation = self._generation
+        payload, ttl_seconds = self.backend.get_with_ttl(bracket_id)
+        self._remember(bracket_id, payload, ttl_seconds, generation)
+        return payload, ttl_seconds
+
+    def get_many(self, bracket_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        results: List[Optional[Dict[str, Any]]] = []
+        missing: List[int] = []
+        for index, bracket_id in enumerate(bracket_ids):
+            entry = self._cached(bracket_id)
+            results.append(entry["payload"] if entry else None)
+            if not entry:
+                missing.append(index)
+
+        # Batch reads do not report a TTL, so misses are returned without being cached.
+        if missing:
+            for index, payload in zip(missing, self.backend.get_many([bracket_ids[index] for index in missing])):
+                results[index] = payload
+
+        return results
+
+    def touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[bool]:
+        # A longer backend TTL only makes the cached expiry conservative, so the L1 stays as is.
+        return self.backend.touch_many(bracket_ids, ttl_seconds)
+
+    def get_and_touch_many(self, bracket_ids: Sequence[str], ttl_seconds: int) -> List[Optional[Dict[str, Any]]]:
+        generation = self._generation
+        payloads = self.backend.get_and_touch_many(bracket_ids, ttl_seconds)
+        for bracket_id, payload in zip(bracket_ids, payloads):
+            self._remember(bracket_id, payload, ttl_seconds, generation)
+
+        return payloads
+
+    def increment_counts(self, name: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        self.backend.increment_counts(name, increments, ttl_seconds)
+
+    def get_counts(self, name: str) -> Dict[str, int]:
+        return self.backend.get_counts(name)
+
+    def acquire_lease(self, name: str, ttl_seconds: int) -> Optional[str]:
+        return self.backend.acquire_lease(name, ttl_seconds)
+
+    def release_lease(self, name: str, token: str) -> None:
+        self.backend.release_lease(name, token)
+
+    def lease_held(self, name: str) -> bool:
+        return self.backend.lease_held(name)
+
+    def new_bracket_id(self, signature_key: str) -> str:
+        return self.backend.new_bracket_id(signature_key)
+
+    def handle_invalidation(self, message: Any) -> None:
+        """Drop the keys named in an invalidation message published by another worker."""
+
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return
+
+        if data.get("node") == self._node:
+            return
+
+        self._generation += 1
+        self._forget(data.get("keys") or [])
+
+    def _start_listener(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel)
+
+        def _run() -> None:
+            while not self._listener_stop.is_set():
+                try:
+                    message = pubsub.get_message(timeout=1.0)
+                except Exception as exc:  # pragma: no cover - network dependent
+                    # Messages may have been missed, so nothing cached so far can be trusted.
+                    logger.warning("L1 invalidation listener failed: %s", exc)
+                    self._generation += 1
+                    self.l1.clear()
+                    self._listener_stop.wait(1.0)
+                    continue
+
+                if message and message.get("type") == "message":
+                    self.handle_invalidation(message.get("data"))
+
+            pubsub.close()
+
+        self._listener = threading.Thread(target=_run, name="brackify-l1-invalidation", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._listener_stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+            self._listener = None
+
+    @property
+    def degraded(self) -> bool:
+        return bool(getattr(self.backend, "degraded", False))
+
+    def stats(self) -> Dict[str, Any]:
+        backend_stats = getattr(self.backend, "stats", None)
+        return {"l1": self.l1.stats(), **({"backend": backend_stats()} if backend_stats else {})}
+
+
+def _optional_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+
+    value = int(raw)
+    return value if value > 0 else None
+
+
+def redis_timeouts_from_env() -> Dict[str, float]:
+    """Socket timeouts shared by the sync and async Redis clients."""
+
+    return {
+        "socket_timeout": float(os.getenv("BRACKET_REDIS_SOCKET_TIMEOUT") or 0.5),
+        "socket_connect_timeout": float(os.getenv("BRACKET_REDIS_CONNECT_TIMEOUT") or 1.0),
+    }
+
+
+def create_memory_store_from_env() -> InMemoryBracketStore:
+    """Create a bounded in-memory store configured from environment variables."""
+
+    sweep = float(os.getenv("BRACKET_MEMORY_SWEEP_SECONDS") or 60)
+    return InMemoryBracketStore(
+        max_entries=_optional_int("BRACKET_MEMORY_MAX_ENTRIES", 10000),
+        max_bytes=_optional_int("BRACKET_MEMORY_MAX_BYTES", 256 * 1024 * 1024),
+        sweep_interval=sweep if sweep > 0 else None,
+    )
+
 
 def create_store_from_env() -> BracketStore:
     """Create a store based on environment variables, falling back to memory."""
@@ -93,11 +853,58 @@ def create_store_from_env() -> BracketStore:
     backend = (os.getenv("BRACKET_STORE_BACKEND") or "").lower()
     redis_url = os.getenv("BRACKET_REDIS_URL") or os.getenv("REDIS_URL")
 
-    if backend == "redis" or redis_url:
-        url = redis_url or "redis://localhost:6379/0"
+    shard_urls = [url.strip() for url in (os.getenv("BRACKET_REDIS_URLS") or "").split(",") if url.strip()]
+
+    if len(shard_urls) > 1:
         try:
-            return RedisBracketStore(url)
+            shards = [(url, RedisBracketStore(url)) for url in shard_urls]
         except Exception:
+            metrics.inc("store_fallbacks_total", backend="redis-sharded")
+            logger.info("Using InMemoryBracketStore because a Redis shard is unavailable.")
+        else:
+            sharded = ShardedBracketStore(shards, vnodes=int(os.getenv("BRACKET_REDIS_VNODES") or 160))
+            return _with_l1_from_env(_with_breaker_from_env(sharded), shards[0][1])
+
+    if backend == "redis" or redis_url or shard_urls:
+        url = redis_url or (shard_urls[0] if shard_urls else "redis://localhost:6379/0")
+        try:
+            store = RedisBracketStore(url)
+        except Exception:
+            metrics.inc("store_fallbacks_total", backend="redis")
             logger.info("Using InMemoryBracketStore due to Redis configuration issues.")
+        else:
+            return _with_l1_from_env(_with_breaker_from_env(store), store)
+
+    return create_memory_store_from_env()
+
+
+def _with_breaker_from_env(store: Any) -> BracketStore:
+    """Guard Redis with a circuit breaker and a local fallback unless BRACKET_REDIS_BREAKER=0."""
+
+    if (os.getenv("BRACKET_REDIS_BREAKER") or "1").lower() in ("0", "false", "no"):
+        return store
+
+    breaker = CircuitBreaker(
+        store.ping,
+        name="redis",
+        failure_threshold=int(os.getenv("BRACKET_REDIS_BREAKER_FAILURES") or 5),
+        slow_call_seconds=float(os.getenv("BRACKET_REDIS_SLOW_CALL_SECONDS") or 0.25),
+        probe_interval=float(os.getenv("BRACKET_REDIS_PROBE_SECONDS") or 2.0),
+    )
+    return ResilientBracketStore(store, create_memory_store_from_env(), breaker)
+
+
+def _with_l1_from_env(store: BracketStore, redis_store: RedisBracketStore) -> BracketStore:
+    """Put an in-process L1 in front of Redis when BRACKET_L1_MAX_ENTRIES is set."""
+
+    max_entries = _optional_int("BRACKET_L1_MAX_ENTRIES", None)
+    if not max_entries:
+        return store
 
-    return InMemoryBracketStore()
+    invalidation = (os.getenv("BRACKET_L1_INVALIDATION") or "pubsub").lower()
+    return LayeredBracketStore(
+        store,
+        l1=InMemoryBracketStore(max_entries=max_entries, max_bytes=_optional_int("BRACKET_L1_MAX_BYTES", 64 * 1024 * 1024)),
+        l1_ttl_seconds=float(os.getenv("BRACKET_L1_TTL_SECONDS") or 30),
+        pubsub_client=redis_store._client if invalidation == "pubsub" else None,
+    )
@@ -0,0 +1,209 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+from brackify.store import BracketStore
+
+
+VOTE_FLUSH_SECONDS = 1.0
+VOTE_MAX_PENDING = 500
+RESULTS_CACHE_SECONDS = 2.0
+
+
+def votes_key(bracket_id: str) -> str:
+    return f'votes:{bracket_id}'
+
+
+def tally_picks(picks: Any, champion: Any, slots: Sequence[Optional[str]]) -> Dict[str, int]:
+    """Validate one submission and turn it into counter increments.
+
+    Each pick names the round, the match within that round and the winning track.
+    `slots` holds the track ID in each first-round slot; match m of round r covers
+    slots [m * 2^(r+1), (m + 1) * 2^(r+1)), so a pick must be a track from that range,
+    and it must agree with the pick of the earlier match that track came through.
+    Fields are 'round:match:track_id', 'champion:track_id' and 'submissions'.
+    """
+
+    if not isinstance(picks, list):
+        raise ValueError('picks must be a list')
+
+    if champion is not None and not isinstance(champion, str):
+        raise ValueError('champion must be a track ID')
+
+    size = len(slots)
+    rounds = int(math.log2(size)) if size > 1 else 0
+    if len(picks) > max(0, size - 1):
+        raise ValueError('too many picks for this bracket')
+
+    positions: Dict[str, List[int]] = {}
+    for slot, track_id in enumerate(slots):
+        if track_id:
+            positions.setdefault(track_id, []).append(slot)
+
+    chosen: Dict[Tuple[int, int], Tuple[str, int]] = {}
+
+    for pick in picks:
+        if not isinstance(pick, dict):
+            raise ValueError('each pick must be an object')
+
+        try:
+            round_index = int(pick.get('round'))
+            match_index = int(pick.get('match'))
+        except (TypeError, ValueError):
+            raise ValueError('round and match must be integers')
+
+        track_id = pick.get('track_id')
+        if not isinstance(track_id, str):
+            raise ValueError('track_id must be a string')
+
+        if not 0 <= round_index < rounds or not 0 <= match_index < size >> (round_index + 1):
+            raise ValueError('pick refers to a match outside this bracket')
+
+        if (round_index, match_index) in chosen:
+            raise ValueError('each match can only be picked once')
+
+        span = 1 << (round_index + 1)
+        slot = next((slot for slot in positions.get(track_id, ()) if slot // span == match_index), None)
+        if slot is None:
+            raise ValueError('pick refers to a track that does not play in that match')
+
+        chosen[(round_index, match_index)] = (track_id, slot)
+
+    for (round_index, _), (track_id, slot) in chosen.items():
+        feeder = chosen.get((round_index - 1, slot >> round_index)) if round_index > 0 else None
+        if feeder is not None and feeder[0] != track_id:
+            raise ValueError('a pick must have won its previous match')
+
+    if champion is not None:
+        final = chosen.get((rounds - 1, 0))
+        if champion not in positions or (final is not None and final[0] != champion):
+            raise ValueError('champion must be the winner of the final')
+
+    increments: Dict[str, int] = {'submissions': 1}
+    for (round_index, match_index), (track_id, _) in chosen.items():
+        increments[f'{round_index}:{match_index}:{track_id}'] = 1
+
+    if champion is not None:
+        increments[f'champion:{champion}'] = 1
+
+    return increments
+
+
+def applied_counts(increments: Dict[str, int]) -> int:
+    """Number of pick and champion counters a submission adds to."""
+
+    return sum(1 for field in increments if field != 'submissions')
+
+
+def summarize_counts(counts: Dict[str, int]) -> Dict[str, Any]:
+    champions: Dict[str, int] = {}
+    matches: Dict[str, Dict[str, int]] = {}
+
+    for field, count in counts.items():
+        if field == 'submissions':
+            continue
+
+        if field.startswith('champion:'):
+            champions[field[len('champion:'):]] = count
+            continue
+
+        round_index, match_index, track_id = field.split(':', 2)
+        matches.setdefault(f'{round_index}:{match_index}', {})[track_id] = count
+
+    return {'submissions': counts.get('submissions', 0), 'champions': champions, 'matches': matches}
+
+
+class VoteAggregator:
+    """Coalesces pick tallies in-process and flushes them to the store in batches.
+
+    Increments for the same bracket are merged while pending, so a burst of votes
+    becomes one counter update per flush instead of one store write per vote.
+    """
+
+    def __init__(
+        self,
+        store: BracketStore,
+        flush_interval: float = VOTE_FLUSH_SECONDS,
+        max_pending: int = VOTE_MAX_PENDING,
+        results_ttl: float = RESULTS_CACHE_SECONDS,
+    ) -> None:
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.results_ttl = results_ttl
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[Dict[str, int], int]] = {}
+        self._pending_votes = 0
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target = self._run, name = 'vote-flusher', daemon = True)
+            self._flusher.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def record(self, bracket_id: str, increments: Dict[str, int], ttl_seconds: int) -> None:
+        with self._lock:
+            counts, _ = self._pending.get(bracket_id, ({}, 0))
+            for field, amount in increments.items():
+                counts[field] = counts.get(field, 0) + amount
+
+            self._pending[bracket_id] = (counts, ttl_seconds)
+            self._pending_votes += 1
+            self._results.pop(bracket_id, None)
+            full = self._pending_votes >= self.max_pending
+
+        if self._flusher is None:
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_votes = 0
+
+        for bracket_id, (counts, ttl_seconds) in pending.items():
+            self.store.increment_counts(votes_key(bracket_id), counts, ttl_seconds)
+
+        return len(pending)
+
+    def _pending_for(self, bracket_id: str) -> Dict[str, int]:
+        with self._lock:
+            counts, _ = self._pending.get(bracket_id, ({}, 0))
+            return dict(counts)
+
+    def results(self, bracket_id: str) -> Dict[str, Any]:
+        cached = self._results.get(bracket_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        counts = self.store.get_counts(votes_key(bracket_id))
+        # Include this worker's unflushed votes so a voter sees their own pick counted.
+        for field, amount in self._pending_for(bracket_id).items():
+            counts[field] = counts.get(field, 0) + amount
+
+        summary = summarize_counts(counts)
+        self._results[bracket_id] = (time.monotonic() + self.results_ttl, summary)
+
+        if len(self._results) > 4096:
+            now = time.monotonic()
+            self._results = {key: value for key, value in self._results.items() if value[0] > now}
+
+        return summary
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout = 1)
+        self.flush()
+
@@ -0,0 +1,258 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import functools
+import logging
+import os
+import threading
+import time
+from brackify import metrics, ratelimit
+from brackify.brackets import AllowedBracketSizes
+from brackify.playlist_cache import PlaylistTrackCache
+from brackify.spotify_client import extract_playlist_id, fetch_playlist_snapshot, fetch_playlist_tracks
+from brackify.store import BracketStore
+
+logger = logging.getLogger(__name__)
+
+WARMER_INTERVAL_SECONDS = 300
+WARMER_WINDOW_SECONDS = 3600
+WARMER_TOP_PLAYLISTS = 20
+WARMER_TOP_SIGNATURES = 200
+WARMER_MAX_CALLS = 50
+WARMER_MAX_SECONDS = 10.0
+WARMER_LEASE = 'warmer'
+
+
+class BudgetExhausted(Exception):
+    """Raised by the counting client once a cycle has used its Spotify calls."""
+
+
+class _CountingClient:
+    """Wraps a spotipy client and refuses calls beyond a budget.
+
+    Page fetches run on a thread pool, so the budget check and count share a lock.
+    """
+
+    def __init__(self, sp: Any, budget: int) -> None:
+        self._sp = sp
+        self.budget = budget
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._sp, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                if self.calls >= self.budget:
+                    raise BudgetExhausted()
+                self.calls += 1
+
+            return attr(*args, **kwargs)
+
+        return _call
+
+
+def counts_key(kind: str, window: int) -> str:
+    return f'warm:{kind}:{window}'
+
+
+class PlaylistWarmer:
+    """Keeps popular playlists and brackets warm in the background.
+
+    Requests are counted per worker and added to hourly counters in the store, so the
+    ranking covers every worker. Each cycle, one worker (whichever takes the store lease)
+    extends the TTL of the most requested brackets and refreshes the cached track lists
+    of the most requested and preloaded playlists. Refreshing runs as background
+    Spotify work and stops at max_calls Spotify calls or max_seconds, whichever comes
+    first. An unchanged playlist costs one snapshot call.
+    """
+
+    def __init__(
+        self,
+        store: BracketStore,
+        cache: Optional[PlaylistTrackCache],
+        client_factory: Callable[[], Any],
+        bracket_ttl_seconds: int,
+        interval: float = WARMER_INTERVAL_SECONDS,
+        window_seconds: int = WARMER_WINDOW_SECONDS,
+        top_playlists: int = WARMER_TOP_PLAYLISTS,
+        top_signatures: int = WARMER_TOP_SIGNATURES,
+        max_calls: int = WARMER_MAX_CALLS,
+        max_seconds: float = WARMER_MAX_SECONDS,
+        preload: Sequence[str] = (),
+        concurrency: int = 1,
+    ) -> None:
+        self.store = store
+        self.cache = cache
+        self.client_factory = client_factory
+        self.bracket_ttl_seconds = bracket_ttl_seconds
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.top_playlists = top_playlists
+        self.top_signatures = top_signatures
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.preload = _unique(extract_playlist_id(playlist) for playlist in preload)
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._playlists: Dict[str, int] = {}
+        self._signatures: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if interval > 0:
+            self._thread = threading.Thread(target = self._run, name = 'playlist-warmer', daemon = True)
+            self._thread.start()
+
+    @classmethod
+    def from_env(
+        cls,
+        store: BracketStore,
+        cache: Optional[PlaylistTrackCache],
+        client_factory: Callable[[], Any],
+        bracket_ttl_seconds: int,
+    ) -> Optional['PlaylistWarmer']:
+        preload = [playlist.strip() for playlist in (os.getenv('WARM_PLAYLISTS') or '').split(',') if playlist.strip()]
+        if os.getenv('BRACKIFY_WARMER', '').lower() not in ('1', 'true', 'yes') and not preload:
+            return None
+
+        return cls(
+            store,
+            cache,
+            client_factory,
+            bracket_ttl_seconds,
+            interval = float(os.getenv('WARMER_INTERVAL_SECONDS', WARMER_INTERVAL_SECONDS)),
+            top_playlists = int(os.getenv('WARMER_TOP_PLAYLISTS', WARMER_TOP_PLAYLISTS)),
+            top_signatures = int(os.getenv('WARMER_TOP_SIGNATURES', WARMER_TOP_SIGNATURES)),
+            max_calls = int(os.getenv('WARMER_MAX_CALLS', WARMER_MAX_CALLS)),
+            max_seconds = float(os.getenv('WARMER_MAX_SECONDS', WARMER_MAX_SECONDS)),
+            preload = preload,
+            concurrency = int(os.getenv('SPOTIFY_FETCH_CONCURRENCY', 4)),
+        )
+
+    def _run(self) -> None:
+        # The first cycle runs straight away so preloaded playlists are warm soon after startup.
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                logger.warning('Cache warming cycle failed: %s', exc)
+
+            self._stop.wait(self.interval)
+
+    def record(self, playlist: str, signature_key: str) -> None:
+        playlist_id = extract_playlist_id(playlist)
+        with self._lock:
+            self._playlists[playlist_id] = self._playlists.get(playlist_id, 0) + 1
+            self._signatures[signature_key] = self._signatures.get(signature_key, 0) + 1
+
+    def flush(self) -> None:
+        with self._lock:
+            playlists, self._playlists = self._playlists, {}
+            signatures, self._signatures = self._signatures, {}
+
+        window = int(time.time() // self.window_seconds)
+        ttl_seconds = 2 * self.window_seconds
+        if playlists:
+            self.store.increment_counts(counts_key('playlists', window), playlists, ttl_seconds)
+        if signatures:
+            self.store.increment_counts(counts_key('signatures', window), signatures, ttl_seconds)
+
+    def hot(self, kind: str, limit: int) -> List[str]:
+        """The most requested entries over the current and previous window."""
+
+        window = int(time.time() // self.window_seconds)
+        totals: Dict[str, int] = {}
+        for counts in (self.store.get_counts(counts_key(kind, window - 1)), self.store.get_counts(counts_key(kind, window))):
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+
+        return sorted(totals, key = lambda name: (-totals[name], name))[:limit]
+
+    def run_once(self) -> Dict[str, int]:
+        self.flush()
+
+        # Only one worker warms per interval; the others just contribute their counts.
+        if self.store.acquire_lease(WARMER_LEASE, max(1, int(self.interval))) is None:
+            return {'extended': 0, 'refreshed': 0, 'calls': 0}
+
+        extended = self._extend(self.hot('signatures', self.top_signatures))
+        refreshed, calls = self._refresh_all(_unique(self.preload + self.hot('playlists', self.top_playlists)))
+
+        metrics.inc('warmer_extended_total', extended)
+        metrics.inc('warmer_refreshed_total', refreshed)
+        metrics.inc('warmer_spotify_calls_total', calls)
+        return {'extended': extended, 'refreshed': refreshed, 'calls': calls}
+
+    def _extend(self, signature_keys: List[str]) -> int:
+        if not signature_keys:
+            return 0
+
+        mappings = self.store.get_many(signature_keys)
+        keys: List[str] = []
+        for signature_key, mapping in zip(signature_keys, mappings):
+            if mapping and mapping.get('bracket_id'):
+                keys.extend([mapping['bracket_id'], signature_key])
+
+        if not keys:
+            return 0
+
+        # Hot brackets and their mappings restart their lifetime, as a repeat request would.
+        touched = self.store.touch_many(keys, self.bracket_ttl_seconds)
+        return sum(1 for bracket_touched in touched[::2] if bracket_touched)
+
+    def _refresh_all(self, playlists: Iterable[str]) -> Tuple[int, int]:
+        if self.cache is None:
+            return 0, 0
+
+        sp = _CountingClient(self.client_factory(), self.max_calls)
+        deadline = time.monotonic() + self.max_seconds
+        refreshed = 0
+
+        with ratelimit.background():
+            for playlist in playlists:
+                if sp.calls >= self.max_calls or time.monotonic() > deadline:
+                    break
+
+                try:
+                    refreshed += self._refresh(sp, playlist)
+                except BudgetExhausted:
+                    break
+                except Exception as exc:
+                    logger.info('Could not warm playlist %s: %s', playlist, exc)
+
+        return refreshed, sp.calls
+
+    def _refresh(self, sp: Any, playlist_id: str) -> int:
+        cache: PlaylistTrackCache = self.cache  # type: ignore[assignment]
+        snapshot_id, total = fetch_playlist_snapshot(playlist_id, sp)
+        if not snapshot_id:
+            return 0
+
+        # Whole playlists serve both orders; larger ones keep enough leading tracks for any bracket.
+        wanted = total if total <= cache.full_fetch_limit else max(AllowedBracketSizes)
+        entry = cache.get(playlist_id, snapshot_id)
+        if entry is not None and (entry['complete'] or len(entry['tracks']) >= wanted):
+            cache.touch(playlist_id, snapshot_id)
+            return 0
+
+        max_tracks = None if total <= cache.full_fetch_limit else wanted
+        tracks = fetch_playlist_tracks(playlist_id, sp, max_tracks = max_tracks, concurrency = self.concurrency)
+        cache.put(playlist_id, snapshot_id, tracks, tracks.total, tracks.complete)
+        return 1
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout = 1)
+        self.flush()
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    seen: Dict[str, None] = {}
+    for item in items:
+        seen.setdefault(item, None)
+
+    return list(seen)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+import threading
 
 from brackify.app import EXPIRATION_HOURS, create_app, remaining_ttl_seconds
 
@@ -59,7 +60,7 @@ def test_bracket_creation_requires_name(monkeypatch):
     monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
     monkeypatch.setattr(
         'brackify.app.fetch_playlist_tracks',
-        lambda playlist, sp: [
+        lambda playlist, sp, **kwargs: [
             {
                 'track_id': str(i),
                 'song_name': f'Song {i}',
@@ -94,7 +95,7 @@ def test_reuses_existing_bracket_and_refreshes_timestamp(monkeypatch):
 
     monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
 
-    def _fetch(playlist, sp):
+    def _fetch(playlist, sp, **kwargs):
         fetch_calls['count'] += 1
         return _tracks()
 
@@ -140,7 +141,7 @@ def test_creates_new_bracket_when_existing_is_expired(monkeypatch):
 
     monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
 
-    def _fetch(playlist, sp):
+    def _fetch(playlist, sp, **kwargs):
         fetch_calls['count'] += 1
         return _tracks()
 
@@ -176,3 +177,455 @@ def test_creates_new_bracket_when_existing_is_expired(monkeypatch):
     assert new_payload['bracket_id'] != first_id
     assert app.bracket_store.get(first_id) is None
     assert fetch_calls['count'] == 2
+
+
+def test_playlist_order_only_fetches_needed_tracks(monkeypatch):
+    from brackify.spotify_client import PlaylistTracks
+
+    app = create_app()
+    client = app.test_client()
+    fetch_kwargs = {}
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+
+    def _fetch(playlist, sp, **kwargs):
+        fetch_kwargs.update(kwargs)
+        return PlaylistTracks(_tracks(16), total = 5000)
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', _fetch)
+
+    response = client.post('/api/bracket', json = {
+        'playlist': 'big-playlist',
+        'order': 'playlist',
+        'size': 16,
+        'bracket_name': 'Big bracket',
+    })
+
+    assert response.status_code == 200
+    assert fetch_kwargs['max_tracks'] == 16
+    assert response.get_json()['total_tracks'] == 5000
+
+
+def test_concurrent_identical_requests_share_one_fetch(monkeypatch):
+    app = create_app()
+    fetch_calls = {'count': 0}
+    fetching = threading.Event()
+    release = threading.Event()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+
+    def _fetch(playlist, sp, **kwargs):
+        fetch_calls['count'] += 1
+        fetching.set()
+        release.wait(timeout = 5)
+        return _tracks()
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', _fetch)
+
+    results = []
+
+    def _post():
+        response = app.test_client().post('/api/bracket', json = {
+            'playlist': 'viral',
+            'order': 'playlist',
+            'size': 16,
+            'bracket_name': 'Viral bracket',
+        })
+        results.append(response.get_json()['bracket_id'])
+
+    threads = [threading.Thread(target = _post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    assert fetching.wait(timeout = 5)
+    release.set()
+
+    for thread in threads:
+        thread.join(timeout = 5)
+
+    assert fetch_calls['count'] == 1
+    assert len(set(results)) == 1
+
+
+def test_follower_waits_for_leader_in_another_worker(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+    signature_name = 'shared|16|playlist|Shared'
+
+    monkeypatch.setattr('brackify.app.LEASE_POLL_SECONDS', 0.01)
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+
+    def _fetch(playlist, sp, **kwargs):
+        raise AssertionError('follower should not call Spotify')
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', _fetch)
+
+    # Simulate another worker that holds the lease and publishes its bracket a little later.
+    token = app.bracket_store.acquire_lease(signature_name, 30)
+
+    def _leader_finishes():
+        _save_bracket(app, 'leader-id', datetime.now(timezone.utc))
+        app.bracket_store.save(signature_name, {'bracket_id': 'leader-id'}, 60)
+        app.bracket_store.release_lease(signature_name, token)
+
+    timer = threading.Timer(0.05, _leader_finishes)
+    timer.start()
+
+    response = client.post('/api/bracket', json = {
+        'playlist': 'shared',
+        'order': 'playlist',
+        'size': 16,
+        'bracket_name': 'Shared',
+    })
+
+    timer.join()
+    assert response.get_json()['bracket_id'] == 'leader-id'
+
+
+def test_refresh_only_touches_stored_keys(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', lambda playlist, sp, **kwargs: _tracks())
+
+    body = {'playlist': 'playlist123', 'order': 'playlist', 'size': 16, 'bracket_name': 'Touch'}
+    first = client.post('/api/bracket', json = body).get_json()
+
+    writes = []
+    monkeypatch.setattr(app.bracket_store, 'save', lambda *args: writes.append(args))
+    monkeypatch.setattr(app.bracket_store, 'save_many', lambda *args: writes.append(args))
+
+    second = client.post('/api/bracket', json = body).get_json()
+
+    assert second['bracket_id'] == first['bracket_id']
+    assert writes == []
+
+
+def test_bracket_reads_support_etags_and_gzip():
+    app = create_app()
+    client = app.test_client()
+
+    payload = _sample_bracket('cached', datetime.now(timezone.utc))
+    payload['seeds'] = _tracks(32)
+    app.bracket_store.save('cached', payload, 3600)
+
+    first = client.get('/api/bracket/cached')
+    etag = first.headers['ETag']
+
+    assert first.status_code == 200
+    assert first.get_json()['bracket_id'] == 'cached'
+    assert 0 < int(first.headers['Cache-Control'].split('max-age=')[1]) <= 3600
+
+    not_modified = client.get('/api/bracket/cached', headers = {'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    compressed = client.get('/api/bracket/cached', headers = {'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == etag
+    assert len(compressed.data) < len(first.data)
+
+
+def test_bracket_reads_reuse_encoded_body(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+    _save_bracket(app, 'hot', datetime.now(timezone.utc))
+
+    client.get('/api/bracket/hot')
+    monkeypatch.setattr(app.bracket_store, 'get_with_ttl', lambda bracket_id: (_ for _ in ()).throw(AssertionError('store read')))
+
+    assert client.get('/api/bracket/hot').status_code == 200
+
+
+def test_bracket_page_inlines_bracket_data(monkeypatch):
+    import json
+    import re
+
+    app = create_app()
+    client = app.test_client()
+
+    payload = _sample_bracket('inline', datetime.now(timezone.utc))
+    payload['bracket_name'] = '</script><b>Best</b> & co'
+    app.bracket_store.save('inline', payload, 3600)
+
+    page = client.get('/bracket/inline')
+    html = page.get_data(as_text = True)
+    inlined = re.search(r'<script id="bracket-data" type="application/json">(.*?)</script>', html).group(1)
+
+    assert page.status_code == 200
+    assert '</script><b>' not in inlined
+    assert json.loads(inlined)['bracket_name'] == payload['bracket_name']
+
+    monkeypatch.setattr(app.bracket_store, 'get_with_ttl', lambda bracket_id: (_ for _ in ()).throw(AssertionError('store read')))
+    assert client.get('/api/bracket/inline').status_code == 200
+
+
+def test_missing_bracket_page_returns_not_found():
+    app = create_app()
+    client = app.test_client()
+
+    response = client.get('/bracket/missing')
+
+    assert response.status_code == 404
+    assert 'not found or expired' in response.get_data(as_text = True)
+
+
+def test_picks_are_tallied_and_reported():
+    from brackify.votes import VoteAggregator
+
+    app = create_app()
+    app.vote_aggregator = VoteAggregator(app.bracket_store, flush_interval = 0)
+    client = app.test_client()
+
+    payload = _sample_bracket('votes', datetime.now(timezone.utc))
+    payload['seeds'] = _tracks(4)
+    app.bracket_store.save('votes', payload, 3600)
+
+    picks = [
+        {'round': 0, 'match': 0, 'track_id': '1'},
+        {'round': 0, 'match': 1, 'track_id': '4'},
+        {'round': 1, 'match': 0, 'track_id': '4'},
+    ]
+    for _ in range(2):
+        assert client.post('/api/bracket/votes/picks', json = {'picks': picks, 'champion': '4'}).status_code == 202
+
+    results = client.get('/api/bracket/votes/results').get_json()
+
+    assert results['submissions'] == 2
+    assert results['champions'] == {'4': 2}
+    assert results['matches']['0:1'] == {'4': 2}
+    assert app.bracket_store.get_counts('votes:votes')['submissions'] == 2
+
+
+def test_invalid_picks_are_rejected():
+    app = create_app()
+    client = app.test_client()
+
+    payload = _sample_bracket('votes', datetime.now(timezone.utc))
+    payload['seeds'] = _tracks(4)
+    app.bracket_store.save('votes', payload, 3600)
+
+    outside = client.post('/api/bracket/votes/picks', json = {'picks': [{'round': 2, 'match': 0, 'track_id': '0'}]})
+    unknown = client.post('/api/bracket/votes/picks', json = {'picks': [], 'champion': 'nope'})
+    missing = client.post('/api/bracket/missing/picks', json = {'picks': []})
+
+    assert outside.status_code == 400
+    assert unknown.status_code == 400
+    assert missing.status_code == 404
+
+
+def test_picks_must_follow_the_seeded_layout():
+    from brackify.votes import VoteAggregator
+
+    app = create_app()
+    app.vote_aggregator = VoteAggregator(app.bracket_store, flush_interval = 0)
+    client = app.test_client()
+
+    payload = _sample_bracket('seeded', datetime.now(timezone.utc))
+    payload.update(size = 8, layout = 'seeded', seeds = _tracks(5) + [None] * 3)
+    app.bracket_store.save('seeded', payload, 3600)
+
+    def _post(picks, champion = None):
+        return client.post('/api/bracket/seeded/picks', json = {'picks': picks, 'champion': champion})
+
+    # Slots are 1 v bye, 4 v 5, 2 v bye, 3 v bye: seeds 1 and 2 never meet before the final.
+    wrong_match = _post([{'round': 0, 'match': 0, 'track_id': '2'}])
+    skipped_loss = _post([{'round': 0, 'match': 1, 'track_id': '4'}, {'round': 1, 'match': 0, 'track_id': '5'}])
+    wrong_champion = _post([{'round': 2, 'match': 0, 'track_id': '1'}], champion = '2')
+    partial = _post([{'round': 0, 'match': 1, 'track_id': '5'}, {'round': 1, 'match': 0, 'track_id': '5'}])
+    with_champion = _post([{'round': 2, 'match': 0, 'track_id': '3'}], champion = '3')
+    list_champion = _post([], champion = [])
+    object_track = _post([{'round': 0, 'match': 0, 'track_id': {'id': '1'}}])
+
+    assert list_champion.status_code == 400
+    assert object_track.status_code == 400
+    assert wrong_match.status_code == 400
+    assert skipped_loss.status_code == 400
+    assert wrong_champion.status_code == 400
+    assert partial.get_json() == {'recorded': 2}
+    assert with_champion.get_json() == {'recorded': 2}
+    assert app.vote_aggregator.results('seeded')['matches'] == {'0:1': {'5': 1}, '1:0': {'5': 1}, '2:0': {'3': 1}}
+
+
+def test_job_mode_queues_creation_and_reports_the_bracket(monkeypatch):
+    monkeypatch.setenv('BRACKET_JOB_WORKERS', '1')
+    app = create_app()
+    client = app.test_client()
+    release = threading.Event()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+
+    def _fetch(playlist, sp, **kwargs):
+        release.wait(timeout = 5)
+        return _tracks()
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', _fetch)
+
+    body = {'playlist': 'slow', 'order': 'playlist', 'size': 16, 'bracket_name': 'Slow bracket'}
+    first = client.post('/api/bracket', json = body)
+    second = client.post('/api/bracket', json = body)
+
+    assert first.status_code == 202
+    assert second.get_json()['job_id'] == first.get_json()['job_id']
+    assert client.get(first.get_json()['job_url']).get_json()['status'] in ('queued', 'running')
+
+    release.set()
+    app.bracket_jobs.shutdown()
+
+    job = client.get(first.get_json()['job_url']).get_json()
+    redirect = client.get(first.get_json()['job_url'] + '?redirect=1')
+
+    assert job['status'] == 'done'
+    assert redirect.status_code == 303
+    assert redirect.headers['Location'] == job['share_url']
+    assert client.post('/api/bracket', json = body).status_code == 200
+
+
+def test_job_mode_rejects_work_beyond_the_queue_bound(monkeypatch):
+    monkeypatch.setenv('BRACKET_JOB_WORKERS', '1')
+    monkeypatch.setenv('BRACKET_JOB_MAX_QUEUED', '0')
+    app = create_app()
+    client = app.test_client()
+    release = threading.Event()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', lambda playlist, sp, **kwargs: release.wait(timeout = 5) and _tracks())
+
+    first = client.post('/api/bracket', json = {'playlist': 'a', 'order': 'playlist', 'size': 16, 'bracket_name': 'A'})
+    second = client.post('/api/bracket', json = {'playlist': 'b', 'order': 'playlist', 'size': 16, 'bracket_name': 'B'})
+    release.set()
+    app.bracket_jobs.shutdown()
+
+    assert first.status_code == 202
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '5'
+
+
+def test_job_left_running_by_a_dead_worker_can_be_retried():
+    import time
+
+    from brackify.jobs import BracketJobQueue, job_key, job_signature_key
+    from brackify.store import InMemoryBracketStore
+
+    store = InMemoryBracketStore()
+    queue = BracketJobQueue(store, workers = 1, heartbeat_seconds = 0.05, stale_seconds = 0.5)
+    store.save(job_key('orphan'), {'job_id': 'orphan', 'status': 'running', 'updated_at': time.time() - 5}, 900)
+    store.save(job_signature_key('sig'), {'job_id': 'orphan'}, 900)
+    release = threading.Event()
+
+    def _create():
+        release.wait(timeout = 5)
+        return {'bracket_id': 'b', 'share_url': '/bracket/b'}, 200
+
+    assert queue.get('orphan')['status'] == 'failed'
+    retry = queue.submit('sig', _create)
+    time.sleep(0.7)
+
+    # The live job's heartbeat keeps it from looking abandoned.
+    assert retry['job_id'] != 'orphan'
+    assert queue.get(retry['job_id'])['status'] == 'running'
+
+    release.set()
+    queue.shutdown()
+    assert queue.get(retry['job_id'])['status'] == 'done'
+
+
+def test_short_playlist_gets_byes_and_a_compact_payload(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', lambda playlist, sp, **kwargs: _tracks(600))
+
+    body = {'playlist': 'big', 'order': 'playlist', 'size': 1024, 'bracket_name': 'Huge'}
+    response = client.post('/api/bracket', json = body)
+    payload = response.get_json()
+
+    assert response.status_code == 200
+    assert payload['layout'] == 'seeded'
+    assert 'matches' not in payload
+    assert payload['seeds'][599]['track_id'] == '600'
+    assert payload['seeds'][600] is None
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', lambda playlist, sp, **kwargs: _tracks(8))
+    too_short = client.post('/api/bracket', json = dict(body, playlist = 'small', size = 16))
+    assert too_short.status_code == 400
+
+
+def test_bulk_creation_fetches_each_playlist_once(monkeypatch):
+    import time
+
+    monkeypatch.setenv('BRACKET_JOB_WORKERS', '1')
+    monkeypatch.setenv('BRACKIFY_ADMIN_TOKEN', 'secret')
+    app = create_app()
+    client = app.test_client()
+    fetches = []
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+
+    def _fetch(playlist, sp, **kwargs):
+        fetches.append((playlist, kwargs.get('max_tracks')))
+        if playlist == 'broken':
+            raise RuntimeError('Playlist not found')
+        return _tracks(32)
+
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', _fetch)
+
+    def _finished(job_url):
+        deadline = time.monotonic() + 5
+        job = client.get(job_url).get_json()
+        while job['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.01)
+            job = client.get(job_url).get_json()
+        return job
+
+    existing = _finished(client.post('/api/bracket', json = {'playlist': 'weekly', 'order': 'playlist', 'size': 8, 'bracket_name': 'Week 1'}).get_json()['job_url'])
+    fetches.clear()
+
+    specs = [
+        {'playlist': 'weekly', 'order': 'playlist', 'size': 8, 'bracket_name': 'Week 1'},
+        {'playlist': 'weekly', 'order': 'playlist', 'size': 16, 'bracket_name': 'Week 2'},
+        {'playlist': 'weekly', 'order': 'playlist', 'size': 32, 'bracket_name': 'Week 3'},
+        {'playlist': 'weekly', 'order': 'playlist', 'size': 32, 'bracket_name': 'Week 3'},
+        {'playlist': 'broken', 'order': 'randomized', 'size': 8, 'bracket_name': 'Broken'},
+        {'playlist': 'weekly', 'size': 12, 'bracket_name': 'Bad size'},
+    ]
+    headers = {'Authorization': 'Bearer secret'}
+    response = client.post('/api/brackets/bulk', json = {'brackets': specs}, headers = headers)
+    assert response.status_code == 202
+
+    job = _finished(response.get_json()['job_url'])
+    body = job['manifest']
+    entries = body['brackets']
+
+    assert job['status'] == 'done'
+    assert sorted(fetches) == [('broken', None), ('weekly', 32)]
+    assert (body['created'], body['existing'], body['error']) == (3, 1, 2)
+    assert entries[0]['bracket_id'] == existing['bracket_id']
+    assert entries[2]['bracket_id'] == entries[3]['bracket_id']
+    assert entries[4]['error'] == 'Playlist not found'
+    assert entries[5]['status'] == 'error'
+    assert client.get(f"/api/bracket/{entries[1]['bracket_id']}").get_json()['seed_count'] == 16
+
+    assert client.post('/api/brackets/bulk', json = {'brackets': []}, headers = headers).status_code == 400
+    assert client.post('/api/brackets/bulk', json = {'brackets': specs}).status_code == 401
+    assert client.post('/api/brackets/bulk', json = {'brackets': specs}, headers = {'Authorization': 'Bearer wrong'}).status_code == 401
+    app.bracket_jobs.shutdown()
+
+
+def test_bulk_creation_is_hidden_without_an_admin_token(monkeypatch):
+    monkeypatch.delenv('BRACKIFY_ADMIN_TOKEN', raising = False)
+    client = create_app().test_client()
+
+    response = client.post('/api/brackets/bulk', json = {'brackets': [{'playlist': 'weekly', 'size': 8, 'bracket_name': 'Week 1'}]})
+
+    assert response.status_code == 404
+
+
+def test_healthz_reports_store_state():
+    app = create_app()
+    body = app.test_client().get('/healthz').get_json()
+
+    assert body['status'] == 'ok'
+    assert 'entries' in body['store']
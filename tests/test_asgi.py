@@ -0,0 +1,255 @@
+import asyncio
+import random
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from benchmarks.fake_spotify import FakeSpotify
+from brackify.asgi import BrackifyASGI
+from brackify.async_spotify import AsyncSpotifyFetcher
+from brackify.async_store import AsyncLayeredBracketStore, AsyncRedisBracketStore, AsyncResilientBracketStore, SyncStoreAdapter
+from brackify.breaker import CircuitBreaker
+from brackify.spotify_client import fetch_playlist_sample
+from brackify.store import InMemoryBracketStore, LayeredBracketStore, RedisBracketStore, ResilientBracketStore, ShardedBracketStore
+
+
+def _spotify_transport(total: int, calls: list):
+    def handler(request):
+        if request.url.host == 'accounts.spotify.com':
+            return httpx.Response(200, json = {'access_token': 'token', 'expires_in': 3600})
+
+        offset = int(request.url.params['offset'])
+        limit = int(request.url.params['limit'])
+        calls.append((offset, limit))
+        items = [
+            {'track': {'id': str(i), 'name': f'Song {i}', 'album': {'name': 'Album', 'images': []}, 'artists': [{'name': 'Artist'}]}}
+            for i in range(offset, min(offset + limit, total))
+        ]
+        return httpx.Response(200, json = {'items': items, 'total': total, 'next': 'more' if offset + limit < total else None})
+
+    return httpx.MockTransport(handler)
+
+
+def _fetcher(total: int, calls: list) -> AsyncSpotifyFetcher:
+    return AsyncSpotifyFetcher('id', 'secret', http = httpx.AsyncClient(transport = _spotify_transport(total, calls)))
+
+
+def test_async_fetcher_matches_sync_track_records():
+    calls = []
+    fetcher = _fetcher(250, calls)
+
+    async def _run():
+        whole = await fetcher.fetch_playlist_tracks('abc')
+        leading = await fetcher.fetch_playlist_tracks('abc', max_tracks = 16)
+        sample = await fetcher.fetch_playlist_tracks('abc', sample_size = 8, rng = random.Random(3))
+        return whole, leading, sample
+
+    whole, leading, sample = asyncio.run(_run())
+
+    assert len(whole) == 250 and whole.total == 250 and whole.complete
+    assert [t['track_id'] for t in leading] == [str(i) for i in range(16)]
+    assert (0, 16) in calls
+    assert len(sample) == 8
+    # Both fetchers draw offsets through the same sampler, so one seed gives one sample.
+    sync_sample = fetch_playlist_sample('abc', FakeSpotify(total = 250), 8, rng = random.Random(3))
+    assert [t['track_id'] for t in sample] == [t['track_id'].split('-')[-1] for t in sync_sample]
+    assert set(whole[0]) == {'track_id', 'song_name', 'artists', 'album_name', 'image_url', 'images', 'preview_url'}
+
+
+def _scripted_fetcher(responses: list):
+    """A fetcher whose playlist requests get the next of `responses`, an httpx.Response or exception."""
+
+    def handler(request):
+        if request.url.host == 'accounts.spotify.com':
+            return httpx.Response(200, json = {'access_token': 'token', 'expires_in': 3600})
+
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return AsyncSpotifyFetcher('id', 'secret', http = httpx.AsyncClient(transport = httpx.MockTransport(handler)))
+
+
+def test_async_fetcher_refreshes_the_token_once_per_401(monkeypatch):
+    monkeypatch.setattr('brackify.async_spotify.get_rate_limiter', lambda: None)
+    page = {'items': [], 'total': 0, 'next': None}
+    fetcher = _scripted_fetcher([
+        httpx.Response(401),
+        httpx.Response(429, headers = {'Retry-After': '0'}),
+        httpx.Response(429, headers = {'Retry-After': '0'}),
+        httpx.Response(200, json = page),
+    ])
+
+    assert asyncio.run(fetcher.fetch_playlist_tracks('abc')) == []
+    # One token for the first request and one after the 401; the 429 retries reuse it.
+    assert fetcher.token_refreshes == 2
+
+
+def test_async_fetcher_failures_become_bracket_errors(monkeypatch):
+    monkeypatch.setattr('brackify.async_spotify.get_rate_limiter', lambda: None)
+    body = {'playlist': 'abc', 'order': 'playlist', 'size': 16, 'bracket_name': 'Async'}
+
+    async def _create(fetcher):
+        app = BrackifyASGI(SyncStoreAdapter(InMemoryBracketStore()), fetcher)
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app), base_url = 'http://testserver') as client:
+            return await client.post('/api/bracket', json = body)
+
+    exhausted = asyncio.run(_create(_scripted_fetcher([httpx.Response(503, headers = {'Retry-After': '0'})])))
+    unreachable = asyncio.run(_create(_scripted_fetcher([httpx.ConnectError('connection refused')])))
+    missing = asyncio.run(_create(_scripted_fetcher([httpx.Response(404)])))
+
+    assert exhausted.status_code == 500
+    assert exhausted.json()['error'] == 'Spotify request failed with status 503. Please try again shortly.'
+    assert unreachable.status_code == 500
+    assert unreachable.json()['error'] == 'Spotify request failed with a network error. Please try again shortly.'
+    assert missing.status_code == 400
+    assert missing.json()['error'].startswith('Playlist not found')
+
+
+def test_asgi_creates_and_serves_brackets():
+    calls = []
+    app = BrackifyASGI(SyncStoreAdapter(InMemoryBracketStore()), _fetcher(40, calls))
+    body = {'playlist': 'abc', 'order': 'playlist', 'size': 16, 'bracket_name': 'Async'}
+
+    async def _run():
+        transport = httpx.ASGITransport(app = app)
+        async with httpx.AsyncClient(transport = transport, base_url = 'http://testserver') as client:
+            created = await asyncio.gather(*(client.post('/api/bracket', json = body) for _ in range(5)))
+            bracket_id = created[0].json()['bracket_id']
+            read = await client.get(f'/api/bracket/{bracket_id}')
+            cached = await client.get(f'/api/bracket/{bracket_id}', headers = {'If-None-Match': read.headers['etag']})
+            invalid = await client.post('/api/bracket', json = dict(body, size = 5))
+            missing = await client.get('/api/bracket/missing')
+            return created, read, cached, invalid, missing
+
+    created, read, cached, invalid, missing = asyncio.run(_run())
+
+    assert {response.json()['bracket_id'] for response in created} == {created[0].json()['bracket_id']}
+    assert len(calls) == 1
+    assert created[0].json()['share_url'].startswith('http://testserver/bracket/')
+    assert read.json()['seed_count'] == 16
+    assert cached.status_code == 304
+    assert invalid.status_code == 400
+    assert missing.status_code == 404
+
+
+def test_async_redis_store_shares_data_with_sync_store():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    sync_store = RedisBracketStore('redis://fake', client = fakeredis.FakeRedis(server = server))
+    async_store = AsyncRedisBracketStore('redis://fake', client = fakeredis.FakeAsyncRedis(server = server))
+
+    sync_store.save('a', {'bracket_id': 'a'}, 60)
+
+    async def _run():
+        first = await async_store.get_with_ttl('a')
+        await async_store.save_many([('b', {'bracket_id': 'b'}, 60)])
+        lease = await async_store.acquire_lease('sig', 30)
+        held = await async_store.lease_held('sig')
+        await async_store.release_lease('sig', lease)
+        return first, lease, held, await async_store.lease_held('sig')
+
+    (payload, ttl), lease, held, held_after = asyncio.run(_run())
+
+    assert payload == {'bracket_id': 'a'} and 0 < ttl <= 60
+    assert sync_store.get('b') == {'bracket_id': 'b'}
+    assert lease is not None and held and not held_after
+
+
+def test_async_store_follows_the_sync_store_choice(monkeypatch):
+    from brackify.async_store import create_async_store_from_env
+
+    fakeredis = pytest.importorskip('fakeredis')
+    monkeypatch.setenv('BRACKET_REDIS_URL', 'redis://localhost:6379/0')
+
+    # The sync store fell back to memory, so the async routes must not talk to Redis either.
+    memory = InMemoryBracketStore()
+    fallback = create_async_store_from_env(memory)
+    redis_backed = create_async_store_from_env(RedisBracketStore('redis://node-a:6379/0', client = fakeredis.FakeRedis()))
+
+    assert isinstance(fallback, SyncStoreAdapter) and fallback.store is memory and not fallback.offload
+    assert isinstance(redis_backed, AsyncRedisBracketStore)
+    assert redis_backed._client.connection_pool.connection_kwargs['host'] == 'node-a'
+    asyncio.run(redis_backed.close())
+
+
+def test_sharded_store_runs_off_the_event_loop():
+    import threading
+
+    from brackify.async_store import create_async_store_from_env
+
+    fakeredis = pytest.importorskip('fakeredis')
+    sharded = ShardedBracketStore([(f'redis://node{i}', RedisBracketStore('redis://fake', client = fakeredis.FakeRedis(server = fakeredis.FakeServer()))) for i in range(2)])
+    threads = []
+    original = sharded.get_with_ttl
+
+    def _get_with_ttl(bracket_id):
+        threads.append(threading.get_ident())
+        return original(bracket_id)
+
+    sharded.get_with_ttl = _get_with_ttl
+    store = create_async_store_from_env(sharded)
+    sharded.save('abc', {'bracket_id': 'abc'}, 60)
+
+    async def _run():
+        return threading.get_ident(), await store.get_with_ttl('abc')
+
+    loop_thread, (payload, _) = asyncio.run(_run())
+
+    assert isinstance(store, SyncStoreAdapter) and store.offload
+    assert payload == {'bracket_id': 'abc'}
+    assert threads and threads[0] != loop_thread
+
+
+def test_async_store_shares_the_sync_breaker_and_fallback():
+    from brackify.async_store import create_async_store_from_env
+
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    breaker = CircuitBreaker(lambda: None, failure_threshold = 1, probe_interval = 60)
+    sync_store = ResilientBracketStore(RedisBracketStore('redis://node-a:6379/0', client = fakeredis.FakeRedis(server = server)), InMemoryBracketStore(), breaker)
+
+    store = create_async_store_from_env(sync_store)
+    assert isinstance(store, AsyncResilientBracketStore)
+    assert store.breaker is breaker and store.fallback is sync_store.fallback
+    store.primary = AsyncRedisBracketStore('redis://fake', client = fakeredis.FakeAsyncRedis(server = server))
+
+    async def _run():
+        await store.save_many([('abc', {'bracket_id': 'abc'}, 60)])
+        server.connected = False
+        await store.save_many([('local', {'bracket_id': 'local'}, 60)])
+        return await store.get('local'), await store.get('abc')
+
+    local, remote = asyncio.run(_run())
+
+    # The failed async write opened the breaker for the sync store too, and both read the same fallback.
+    assert breaker.state == 'open' and sync_store.degraded
+    assert local == {'bracket_id': 'local'} and sync_store.get('local') == local
+    assert remote is None
+    breaker.stop()
+
+
+def test_async_store_shares_the_sync_l1():
+    from brackify.async_store import create_async_store_from_env
+
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    sync_store = LayeredBracketStore(RedisBracketStore('redis://node-a:6379/0', client = fakeredis.FakeRedis(server = server)))
+
+    store = create_async_store_from_env(sync_store)
+    assert isinstance(store, AsyncLayeredBracketStore) and store.layer is sync_store
+    store.backend = AsyncRedisBracketStore('redis://fake', client = fakeredis.FakeAsyncRedis(server = server))
+
+    async def _run():
+        sync_store.save('cached', {'bracket_id': 'cached'}, 60)
+        await store.save_many([('written', {'bracket_id': 'written'}, 60)])
+        server.connected = False
+        return await store.get_with_ttl('cached')
+
+    payload, ttl = asyncio.run(_run())
+
+    # With Redis gone, both entries are still served from the one L1.
+    assert payload == {'bracket_id': 'cached'} and 0 < ttl <= 60
+    assert sync_store.get('written') == {'bracket_id': 'written'}
@@ -0,0 +1,50 @@
+import json
+
+from benchmarks.harness import compare, measure, percentile
+from benchmarks.run import main
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_measure_counts_errors_separately():
+    def op(i):
+        if i % 5 == 0:
+            raise RuntimeError('boom')
+
+    result = measure(op, 20, memory_iterations = 0)
+
+    assert result['ops'] == 20
+    assert result['errors'] == 4
+
+
+def test_compare_flags_slower_scenarios():
+    base = {'p95_ms': 10.0, 'throughput': 100.0}
+    rows = compare({'a': dict(base, p95_ms = 13.0), 'b': dict(base)}, {'a': base, 'b': base}, 0.2)
+
+    assert [row['regressed'] for row in rows] == [True, False]
+
+
+def test_scenarios_run_end_to_end(tmp_path):
+    output = tmp_path / 'results.json'
+    argv = [
+        '--iterations', '5',
+        '--warmup', '1',
+        '--memory-iterations', '2',
+        '--backend', 'memory',
+        '--playlist-size', '120',
+        '--bracket-size', '8',
+    ]
+
+    first = main(argv + ['--output', str(output)])
+    report = json.loads(output.read_text())
+    second = main(argv + ['--scenario', 'create_hit', '--baseline', str(output), '--threshold', '100'])
+
+    assert first == 0 and second == 0
+    assert set(report['scenarios']) >= {'create_miss', 'create_hit', 'refresh', 'read_heavy'}
+    assert all(result['errors'] == 0 for result in report['scenarios'].values())
@@ -1,6 +1,6 @@
 import random
 import pytest
-from brackify.brackets import build_seed_list, chunk_matches, AllowedBracketSizes
+from brackify.brackets import bracket_slots, build_seed_list, chunk_matches, seed_order, AllowedBracketSizes
 
 
 TRACKS = [
@@ -41,3 +41,25 @@ def test_chunk_matches_shapes_pairs(size):
     matches = chunk_matches(seeds)
     assert len(matches) == size // 2
     assert all(len(m) == 2 for m in matches)
+
+
+def test_seed_order_pairs_top_and_bottom_seeds():
+    assert seed_order(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+
+    order = seed_order(1024)
+    assert sorted(order) == list(range(1024))
+    assert all(order[i] + order[i + 1] == 1023 for i in range(0, 1024, 2))
+    # Seeds 1 and 2 sit in opposite halves, so they can only meet in the final.
+    assert order.index(0) < 512 <= order.index(1)
+
+
+def test_bracket_slots_give_missing_seeds_as_byes_to_top_seeds():
+    seeds = build_seed_list(TRACKS, 8, order = 'playlist')
+    slots = bracket_slots(seeds)
+
+    assert [s['track_id'] if s else None for s in slots] == ['1', None, None, None, '2', None, '3', None]
+
+
+def test_seed_order_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        seed_order(12)
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from brackify import codecs
+from brackify.codecs import CompactCodec, JsonCodec
+
+
+def _bracket(size = 32):
+    seeds = [
+        {
+            'track_id': f'id{i}',
+            'song_name': f'Song {i}',
+            'artists': 'Artist',
+            'album_name': 'Album',
+            'image_url': f'https://i.scdn.co/image/ab67616d0000b273{i:024d}',
+            'preview_url': None,
+        }
+        for i in range(size - 2)
+    ] + [None, None]
+
+    return {
+        'size': size,
+        'order': 'playlist',
+        'seeds': seeds,
+        'matches': [seeds[i:i + 2] for i in range(0, size, 2)],
+        'bracket_id': 'abc',
+        'created_at': '2024-01-01T00:00:00+00:00',
+    }
+
+
+@pytest.mark.parametrize('compression', ['zlib', None])
+def test_compact_round_trip(compression):
+    codec = CompactCodec(compression = compression)
+    payload = _bracket()
+
+    assert codec.decode(codec.encode(payload)) == payload
+
+
+def test_compact_round_trip_without_msgpack(monkeypatch):
+    monkeypatch.setattr(codecs, 'msgpack', None)
+    codec = CompactCodec()
+    payload = _bracket()
+
+    assert codec.format == codecs.FORMAT_JSON
+    assert codec.decode(codec.encode(payload)) == payload
+
+
+def test_compact_is_much_smaller_than_json():
+    payload = _bracket()
+
+    assert len(CompactCodec().encode(payload)) * 3 < len(JsonCodec().encode(payload))
+
+
+def test_keeps_matches_that_are_not_derived_from_seeds():
+    payload = _bracket(8)
+    payload['matches'] = [[None, None]]
+    codec = CompactCodec()
+
+    assert codec.decode(codec.encode(payload))['matches'] == [[None, None]]
+
+
+def test_both_codecs_read_each_others_values():
+    payload = _bracket(8)
+    legacy = json.dumps(payload).encode('utf-8')
+
+    assert CompactCodec().decode(legacy) == payload
+    assert JsonCodec().decode(CompactCodec().encode(payload)) == payload
+
+
+def test_redis_store_reads_legacy_json():
+    fakeredis = pytest.importorskip('fakeredis')
+    from brackify.store import RedisBracketStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisBracketStore('redis://fake', client = client, codec = CompactCodec())
+    client.set('bracket:old', json.dumps({'bracket_id': 'old'}))
+
+    store.save('new', _bracket(8), 60)
+
+    assert store.get('old') == {'bracket_id': 'old'}
+    assert store.get('new') == _bracket(8)
+    assert client.get('bracket:new').startswith(codecs.MAGIC)
+
+
+@pytest.mark.parametrize('raw', [
+    b'BRK',
+    b'BRK\x01\x01',
+    b'BRK\x01\x01\x01not zlib',
+    b'BRK\x01\x01\x00{"doc": ',
+    b'BRK\x01\x01\x00[1, 2]',
+    b'{"legacy": ',
+])
+def test_unreadable_payloads_raise_corrupt_payload(raw):
+    with pytest.raises(codecs.CorruptPayload):
+        CompactCodec().decode(raw)
+
+
+def test_corrupt_zstd_body_raises_corrupt_payload():
+    pytest.importorskip('zstandard')
+    codec = CompactCodec(compression = 'zstd')
+    raw = codec.encode(_bracket())
+
+    with pytest.raises(codecs.CorruptPayload):
+        codec.decode(raw[:codecs.HEADER_LENGTH] + b'not zstd' + raw[codecs.HEADER_LENGTH + 8:])
+
+
+def test_corrupt_msgpack_body_raises_corrupt_payload():
+    pytest.importorskip('msgpack')
+
+    with pytest.raises(codecs.CorruptPayload):
+        CompactCodec().decode(b'BRK\x01\x02\x00\xc1')
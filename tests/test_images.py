@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from brackify.app import create_app
+from brackify.images import ThumbnailCache, image_id_from_url, snap_width
+
+IMAGE_ID = 'ab67616d0000b273' + '0' * 24
+
+
+def test_only_spotify_cdn_images_are_accepted():
+    assert image_id_from_url(f'https://i.scdn.co/image/{IMAGE_ID}') == IMAGE_ID
+    assert image_id_from_url('https://example.com/image/abc') is None
+    assert image_id_from_url('https://i.scdn.co/image/../../etc/passwd') is None
+    assert snap_width(10) == 64 and snap_width(100) == 160 and snap_width(5000) == 300
+
+
+def test_thumbnails_are_fetched_once_and_served_from_disk(tmp_path):
+    calls = []
+    started = threading.Event()
+
+    def _fetch(url):
+        calls.append(url)
+        started.wait(timeout = 1)
+        return b'\xff\xd8\xff' + b'jpeg'
+
+    cache = ThumbnailCache(str(tmp_path), fetch = _fetch)
+    threads = [threading.Thread(target = cache.get, args = (IMAGE_ID, 150)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+
+    body, content_type = cache.get(IMAGE_ID, 160)
+
+    assert calls == [f'https://i.scdn.co/image/{IMAGE_ID}']
+    assert content_type == 'image/jpeg'
+    assert (tmp_path / f'{IMAGE_ID}-160').read_bytes() == body
+
+    with pytest.raises(ValueError):
+        cache.get('not-an-id', 80)
+
+
+def test_cover_endpoint_sets_immutable_caching(tmp_path):
+    app = create_app()
+    client = app.test_client()
+    assert client.get(f'/cover/{IMAGE_ID}').status_code == 404
+
+    app.thumbnails = ThumbnailCache(str(tmp_path), fetch = lambda url: b'\x89PNG\r\n\x1a\nimage')
+    response = client.get(f'/cover/{IMAGE_ID}?w=80')
+    revalidated = client.get(f'/cover/{IMAGE_ID}?w=80', headers = {'If-None-Match': response.headers['ETag']})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert revalidated.status_code == 304
+    assert client.get('/cover/nope').status_code == 400
+
+
+def test_bracket_page_only_uses_the_proxy_when_it_resizes(tmp_path, monkeypatch):
+    from datetime import datetime, timezone
+
+    app = create_app()
+    app.thumbnails = ThumbnailCache(str(tmp_path))
+    app.bracket_store.save('art', {'bracket_id': 'art', 'size': 8, 'seeds': [], 'created_at': datetime.now(timezone.utc).isoformat()}, 3600)
+    client = app.test_client()
+
+    monkeypatch.setattr('brackify.images.Image', None)
+    without_pillow = client.get('/bracket/art').get_data(as_text = True)
+    monkeypatch.setattr('brackify.images.Image', object())
+    with_pillow = client.get('/bracket/art').get_data(as_text = True)
+
+    assert 'data-image-proxy' not in without_pillow
+    assert 'data-image-proxy="1"' in with_pillow
+
+
+def test_disk_cache_evicts_least_recently_used_past_its_cap(tmp_path):
+    import os
+
+    ids = [f'ab67616d0000b273{i:024d}' for i in range(3)]
+    cache = ThumbnailCache(str(tmp_path), fetch = lambda url: b'\xff\xd8\xff' + b'x' * 97, max_bytes = 250)
+
+    cache.get(ids[0], 80)
+    cache.get(ids[1], 80)
+    os.utime(tmp_path / f'{ids[0]}-80', (1000, 1000))
+    os.utime(tmp_path / f'{ids[1]}-80', (2000, 2000))
+    cache.get(ids[0], 80)
+    cache.get(ids[2], 80)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([f'{ids[0]}-80', f'{ids[2]}-80'])
+    assert sum(path.stat().st_size for path in tmp_path.iterdir()) <= 250
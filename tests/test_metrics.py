@@ -0,0 +1,62 @@
+import pytest
+
+from brackify import metrics
+from brackify.app import create_app
+
+
+@pytest.fixture
+def registry():
+    registry = metrics.enable()
+    yield registry
+    metrics.disable()
+
+
+def _tracks(count: int = 16):
+    return [{'track_id': str(i), 'song_name': f'Song {i}', 'artists': 'Artist', 'album_name': 'Album', 'image_url': None} for i in range(count)]
+
+
+def test_disabled_hooks_are_shared_no_ops():
+    metrics.disable()
+
+    assert metrics.timed('anything', stage = 'x') is metrics.timed('other')
+    metrics.inc('ignored_total')
+    assert metrics.registry() is None
+
+
+def test_registry_renders_prometheus_text(registry):
+    registry.inc('spotify_errors_total', endpoint = 'playlist_items', status = '429')
+    registry.observe('store_seconds', 0.003, backend = 'InMemoryBracketStore', op = 'get')
+
+    text = registry.render()
+
+    assert 'brackify_spotify_errors_total{endpoint="playlist_items",status="429"} 1' in text
+    assert 'brackify_store_seconds_bucket{backend="InMemoryBracketStore",op="get",le="0.005"} 1' in text
+    assert 'brackify_store_seconds_count{backend="InMemoryBracketStore",op="get"} 1' in text
+
+
+def test_bracket_requests_report_stages_and_metrics(registry, monkeypatch):
+    app = create_app()
+    client = app.test_client()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+    monkeypatch.setattr('brackify.app.fetch_playlist_tracks', lambda playlist, sp, **kwargs: _tracks())
+
+    body = {'playlist': 'abc', 'order': 'playlist', 'size': 16, 'bracket_name': 'Timed'}
+    created = client.post('/api/bracket', json = body)
+    client.post('/api/bracket', json = body)
+
+    timing = created.headers['Server-Timing']
+    assert 'fetch;dur=' in timing and 'seed;dur=' in timing and 'store;dur=' in timing and 'total;dur=' in timing
+    assert registry.counter_value('signature_lookups_total', result = 'miss') >= 1
+    assert registry.counter_value('signature_lookups_total', result = 'hit') == 1
+    assert registry.histogram_count('request_seconds', endpoint = 'api_bracket', method = 'POST', status = '200') == 2
+
+    exposed = client.get('/metrics')
+    assert exposed.status_code == 200
+    assert 'brackify_playlist_fetch_seconds_count{order="playlist"} 1' in exposed.get_data(as_text = True)
+
+
+def test_metrics_endpoint_is_hidden_when_disabled():
+    metrics.disable()
+
+    assert create_app().test_client().get('/metrics').status_code == 404
@@ -0,0 +1,76 @@
+import random
+
+from brackify.playlist_cache import PlaylistTrackCache
+from brackify.spotify_client import fetch_playlist_tracks
+from brackify.store import InMemoryBracketStore
+
+
+class SnapshotClient:
+    def __init__(self, total, snapshot_id = 'snap-1'):
+        self.total = total
+        self.snapshot_id = snapshot_id
+        self.item_calls = 0
+        self.snapshot_calls = 0
+
+    def playlist(self, playlist_id, fields):
+        self.snapshot_calls += 1
+        return {'snapshot_id': self.snapshot_id, 'tracks': {'total': self.total}}
+
+    def playlist_items(self, playlist_id, offset, limit, fields, additional_types):
+        self.item_calls += 1
+        items = [
+            {'track': {'id': str(i), 'name': f'Song {i}', 'album': {'name': 'Album', 'images': []}, 'artists': [{'name': 'Artist'}]}}
+            for i in range(offset, min(offset + limit, self.total))
+        ]
+        return {'items': items, 'total': self.total, 'next': 'more' if offset + limit < self.total else None}
+
+
+def test_cached_prefix_is_reused_while_snapshot_matches():
+    cache = PlaylistTrackCache(InMemoryBracketStore())
+    client = SnapshotClient(500)
+
+    first = fetch_playlist_tracks('abc', client, max_tracks = 16, cache = cache)
+    calls_after_first = client.item_calls
+    second = fetch_playlist_tracks('abc', client, max_tracks = 8, cache = cache)
+
+    assert [t['track_id'] for t in second] == [t['track_id'] for t in first[:8]]
+    assert second.total == 500
+    assert client.item_calls == calls_after_first
+    assert cache.stats()['hits'] == 1
+
+
+def test_changed_snapshot_refetches():
+    cache = PlaylistTrackCache(InMemoryBracketStore())
+    client = SnapshotClient(50)
+
+    fetch_playlist_tracks('abc', client, max_tracks = 16, cache = cache)
+    client.snapshot_id = 'snap-2'
+    fetch_playlist_tracks('abc', client, max_tracks = 16, cache = cache)
+
+    assert client.item_calls == 2
+
+
+def test_randomized_samples_from_cached_full_list():
+    cache = PlaylistTrackCache(InMemoryBracketStore(), full_fetch_limit = 1000)
+    client = SnapshotClient(300)
+
+    fetch_playlist_tracks('abc', client, sample_size = 8, concurrency = 2, cache = cache, rng = random.Random(1))
+    calls_after_first = client.item_calls
+    sample = fetch_playlist_tracks('abc', client, sample_size = 8, cache = cache, rng = random.Random(2))
+
+    assert len(sample) == 8
+    assert client.item_calls == calls_after_first
+
+
+def test_least_recently_used_entries_are_evicted():
+    store = InMemoryBracketStore()
+    cache = PlaylistTrackCache(store, max_entries = 2)
+
+    cache.put('a', 's', [], 0, True)
+    cache.put('b', 's', [], 0, True)
+    cache.get('a', 's')
+    cache.put('c', 's', [], 0, True)
+
+    assert cache.get('a', 's') is not None
+    assert cache.get('b', 's') is None
+    assert cache.get('c', 's') is not None
@@ -0,0 +1,196 @@
+import pytest
+
+from brackify import ratelimit
+from brackify.ratelimit import LocalTokenBucket, RateLimitTimeout, RedisTokenBucket, SpotifyRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_bucket_spends_burst_then_refills_at_rate():
+    clock = Clock()
+    bucket = LocalTokenBucket(rate = 10, burst = 5, clock = clock)
+
+    assert [bucket.try_acquire() for _ in range(5)] == [0.0] * 5
+    assert bucket.try_acquire() == pytest.approx(0.1)
+
+    clock.now += 0.1
+    assert bucket.try_acquire() == 0.0
+
+
+def test_rate_limit_pauses_halves_and_recovers():
+    clock = Clock()
+    bucket = LocalTokenBucket(rate = 10, burst = 5, min_rate = 1, recovery_seconds = 10, clock = clock)
+
+    bucket.penalize(2)
+    bucket.penalize(2)
+    assert bucket.try_acquire() == pytest.approx(2)
+    assert bucket.rate() == pytest.approx(5)
+
+    clock.now += 5
+    assert bucket.rate() == pytest.approx(10)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_background_work_leaves_a_reserve_for_interactive_calls():
+    clock = Clock()
+    limiter = SpotifyRateLimiter(LocalTokenBucket(rate = 1, burst = 4, clock = clock), background_reserve = 2, sleep = clock.sleep)
+
+    with ratelimit.background():
+        limiter.acquire()
+        limiter.acquire()
+        start = clock.now
+        limiter.acquire()
+        assert clock.now > start
+
+    # The reserve is still there for a bracket request.
+    start = clock.now
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.now == start
+
+
+def test_interactive_calls_time_out_instead_of_stalling():
+    clock = Clock()
+    limiter = SpotifyRateLimiter(LocalTokenBucket(rate = 1, burst = 1, clock = clock), max_wait = {'interactive': 5}, sleep = clock.sleep)
+    limiter.penalize(30)
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire()
+
+
+def test_priority_carries_into_pool_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ratelimit.background():
+        task = ratelimit.carry(lambda _: ratelimit.current_priority())
+
+    with ThreadPoolExecutor(max_workers = 2) as pool:
+        assert list(pool.map(task, range(2))) == ['background', 'background']
+
+
+def test_redis_bucket_is_shared_between_workers():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    clock = Clock()
+
+    def _bucket():
+        return RedisTokenBucket(fakeredis.FakeRedis(server = server), LocalTokenBucket(rate = 10, burst = 4, clock = clock))
+
+    first, second = _bucket(), _bucket()
+    assert [first.try_acquire(), second.try_acquire(), first.try_acquire(), second.try_acquire()] == [0.0] * 4
+    assert second.try_acquire() > 0
+
+    clock.now += 1
+    first.penalize(3)
+    assert second.try_acquire() == pytest.approx(3)
+
+
+def test_unreachable_redis_costs_one_failed_call():
+    from brackify.breaker import CircuitBreaker
+
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server = server)
+    breaker = CircuitBreaker(client.ping, name = 'rate-limiter', failure_threshold = 1, probe_interval = 60)
+    bucket = RedisTokenBucket(client, LocalTokenBucket(rate = 10, burst = 2, clock = Clock()), breaker = breaker)
+
+    server.connected = False
+    assert bucket.try_acquire() == 0.0
+    assert breaker.state == 'open'
+
+    # While the breaker is open the local bucket answers without touching Redis.
+    bucket._acquire = lambda **kwargs: pytest.fail('called Redis while the breaker was open')
+    bucket._penalize = lambda **kwargs: pytest.fail('called Redis while the breaker was open')
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0
+    bucket.penalize(1)
+    assert breaker.stats()['rejected'] == 3
+    breaker.stop()
+
+
+def test_rate_limiter_uses_a_local_bucket_when_redis_is_down(monkeypatch):
+    redis = pytest.importorskip('redis')
+
+    class DownRedis:
+        def ping(self):
+            raise redis.ConnectionError('connection refused')
+
+    monkeypatch.setenv('SPOTIFY_RATE_LIMIT', '10')
+    monkeypatch.setenv('BRACKET_REDIS_URL', 'redis://unreachable:6379/0')
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url, **kwargs: DownRedis())
+
+    limiter = ratelimit.create_rate_limiter_from_env()
+
+    assert isinstance(limiter.bucket, LocalTokenBucket)
+
+
+def test_spotify_calls_draw_from_the_limiter(monkeypatch):
+    pytest.importorskip('spotipy')
+    from brackify import spotify_client
+
+    clock = Clock()
+    limiter = SpotifyRateLimiter(LocalTokenBucket(rate = 10, burst = 1, clock = clock), sleep = clock.sleep)
+    monkeypatch.setattr(spotify_client, '_rate_limiter', limiter)
+    monkeypatch.setattr(spotify_client, '_rate_limiter_loaded', True)
+    monkeypatch.setattr(spotify_client.time, 'sleep', lambda seconds: pytest.fail('slept outside the limiter'))
+
+    class RateLimited(Exception):
+        http_status = 429
+        headers = {'Retry-After': '2'}
+
+    calls = []
+
+    class Client:
+        def playlist_items(self, playlist_id, offset, limit, fields, additional_types):
+            calls.append(clock.now)
+            if len(calls) == 1:
+                raise RateLimited()
+            return {'items': [], 'total': 0, 'next': None}
+
+    spotify_client.fetch_playlist_tracks('123', Client())
+
+    assert calls[1] - calls[0] >= 2
+
+
+def test_async_spotify_calls_draw_from_the_limiter(monkeypatch):
+    import asyncio
+
+    httpx = pytest.importorskip('httpx')
+    from brackify import spotify_client
+    from brackify.async_spotify import AsyncSpotifyFetcher
+
+    clock = Clock()
+
+    async def _sleep(seconds):
+        clock.sleep(seconds)
+
+    limiter = SpotifyRateLimiter(LocalTokenBucket(rate = 10, burst = 1, clock = clock), async_sleep = _sleep)
+    monkeypatch.setattr(spotify_client, '_rate_limiter', limiter)
+    monkeypatch.setattr(spotify_client, '_rate_limiter_loaded', True)
+    monkeypatch.setattr('brackify.async_spotify.asyncio.sleep', lambda seconds: pytest.fail('slept outside the limiter'))
+
+    calls = []
+
+    def handler(request):
+        if request.url.host == 'accounts.spotify.com':
+            return httpx.Response(200, json = {'access_token': 'token', 'expires_in': 3600})
+
+        calls.append(clock.now)
+        if len(calls) == 1:
+            return httpx.Response(429, headers = {'Retry-After': '2'})
+        return httpx.Response(200, json = {'items': [], 'total': 0, 'next': None})
+
+    fetcher = AsyncSpotifyFetcher('id', 'secret', http = httpx.AsyncClient(transport = httpx.MockTransport(handler)))
+    asyncio.run(fetcher._get('/playlists/123/tracks', {'offset': 0, 'limit': 100}))
+
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 2
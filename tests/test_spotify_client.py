@@ -1,8 +1,15 @@
+import random
+
 import pytest
 
 spotipy = pytest.importorskip('spotipy')
 
-from brackify.spotify_client import extract_playlist_id, get_spotify_client
+from brackify.spotify_client import (
+    RefreshingTokenManager,
+    SpotifyClientManager,
+    extract_playlist_id,
+    get_spotify_client,
+)
 
 
 def test_extract_playlist_id_from_url():
@@ -32,3 +39,223 @@ def test_fetch_playlist_tracks_rejects_invalid_limit(monkeypatch):
 
     with pytest.raises(ValueError):
         spotify_client.fetch_playlist_tracks('123', DummyClient(), limit = 0)
+
+
+def _settings(**overrides):
+    settings = {
+        'client_id': 'id',
+        'client_secret': 'secret',
+        'pool_size': 4,
+        'requests_timeout': 5.0,
+        'token_refresh_margin': 300,
+        'fetch_concurrency': 4,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_client_manager_reuses_client():
+    manager = SpotifyClientManager(_settings())
+
+    first = manager.client()
+    second = manager.client()
+
+    assert first is second
+    assert manager.stats()['clients_built'] == 1
+
+
+def test_client_manager_missing_credentials():
+    manager = SpotifyClientManager(_settings(client_id = None))
+
+    with pytest.raises(RuntimeError):
+        manager.client()
+
+
+def test_token_manager_refreshes_ahead_of_expiry(monkeypatch):
+    from brackify import spotify_client
+
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(spotify_client.time, 'time', lambda: clock['now'])
+
+    class FakeCache:
+        def __init__(self):
+            self.token = None
+
+        def get_cached_token(self):
+            return self.token
+
+    class FakeCredentials:
+        def __init__(self):
+            self.cache_handler = FakeCache()
+            self.calls = 0
+
+        def get_access_token(self, as_dict = False, check_cache = True):
+            self.calls += 1
+            self.cache_handler.token = {'access_token': f'token-{self.calls}', 'expires_at': clock['now'] + 3600}
+            return self.cache_handler.token['access_token']
+
+    credentials = FakeCredentials()
+    tokens = RefreshingTokenManager(credentials, refresh_margin = 300)
+
+    assert tokens.get_access_token() == 'token-1'
+    clock['now'] += 3000
+    assert tokens.get_access_token() == 'token-1'
+    clock['now'] += 400
+    assert tokens.get_access_token() == 'token-2'
+    assert tokens.refreshes == 2
+
+
+class PagedClient:
+    def __init__(self, total, empty_offsets = ()):
+        self.total = total
+        self.empty_offsets = set(empty_offsets)
+        self.calls = []
+
+    def playlist_items(self, playlist_id, offset, limit, fields, additional_types):
+        self.calls.append((offset, limit))
+        items = []
+        for i in range(offset, min(offset + limit, self.total)):
+            track = None if i in self.empty_offsets else {'id': str(i), 'name': f'Song {i}', 'album': {'name': 'Album', 'images': []}, 'artists': [{'name': 'Artist'}]}
+            items.append({'track': track})
+
+        has_next = offset + limit < self.total
+        return {'items': items, 'total': self.total, 'next': 'more' if has_next else None}
+
+
+def test_fetch_playlist_tracks_stops_at_max_tracks():
+    from brackify.spotify_client import fetch_playlist_tracks, playlist_total
+
+    client = PagedClient(5000)
+    tracks = fetch_playlist_tracks('123', client, max_tracks = 32)
+
+    assert [t['track_id'] for t in tracks] == [str(i) for i in range(32)]
+    assert client.calls == [(0, 32)]
+    assert playlist_total(tracks) == 5000
+
+
+def test_fetch_playlist_tracks_pages_past_empty_items():
+    from brackify.spotify_client import fetch_playlist_tracks
+
+    client = PagedClient(500, empty_offsets = {0, 5})
+    tracks = fetch_playlist_tracks('123', client, max_tracks = 8)
+
+    assert len(tracks) == 8
+    assert client.calls == [(0, 8), (8, 2)]
+
+
+def test_iter_playlist_pages_yields_each_page():
+    from brackify.spotify_client import iter_playlist_pages
+
+    client = PagedClient(250)
+    pages = list(iter_playlist_pages('123', client))
+
+    assert [p['offset'] for p in pages] == [0, 100, 200]
+    assert [len(p['tracks']) for p in pages] == [100, 100, 50]
+    assert all(p['total'] == 250 for p in pages)
+
+
+def test_concurrent_fetch_keeps_track_order():
+    from brackify.spotify_client import fetch_playlist_tracks
+
+    client = PagedClient(1050)
+    tracks = fetch_playlist_tracks('123', client, concurrency = 4)
+
+    assert [t['track_id'] for t in tracks] == [str(i) for i in range(1050)]
+    assert tracks.total == 1050
+    assert sorted(offset for offset, _ in client.calls) == list(range(0, 1050, 100))
+
+
+def test_page_requests_back_off_on_rate_limit(monkeypatch):
+    from brackify import spotify_client
+
+    sleeps = []
+    monkeypatch.setattr(spotify_client.time, 'sleep', sleeps.append)
+
+    class RateLimited(Exception):
+        http_status = 429
+        headers = {'Retry-After': '2'}
+
+    class FlakyClient(PagedClient):
+        def playlist_items(self, *args, **kwargs):
+            if not sleeps:
+                raise RateLimited()
+            return super().playlist_items(*args, **kwargs)
+
+    tracks = spotify_client.fetch_playlist_tracks('123', FlakyClient(10))
+
+    assert len(tracks) == 10
+    assert sleeps == [2.0]
+
+
+def test_spotify_failures_match_the_async_client(monkeypatch):
+    from brackify import spotify_client
+
+    monkeypatch.setattr(spotify_client.time, 'sleep', lambda seconds: None)
+
+    class SpotifyError(Exception):
+        def __init__(self, http_status):
+            super().__init__(f'http status: {http_status}')
+            self.http_status = http_status
+            self.headers = {'Retry-After': '0'}
+
+    class FailingClient(PagedClient):
+        def __init__(self, error):
+            super().__init__(10)
+            self.error = error
+
+        def playlist_items(self, *args, **kwargs):
+            raise self.error
+
+    with pytest.raises(ValueError, match = 'Playlist not found'):
+        spotify_client.fetch_playlist_tracks('123', FailingClient(SpotifyError(404)))
+    with pytest.raises(RuntimeError, match = 'status 429'):
+        spotify_client.fetch_playlist_tracks('123', FailingClient(SpotifyError(429)))
+    with pytest.raises(RuntimeError, match = 'a network error'):
+        spotify_client.fetch_playlist_tracks('123', FailingClient(ConnectionError('refused')))
+
+
+def test_fetch_playlist_sample_skips_unneeded_pages():
+    from brackify.spotify_client import fetch_playlist_tracks
+
+    client = PagedClient(10000, empty_offsets = set(range(100, 10000, 7)))
+    tracks = fetch_playlist_tracks('123', client, sample_size = 16, rng = random.Random(5))
+
+    assert len(tracks) == 16
+    assert len({t['track_id'] for t in tracks}) == 16
+    assert all(int(t['track_id']) % 7 != 2 or int(t['track_id']) < 100 for t in tracks)
+    assert tracks.total == 10000
+    assert len(client.calls) < 100
+
+
+def test_fetch_playlist_sample_is_reproducible():
+    from brackify.spotify_client import fetch_playlist_sample
+
+    first = fetch_playlist_sample('123', PagedClient(3000), 8, rng = random.Random(11))
+    second = fetch_playlist_sample('123', PagedClient(3000), 8, rng = random.Random(11))
+
+    assert [t['track_id'] for t in first] == [t['track_id'] for t in second]
+
+
+def test_fetch_playlist_sample_returns_all_when_short():
+    from brackify.spotify_client import fetch_playlist_sample
+
+    client = PagedClient(150, empty_offsets = set(range(20, 150)))
+    tracks = fetch_playlist_sample('123', client, 32, rng = random.Random(2))
+
+    assert [t['track_id'] for t in tracks] == [str(i) for i in range(20)]
+
+
+def test_track_info_keeps_every_size_and_picks_the_smallest_that_fits():
+    from brackify.spotify_client import _track_info
+
+    images = [
+        {'url': 'https://i.scdn.co/image/large', 'width': 640, 'height': 640},
+        {'url': 'https://i.scdn.co/image/medium', 'width': 300, 'height': 300},
+        {'url': 'https://i.scdn.co/image/small', 'width': 64, 'height': 64},
+    ]
+    track = _track_info({'track': {'id': '1', 'name': 'Song', 'album': {'name': 'Album', 'images': images}, 'artists': []}})
+    tiny = _track_info({'track': {'id': '2', 'name': 'Song', 'album': {'name': 'Album', 'images': images[2:]}, 'artists': []}})
+
+    assert track['image_url'] == 'https://i.scdn.co/image/medium'
+    assert [image['width'] for image in track['images']] == [640, 300, 64]
+    assert tiny['image_url'] == 'https://i.scdn.co/image/small'
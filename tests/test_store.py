@@ -0,0 +1,354 @@
+import pytest
+
+from brackify.breaker import CircuitBreaker
+from brackify.hashring import HashRing
+from brackify.store import InMemoryBracketStore, LayeredBracketStore, RedisBracketStore, ResilientBracketStore, ShardedBracketStore
+
+
+@pytest.fixture
+def redis_store():
+    fakeredis = pytest.importorskip('fakeredis')
+    return RedisBracketStore('redis://fake', client = fakeredis.FakeRedis())
+
+
+def _redis_shards(count):
+    fakeredis = pytest.importorskip('fakeredis')
+    return [(f'redis://node{i}', RedisBracketStore('redis://fake', client = fakeredis.FakeRedis(server = fakeredis.FakeServer()))) for i in range(count)]
+
+
+@pytest.fixture(params = ['memory', 'redis', 'layered', 'sharded'])
+def store(request):
+    if request.param == 'memory':
+        return InMemoryBracketStore()
+    if request.param == 'sharded':
+        return ShardedBracketStore(_redis_shards(3))
+    if request.param == 'layered':
+        return LayeredBracketStore(request.getfixturevalue('redis_store'))
+    return request.getfixturevalue('redis_store')
+
+
+def test_save_and_get_round_trip(store):
+    store.save('abc', {'bracket_id': 'abc'}, 60)
+
+    assert store.get('abc') == {'bracket_id': 'abc'}
+
+
+def test_non_positive_ttl_deletes(store):
+    store.save('abc', {'bracket_id': 'abc'}, 60)
+    store.save('abc', {'bracket_id': 'abc'}, 0)
+
+    assert store.get('abc') is None
+
+
+def test_lease_is_exclusive_until_released(store):
+    token = store.acquire_lease('sig', 30)
+
+    assert token
+    assert store.lease_held('sig')
+    assert store.acquire_lease('sig', 30) is None
+
+    store.release_lease('sig', 'not-the-owner')
+    assert store.lease_held('sig')
+
+    store.release_lease('sig', token)
+    assert not store.lease_held('sig')
+    assert store.acquire_lease('sig', 30)
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = InMemoryBracketStore(max_entries = 2)
+    store.save('a', {'n': 1}, 60)
+    store.save('b', {'n': 2}, 60)
+    store.get('a')
+    store.save('c', {'n': 3}, 60)
+
+    assert store.get('b') is None
+    assert store.get('a') == {'n': 1}
+    assert store.stats()['evictions'] == 1
+
+
+def test_memory_store_respects_byte_budget():
+    store = InMemoryBracketStore(max_bytes = 100)
+    store.save('a', {'blob': 'x' * 60}, 60)
+    store.save('b', {'blob': 'y' * 60}, 60)
+
+    assert store.get('a') is None
+    assert store.get('b') is not None
+    assert store.stats()['bytes'] <= 100
+
+
+def test_memory_store_sweep_reclaims_expired(monkeypatch):
+    from brackify import store as store_module
+
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(store_module.time, 'time', lambda: clock['now'])
+
+    store = InMemoryBracketStore()
+    store.save('short', {}, 10)
+    store.save('long', {}, 100)
+    store.save('short', {}, 20)
+
+    clock['now'] += 15
+    assert store.sweep() == 0
+
+    clock['now'] += 10
+    assert store.sweep() == 1
+    assert len(store) == 1
+    assert store.stats()['expirations'] == 1
+
+
+def test_memory_store_background_sweeper():
+    import time
+
+    store = InMemoryBracketStore(sweep_interval = 0.01)
+    expired_at = time.time() - 1
+    store._store['gone'] = ({}, expired_at, 0)
+    store._expiry_heap = [(expired_at, 'gone')]
+
+    deadline = time.time() + 2
+    while len(store) and time.time() < deadline:
+        time.sleep(0.01)
+
+    store.stop_sweeper()
+    assert len(store) == 0
+
+
+def test_save_many_and_get_many(store):
+    store.save_many([
+        ('bracket', {'bracket_id': 'bracket'}, 60),
+        ('sig', {'bracket_id': 'bracket'}, 60),
+    ])
+
+    assert store.get_many(['sig', 'missing', 'bracket']) == [
+        {'bracket_id': 'bracket'},
+        None,
+        {'bracket_id': 'bracket'},
+    ]
+
+
+def test_redis_save_many_is_one_transaction(redis_store):
+    redis_store.save('stale', {'old': True}, 60)
+
+    calls = []
+    original = redis_store._client.pipeline
+
+    def _pipeline(*args, **kwargs):
+        calls.append(kwargs)
+        return original(*args, **kwargs)
+
+    redis_store._client.pipeline = _pipeline
+    redis_store.save_many([('fresh', {'new': True}, 60), ('stale', {}, 0)])
+
+    assert calls == [{'transaction': True}]
+    assert redis_store.get_many(['fresh', 'stale']) == [{'new': True}, None]
+
+
+def test_touch_extends_without_rewriting(store):
+    payload = {'bracket_id': 'abc'}
+    store.save('abc', payload, 1)
+
+    assert store.touch_many(['abc', 'missing'], 60) == [True, False]
+    assert store.get_and_touch_many(['abc', 'missing'], 60) == [payload, None]
+
+
+def test_memory_touch_moves_expiry(monkeypatch):
+    from brackify import store as store_module
+
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(store_module.time, 'time', lambda: clock['now'])
+
+    store = InMemoryBracketStore()
+    store.save('abc', {}, 10)
+    assert store.touch('abc', 100)
+
+    clock['now'] += 50
+    assert store.sweep() == 0
+    assert store.get('abc') == {}
+
+
+def test_redis_touch_sets_expiry(redis_store):
+    redis_store.save('abc', {}, 10)
+    redis_store.touch('abc', 500)
+
+    assert redis_store._client.ttl('bracket:abc') > 10
+
+
+def test_redis_unreadable_payload_is_a_miss(redis_store):
+    redis_store._client.set('bracket:future', b'BRK\x09\x01\x00{}')
+    redis_store._client.set('bracket:corrupt', b'BRK\x01\x01\x01not zlib')
+    redis_store._client.set('bracket:truncated', b'BRK')
+
+    assert redis_store.get('future') is None
+    assert redis_store.get_with_ttl('corrupt') == (None, 0)
+    assert redis_store.get('truncated') is None
+    assert not redis_store._client.exists('bracket:truncated')
+    # A newer format is kept for workers that can read it; a corrupt value is dropped.
+    assert redis_store._client.exists('bracket:future')
+    assert not redis_store._client.exists('bracket:corrupt')
+
+
+def test_increment_counts_accumulates(store):
+    store.increment_counts('votes:a', {'submissions': 1, 'champion:x': 1}, 60)
+    store.increment_counts('votes:a', {'submissions': 1, 'champion:y': 1}, 60)
+
+    assert store.get_counts('votes:a') == {'submissions': 2, 'champion:x': 1, 'champion:y': 1}
+    assert store.get_counts('votes:missing') == {}
+
+
+def test_layered_store_serves_reads_from_l1(redis_store):
+    layered = LayeredBracketStore(redis_store, l1_ttl_seconds = 30)
+    layered.save('abc', {'bracket_id': 'abc'}, 10)
+    redis_store._client.get = lambda key: pytest.fail('read reached Redis')
+    redis_store._client.pipeline = lambda **kwargs: pytest.fail('read reached Redis')
+
+    payload, ttl = layered.get_with_ttl('abc')
+
+    assert payload == {'bracket_id': 'abc'}
+    assert 0 < ttl <= 10
+
+
+def test_layered_store_never_outlives_backend_expiry(monkeypatch, redis_store):
+    from brackify import store as store_module
+
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(store_module.time, 'time', lambda: clock['now'])
+
+    layered = LayeredBracketStore(redis_store, l1_ttl_seconds = 60)
+    layered.save('short', {}, 5)
+    layered.save('job:1', {'status': 'queued'}, 60)
+
+    assert layered.l1.get('short') is not None
+    assert layered.l1.get('job:1') is None
+
+    clock['now'] += 6
+    assert layered.l1.get('short') is None
+
+
+def test_layered_stores_invalidate_each_other_over_pubsub():
+    import time
+
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+
+    def _layered():
+        client = fakeredis.FakeRedis(server = server)
+        return LayeredBracketStore(RedisBracketStore('redis://fake', client = client), pubsub_client = client)
+
+    first, second = _layered(), _layered()
+    try:
+        first.save('abc', {'version': 1}, 60)
+        assert second.get('abc') == {'version': 1}
+
+        first.save('abc', {'version': 2}, 60)
+        deadline = time.monotonic() + 5
+        while second.l1.get('abc') is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert second.get('abc') == {'version': 2}
+    finally:
+        first.stop_listener()
+        second.stop_listener()
+
+
+def test_resilient_store_fails_over_and_recovers(redis_store):
+    up = {'value': True}
+    original_get = redis_store._client.get
+
+    def _get(key):
+        if not up['value']:
+            raise ConnectionError('redis is down')
+        return original_get(key)
+
+    redis_store._client.get = _get
+    breaker = CircuitBreaker(lambda: None, failure_threshold = 2, probe_interval = 60)
+    store = ResilientBracketStore(redis_store, InMemoryBracketStore(), breaker)
+    store.save('abc', {'bracket_id': 'abc'}, 60)
+
+    up['value'] = False
+    assert store.get('abc') is None
+    assert store.get('abc') is None
+    assert breaker.state == 'open' and store.degraded
+
+    # While open, calls skip Redis entirely and writes land in the local store.
+    redis_store._client.set = lambda *args, **kwargs: pytest.fail('write reached Redis')
+    store.save('local', {'bracket_id': 'local'}, 60)
+    assert store.get('local') == {'bracket_id': 'local'}
+    assert store.stats()['breaker']['rejected'] >= 2
+
+    up['value'] = True
+    breaker.reset()
+    assert store.get('abc') == {'bracket_id': 'abc'}
+    assert store.get('local') == {'bracket_id': 'local'}
+    breaker.stop()
+
+
+def test_breaker_probes_in_background_and_counts_slow_calls():
+    import time
+
+    healthy = {'value': False}
+
+    def _probe():
+        if not healthy['value']:
+            raise ConnectionError('down')
+
+    breaker = CircuitBreaker(_probe, failure_threshold = 1, slow_call_seconds = 0.01, probe_interval = 0.01)
+    breaker.call(lambda: time.sleep(0.02))
+    assert breaker.state == 'open'
+
+    healthy['value'] = True
+    deadline = time.monotonic() + 5
+    while breaker.state == 'open' and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert breaker.state == 'closed'
+    assert breaker.stats()['opened'] == 1
+    breaker.stop()
+
+
+def test_sharded_store_colocates_bracket_and_signature():
+    shards = _redis_shards(3)
+    store = ShardedBracketStore(shards)
+    pipelines = []
+
+    for _, shard in shards:
+        original = shard._client.pipeline
+
+        def _pipeline(*args, _original = original, **kwargs):
+            pipelines.append(kwargs)
+            return _original(*args, **kwargs)
+
+        shard._client.pipeline = _pipeline
+
+    placed = set()
+    for i in range(50):
+        key = f'playlist{i}|16|playlist|Bracket {i}'
+        bracket_id = store.new_bracket_id(key)
+        assert len(bracket_id) == 11
+        assert store.shard_for(bracket_id) is store.shard_for(key)
+        placed.add(id(store.shard_for(key)))
+
+        pipelines.clear()
+        store.save_many([(bracket_id, {'bracket_id': bracket_id}, 60), (key, {'bracket_id': bracket_id}, 60)])
+        assert pipelines == [{'transaction': True}]
+
+    assert len(placed) == 3
+
+    ids = [store.new_bracket_id(f'batch{i}') for i in range(30)]
+    store.save_many([(bracket_id, {'bracket_id': bracket_id}, 60) for bracket_id in ids])
+    pipelines.clear()
+
+    assert store.get_and_touch_many(ids + ['missing'], 60) == [{'bracket_id': bracket_id} for bracket_id in ids] + [None]
+    assert len(pipelines) <= 3
+
+
+def test_hash_ring_moves_few_keys_when_a_node_is_added():
+    keys = [f'key{i}' for i in range(5000)]
+    before = HashRing([(f'node{i}', i) for i in range(4)])
+    after = HashRing([(f'node{i}', i) for i in range(5)])
+
+    moved = sum(1 for key in keys if before.node_for(key) != after.node_for(key))
+    shares = [sum(1 for key in keys if after.node_for(key) == node) for node in range(5)]
+
+    assert moved / len(keys) < 0.3
+    assert all(after.node_for(key) == 4 for key in keys if before.node_for(key) != after.node_for(key))
+    assert min(shares) > 0.5 * max(shares)
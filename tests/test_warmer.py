@@ -0,0 +1,129 @@
+import time
+
+from benchmarks.fake_spotify import FakeSpotify
+from brackify.app import create_app
+from brackify.playlist_cache import PlaylistTrackCache
+from brackify.store import InMemoryBracketStore
+from brackify.warmer import PlaylistWarmer
+
+
+def _warmer(store, client, **kwargs):
+    kwargs.setdefault('interval', 0)
+    return PlaylistWarmer(store, PlaylistTrackCache(store), lambda: client, 3600, **kwargs)
+
+
+def test_recorded_requests_rank_playlists_and_signatures():
+    store = InMemoryBracketStore()
+    warmer = _warmer(store, FakeSpotify())
+
+    for _ in range(3):
+        warmer.record('https://open.spotify.com/playlist/popular?si=x', 'sig-popular')
+    warmer.record('quiet', 'sig-quiet')
+    warmer.flush()
+
+    assert warmer.hot('playlists', 10) == ['popular', 'quiet']
+    assert warmer.hot('signatures', 1) == ['sig-popular']
+
+
+def test_run_once_extends_hot_brackets():
+    store = InMemoryBracketStore()
+    store.save('bracket-1', {'bracket_id': 'bracket-1'}, 5)
+    store.save('sig-popular', {'bracket_id': 'bracket-1'}, 5)
+    warmer = _warmer(store, FakeSpotify(), top_playlists = 0)
+
+    warmer.record('popular', 'sig-popular')
+    warmer.record('popular', 'sig-gone')
+    result = warmer.run_once()
+
+    assert result['extended'] == 1
+    assert store._store['bracket-1'][1] > time.time() + 3000
+    assert store._store['sig-popular'][1] > time.time() + 3000
+
+
+def test_unchanged_playlist_costs_one_call():
+    store = InMemoryBracketStore()
+    client = FakeSpotify(total = 150)
+    warmer = _warmer(store, client)
+    warmer.record('popular', 'sig')
+
+    first = warmer.run_once()
+    store._leases.clear()
+    second = warmer.run_once()
+
+    assert first == {'extended': 0, 'refreshed': 1, 'calls': 3}
+    assert second == {'extended': 0, 'refreshed': 0, 'calls': 1}
+    assert warmer.cache.get('popular', client.snapshot_id)['complete']
+
+
+def test_refresh_stops_at_call_budget():
+    client = FakeSpotify(total = 1000)
+    warmer = _warmer(InMemoryBracketStore(), client, max_calls = 4, preload = ['one', 'two'])
+
+    result = warmer.run_once()
+
+    assert result['calls'] == 4
+    assert client.calls == 4
+    assert result['refreshed'] == 0
+
+
+def test_preloaded_playlists_are_refreshed_without_requests():
+    store = InMemoryBracketStore()
+    client = FakeSpotify(total = 50)
+    warmer = _warmer(store, client, preload = ['https://open.spotify.com/playlist/launch'])
+
+    assert warmer.run_once()['refreshed'] == 1
+    assert len(warmer.cache.get('launch', client.snapshot_id)['tracks']) == 50
+
+
+def test_lease_lets_one_worker_warm_per_interval():
+    store = InMemoryBracketStore()
+    client = FakeSpotify(total = 50)
+    first = _warmer(store, client, preload = ['launch'])
+    second = _warmer(store, client, preload = ['launch'])
+
+    assert first.run_once()['refreshed'] == 1
+    assert second.run_once() == {'extended': 0, 'refreshed': 0, 'calls': 0}
+
+
+def test_app_records_bracket_requests_for_the_warmer(monkeypatch):
+    monkeypatch.setenv('BRACKIFY_WARMER', '1')
+    monkeypatch.setenv('WARMER_INTERVAL_SECONDS', '0')
+    app = create_app()
+    client = app.test_client()
+
+    monkeypatch.setattr('brackify.app.get_spotify_client', lambda: None)
+    monkeypatch.setattr(
+        'brackify.app.fetch_playlist_tracks',
+        lambda playlist, sp, **kwargs: [{'track_id': str(i), 'song_name': f'Song {i}', 'artists': 'Artist', 'album_name': 'Album', 'image_url': None} for i in range(16)],
+    )
+
+    response = client.post('/api/bracket', json = {'playlist': 'playlist123', 'order': 'playlist', 'size': 16, 'bracket_name': 'Warm'})
+    app.warmer.flush()
+
+    assert response.status_code == 200
+    assert app.warmer.hot('playlists', 5) == ['playlist123']
+    assert len(app.warmer.hot('signatures', 5)) == 1
+
+
+def test_call_budget_holds_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from brackify.warmer import BudgetExhausted, _CountingClient
+
+    class Client:
+        def playlist(self):
+            time.sleep(0.001)
+
+    client = _CountingClient(Client(), 10)
+
+    def _call(_):
+        try:
+            client.playlist()
+            return True
+        except BudgetExhausted:
+            return False
+
+    with ThreadPoolExecutor(max_workers = 8) as pool:
+        made = sum(pool.map(_call, range(100)))
+
+    assert made == 10 and client.calls == 10